@@ -0,0 +1,10 @@
+# analytics/__init__.py
+# This file makes the 'analytics' directory a Python package.
+from .sentiment import SentimentLexicon, score_sentiment
+from .describe import ColumnStats, DescriptiveStats
+from .distributions import fit_distributions, normality_tests
+from .association import cramers_v, cramers_v_matrix
+from .urls import ParsedUrls, parse_urls
+from .ngrams import NgramCounter, count_ngrams
+from .near_duplicates import MinHasher, cluster_texts
+from .user_profiles import UserProfiles
@@ -0,0 +1,101 @@
+# analytics/association.py
+
+import numpy as np
+import pandas as pd
+
+# Largest number of cells of a dense contingency table; bigger tables only count their non-zero cells
+DENSE_TABLE_CELLS = 1 << 22
+
+
+def factorize_column(values) -> tuple:
+    """
+    Codes a categorical column as integers 0..k-1, with missing values as a category of their own
+    (dython replaces them with a constant, which has the same effect).
+
+    Returns:
+        tuple: The int64 codes and the number of categories k.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    codes = codes.astype(np.int64)
+    missing = codes < 0
+    if missing.any():
+        codes[missing] = len(uniques)
+        return codes, len(uniques) + 1
+    return codes, len(uniques)
+
+
+def _chi2(x_codes: np.ndarray, x_levels: int, y_codes: np.ndarray, y_levels: int) -> float:
+    """
+    Pearson's chi-squared statistic of the contingency table of two coded columns.
+
+    The table is counted with one bincount over the combined codes. A 2x2 table gets Yates'
+    continuity correction, like `scipy.stats.chi2_contingency`. Larger tables use
+    chi2 = n * (Σ O_ij² / (R_i C_j) - 1), which only needs the non-zero cells, so two
+    high-cardinality columns never materialize their full table.
+    """
+    n = len(x_codes)
+    rows = np.bincount(x_codes, minlength=x_levels).astype(np.float64)
+    cols = np.bincount(y_codes, minlength=y_levels).astype(np.float64)
+    combined = x_codes * y_levels + y_codes
+    if x_levels == 2 and y_levels == 2:
+        observed = np.bincount(combined, minlength=4).astype(np.float64)
+        expected = np.outer(rows, cols).ravel() / n
+        diff = expected - observed
+        observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+        return float(np.sum((observed - expected) ** 2 / expected))
+
+    if x_levels * y_levels <= DENSE_TABLE_CELLS:
+        cells = np.bincount(combined, minlength=x_levels * y_levels)
+        nonzero = np.flatnonzero(cells)
+        observed = cells[nonzero].astype(np.float64)
+    else:
+        nonzero, observed = np.unique(combined, return_counts=True)
+        observed = observed.astype(np.float64)
+    row_totals, col_totals = rows[nonzero // y_levels], cols[nonzero % y_levels]
+    return float(n * (np.sum(observed * observed / (row_totals * col_totals)) - 1))
+
+
+def cramers_v(x_codes: np.ndarray, x_levels: int, y_codes: np.ndarray, y_levels: int, bias_correction: bool = True) -> float:
+    """
+    Cramér's V of two coded columns (see `factorize_column`), with the bias correction of
+    Bergsma and Wicher (2013) by default, as in `dython.nominal.cramers_v`.
+
+    Returns NaN when either column has a single category.
+    """
+    n = len(x_codes)
+    if x_levels < 2 or y_levels < 2 or n < 2:
+        return np.nan
+    phi2 = _chi2(x_codes, x_levels, y_codes, y_levels) / n
+    r, k = x_levels, y_levels
+    if bias_correction:
+        phi2 = max(0.0, phi2 - (k - 1) * (r - 1) / (n - 1))
+        r = r - (r - 1) ** 2 / (n - 1)
+        k = k - (k - 1) ** 2 / (n - 1)
+    denominator = min(k - 1, r - 1)
+    if denominator <= 0:
+        return np.nan
+    return float(min(np.sqrt(phi2 / denominator), 1.0))
+
+
+def cramers_v_matrix(df: pd.DataFrame, columns: list = None, bias_correction: bool = True) -> pd.DataFrame:
+    """
+    Cramér's V between every pair of categorical columns, on every row.
+
+    Each column is factorized once; every pair then costs one bincount over the rows,
+    so adding a column with thousands of categories (a group id, a domain) stays cheap.
+
+    Returns:
+        pd.DataFrame: The symmetric association matrix, with 1 on the diagonal. A column with
+        a single category has no association with anything (0, also on the diagonal), as in
+        `dython.nominal.associations`.
+    """
+    columns = list(columns if columns is not None else df.columns)
+    coded = {col: factorize_column(df[col]) for col in columns}
+    matrix = pd.DataFrame(np.eye(len(columns)), index=columns, columns=columns)
+    for i, x in enumerate(columns):
+        for y in columns[i:]:
+            if coded[x][1] < 2 or coded[y][1] < 2:
+                matrix.loc[x, y] = matrix.loc[y, x] = 0.0
+            elif x != y:
+                matrix.loc[x, y] = matrix.loc[y, x] = cramers_v(*coded[x], *coded[y], bias_correction=bias_correction)
+    return matrix
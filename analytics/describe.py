@@ -0,0 +1,171 @@
+# analytics/describe.py
+
+import numpy as np
+import pandas as pd
+
+
+def _lerp(low, high, t):
+    # Same interpolation as numpy's 'linear' quantile method (used by pandas), element-wise
+    diff = high - low
+    return np.where(t >= 0.5, high - diff * (1 - t), low + diff * t)
+
+
+class ColumnStats:
+    """
+    Mergeable summary of one numeric column: its distinct values and how often each occurs.
+
+    Every statistic (count, mean, std, min, max, exact quantiles, cardinality and the
+    frequency table) is derived from the distinct values, which are found with a single
+    sort of the column. Summaries of chunks of the same column combine with `merge`.
+    """
+
+    def __init__(self, name: str, values: np.ndarray, counts: np.ndarray, missing: int = 0, dtype=np.float64):
+        self.name = name
+        self.values = values
+        self.counts = counts
+        self.missing = int(missing)
+        self.dtype = np.dtype(dtype)
+        self._count = int(np.sum(counts))
+        self._cumulative = None
+
+    @classmethod
+    def from_array(cls, name: str, array) -> 'ColumnStats':
+        """Summarizes an array of numbers; NaN values are counted as missing."""
+        dtype = np.asarray(array).dtype
+        data = np.sort(np.asarray(array, dtype=np.float64))
+        # np.sort puts NaN last, and searchsorted follows the same order
+        valid = data[:np.searchsorted(data, np.nan, side='left')]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(valid)) + 1]) if len(valid) else np.zeros(0, dtype=np.int64)
+        counts = np.diff(np.append(starts, len(valid))).astype(np.int64)
+        return cls(name, valid[starts], counts, missing=len(data) - len(valid), dtype=dtype)
+
+    def merge(self, other: 'ColumnStats') -> 'ColumnStats':
+        """Returns the summary of both chunks together."""
+        values, inverse = np.unique(np.concatenate([self.values, other.values]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(values)).astype(np.int64)
+        dtype = self.dtype if self.dtype == other.dtype else np.float64
+        return ColumnStats(self.name, values, counts, missing=self.missing + other.missing, dtype=dtype)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def nunique(self) -> int:
+        return len(self.values)
+
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.counts) / self.count) if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), as in pandas."""
+        if self.count < 2:
+            return np.nan
+        deviations = self.values - self.mean
+        return float(np.sqrt(np.dot(self.counts, deviations * deviations) / (self.count - 1)))
+
+    @property
+    def min(self):
+        return self._cast(self.values[0]) if self.nunique else np.nan
+
+    @property
+    def max(self):
+        return self._cast(self.values[-1]) if self.nunique else np.nan
+
+    def _value_at(self, positions) -> np.ndarray:
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.counts)
+        return self.values[np.searchsorted(self._cumulative, positions, side='right')]
+
+    def quantile(self, q: float) -> float:
+        """Exact quantile with linear interpolation, like `Series.quantile`."""
+        return float(self.quantiles([q])[0])
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Exact quantiles for an array of probabilities, in one pass."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.count:
+            return np.full(len(qs), np.nan)
+        positions = (self.count - 1) * qs
+        low = np.floor(positions).astype(np.int64)
+        high = np.minimum(low + 1, self.count - 1)
+        return _lerp(self._value_at(low), self._value_at(high), positions - low)
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def sample(self, n: int, seed: int = None) -> np.ndarray:
+        """Draws `n` rows at random (with replacement), without expanding the column."""
+        rng = np.random.default_rng(seed)
+        return self._cast(rng.choice(self.values, size=n, p=self.counts / self.count))
+
+    def value_counts(self) -> pd.Series:
+        """The frequency table, most frequent values first (ties in ascending value order)."""
+        order = np.argsort(-self.counts, kind='stable')
+        return pd.Series(self.counts[order], index=pd.Index(self._cast(self.values[order]), name=self.name), name='Count')
+
+    def _cast(self, values):
+        # Integer columns report their values as integers
+        return values.astype(self.dtype) if self.dtype.kind in 'iub' else values
+
+
+class DescriptiveStats:
+    """
+    Descriptive statistics of several numeric columns, computed with one sort per column.
+
+    Build it from a frame with `from_frame` or from chunks with `from_chunks`; the
+    partial results of different chunks are combined with `merge`.
+    """
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: list = None) -> 'DescriptiveStats':
+        columns = columns if columns is not None else df.select_dtypes(include=['number']).columns.tolist()
+        return cls({col: ColumnStats.from_array(col, df[col].to_numpy()) for col in columns})
+
+    @classmethod
+    def from_chunks(cls, chunks, columns: list = None) -> 'DescriptiveStats':
+        result = None
+        for chunk in chunks:
+            partial = cls.from_frame(chunk, columns)
+            result = partial if result is None else result.merge(partial)
+        return result if result is not None else cls({})
+
+    def merge(self, other: 'DescriptiveStats') -> 'DescriptiveStats':
+        merged = dict(self.columns)
+        for col, stats in other.columns.items():
+            merged[col] = merged[col].merge(stats) if col in merged else stats
+        return DescriptiveStats(merged)
+
+    def __getitem__(self, col: str) -> ColumnStats:
+        return self.columns[col]
+
+    def central_tendency(self, col: str) -> pd.DataFrame:
+        """Mean, median and count of a column, as a one-row table."""
+        stats = self.columns[col]
+        return pd.DataFrame([{'mean': stats.mean, 'median': stats.median, 'count': stats.count}], index=[col])
+
+    def variability(self, col: str) -> pd.DataFrame:
+        """Standard deviation, minimum and maximum of a column, as a one-row table."""
+        stats = self.columns[col]
+        return pd.DataFrame([{'std': stats.std, 'min': stats.min, 'max': stats.max}], index=[col])
+
+    def frequency_table(self, col: str) -> pd.DataFrame:
+        """The value counts of a column, as a two-column table."""
+        return self.columns[col].value_counts().reset_index()
+
+    def summary(self) -> pd.DataFrame:
+        """The statistics of every column, like `DataFrame.describe` plus the cardinality."""
+        rows = {}
+        for col, stats in self.columns.items():
+            rows[col] = {
+                'count': stats.count, 'mean': stats.mean, 'std': stats.std, 'min': stats.min,
+                '25%': stats.quantile(0.25), '50%': stats.median, '75%': stats.quantile(0.75),
+                'max': stats.max, 'nunique': stats.nunique,
+            }
+        return pd.DataFrame(rows)
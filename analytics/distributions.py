@@ -0,0 +1,192 @@
+# analytics/distributions.py
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from .describe import ColumnStats
+
+DEFAULT_MAX_BINS = 1000
+SHAPIRO_MAX_N = 5000
+ALPHA = 0.05
+
+
+def _moments(column: ColumnStats) -> tuple:
+    # Mean and 2nd-4th central moments (population), from the distinct values and their counts
+    weights = column.counts / column.count
+    mean = float(np.dot(weights, column.values))
+    deviations = column.values - mean
+    squared = deviations * deviations
+    return mean, float(np.dot(weights, squared)), float(np.dot(weights, squared * deviations)), float(np.dot(weights, squared * squared))
+
+
+def _is_integer_valued(column: ColumnStats) -> bool:
+    return column.dtype.kind in 'iub' or bool(np.all(column.values == np.round(column.values)))
+
+
+def _anderson_darling_normal(column: ColumnStats, mean: float, std: float) -> tuple:
+    """
+    Anderson-Darling statistic against a normal distribution with estimated parameters
+    (`std` is the sample standard deviation, as in `scipy.stats.anderson`).
+
+    With the sorted sample x_1..x_n, A² = -n - 1/n Σ [(2j-1) ln F(x_j) + (2n+1-2j) ln(1-F(x_j))];
+    rows sharing a value share F, so each distinct value adds its whole block of j at once.
+    The p-value follows D'Agostino & Stephens (1986), case 3.
+    """
+    n = column.count
+    end = np.cumsum(column.counts).astype(np.float64)
+    start = end - column.counts + 1
+    # Σ(2j-1) and Σ(2n+1-2j) over the positions start..end of each value
+    low_weight = end ** 2 - (start - 1) ** 2
+    high_weight = column.counts * (2 * n + 1) - (end * (end + 1) - (start - 1) * start)
+    z = (column.values - mean) / std
+    a2 = -n - (np.dot(low_weight, stats.norm.logcdf(z)) + np.dot(high_weight, stats.norm.logsf(z))) / n
+    a_star = a2 * (1 + 0.75 / n + 2.25 / n ** 2)
+    if a_star >= 153.4:
+        # The fitted curve turns upward past its minimum; p is already ~0 there
+        p = 0.0
+    elif a_star >= 0.6:
+        p = np.exp(1.2937 - 5.709 * a_star + 0.0186 * a_star ** 2)
+    elif a_star >= 0.34:
+        p = np.exp(0.9177 - 4.279 * a_star - 1.38 * a_star ** 2)
+    elif a_star >= 0.2:
+        p = 1 - np.exp(-8.318 + 42.796 * a_star - 59.938 * a_star ** 2)
+    else:
+        p = 1 - np.exp(-13.436 + 101.14 * a_star - 223.73 * a_star ** 2)
+    return float(a2), float(min(max(p, 0.0), 1.0))
+
+
+def _ks_statistic(ecdf_after: np.ndarray, ecdf_before: np.ndarray, cdf: np.ndarray) -> float:
+    # Largest gap between the model CDF and the empirical CDF just before and at each point
+    return float(max(np.max(np.abs(ecdf_after - cdf)), np.max(np.abs(ecdf_before - cdf)))) if len(cdf) else np.nan
+
+
+def normality_tests(column: ColumnStats, sample_size: int = SHAPIRO_MAX_N, seed: int = 42) -> pd.DataFrame:
+    """
+    Tests whether a column looks Gaussian, at a cost that depends on its distinct values, not rows.
+
+    - Shapiro-Wilk on the whole column, or on a seeded random sample of `sample_size` rows
+      for larger columns (the test is only defined up to 5000 rows).
+    - Anderson-Darling, Jarque-Bera and Kolmogorov-Smirnov on every row, computed from the
+      distinct values and their counts (Jarque-Bera only needs the moments). The normal is
+      fitted to the same data, so the KS p-value is only approximate.
+
+    Returns:
+        pd.DataFrame: One row per test with the rows used, the statistic, the p-value and
+        whether normality is kept at the 5% level. Empty when the column has fewer than 3
+        values or only one distinct value.
+    """
+    n = column.count
+    if n < 3 or column.nunique < 2:
+        return pd.DataFrame(columns=['Test', 'N', 'Statistic', 'p-value', 'Gaussian (5%)'])
+    mean, m2, m3, m4 = _moments(column)
+    std = np.sqrt(m2)
+    rows = []
+
+    if n <= sample_size:
+        sample = np.repeat(column.values, column.counts)
+    else:
+        sample = column.sample(sample_size, seed=seed)
+    statistic, p = stats.shapiro(sample)
+    rows.append(('Shapiro-Wilk', len(sample), statistic, p))
+
+    # The p-value fit of case 3 assumes the sample standard deviation (ddof=1)
+    statistic, p = _anderson_darling_normal(column, mean, column.std)
+    rows.append(('Anderson-Darling', n, statistic, p))
+
+    jarque_bera = n / 6 * (m3 ** 2 / m2 ** 3 + (m4 / m2 ** 2 - 3) ** 2 / 4)
+    rows.append(('Jarque-Bera', n, jarque_bera, stats.chi2.sf(jarque_bera, 2)))
+
+    ecdf = np.cumsum(column.counts) / n
+    statistic = _ks_statistic(ecdf, ecdf - column.counts / n, stats.norm.cdf(column.values, mean, std))
+    rows.append(('Kolmogorov-Smirnov', n, statistic, stats.kstwo.sf(statistic, n)))
+
+    result = pd.DataFrame(rows, columns=['Test', 'N', 'Statistic', 'p-value'])
+    result['Gaussian (5%)'] = result['p-value'] > ALPHA
+    return result
+
+
+# Candidate name -> (scipy distribution, is discrete, number of parameters, parameters from the moments)
+# The parameter functions get (mean, variance, min, max, mean of log, variance of log) and return
+# the keyword arguments of the distribution, or None when it cannot describe the data.
+CANDIDATE_DISTRIBUTIONS = {
+    'normal': (stats.norm, False, 2, lambda m, v, lo, hi, lm, lv: {'loc': m, 'scale': np.sqrt(v)}),
+    'lognormal': (stats.lognorm, False, 2, lambda m, v, lo, hi, lm, lv: {'s': np.sqrt(lv), 'scale': np.exp(lm)} if lo > 0 and lv > 0 else None),
+    'exponential': (stats.expon, False, 1, lambda m, v, lo, hi, lm, lv: {'scale': m} if lo >= 0 and m > 0 else None),
+    'gamma': (stats.gamma, False, 2, lambda m, v, lo, hi, lm, lv: {'a': m * m / v, 'scale': v / m} if lo > 0 else None),
+    'uniform': (stats.uniform, False, 2, lambda m, v, lo, hi, lm, lv: {'loc': lo, 'scale': hi - lo}),
+    'poisson': (stats.poisson, True, 1, lambda m, v, lo, hi, lm, lv: {'mu': m} if lo >= 0 and m > 0 else None),
+    'negative binomial': (stats.nbinom, True, 2, lambda m, v, lo, hi, lm, lv: {'n': m * m / (v - m), 'p': m / v} if lo >= 0 and v > m > 0 else None),
+}
+
+
+def _bins(column: ColumnStats, integer_valued: bool, max_bins: int) -> tuple:
+    """
+    Cut points and counts of a histogram of the column with at most `max_bins` bins.
+
+    Bins are (-inf, c_1], (c_1, c_2], ..., (c_k, inf), so the model probabilities of the bins
+    sum to one. Integer columns get one bin per value when they have few enough values, and
+    are cut half-way between integers otherwise; other columns are cut at their quantiles.
+    """
+    if integer_valued and column.nunique <= max_bins:
+        cuts = column.values[:-1] + 0.5
+    else:
+        cuts = np.unique(column.quantiles(np.arange(1, max_bins) / max_bins))
+        cuts = cuts[cuts < column.values[-1]]
+        if integer_valued:
+            cuts = cuts + 0.5
+    cumulative = np.concatenate([[0], np.cumsum(column.counts)])
+    below = cumulative[np.searchsorted(column.values, cuts, side='right')]
+    counts = np.diff(np.concatenate([[0], below, [column.count]]))
+    return cuts, counts
+
+
+def fit_distributions(column: ColumnStats, candidates: list = None, max_bins: int = DEFAULT_MAX_BINS) -> pd.DataFrame:
+    """
+    Fits candidate distributions to a column and ranks them by AIC.
+
+    Parameters come from the moments of the column (maximum likelihood for the normal,
+    lognormal and exponential, method of moments otherwise). Every candidate is then scored
+    on the same histogram of at most `max_bins` bins with the multinomial log-likelihood,
+    so continuous and discrete candidates are comparable and the cost does not depend on
+    the number of rows. Discrete candidates are only tried on non-negative integer columns.
+
+    Returns:
+        pd.DataFrame: One row per candidate that applies, best first, with its parameters,
+        log-likelihood, AIC and the Kolmogorov-Smirnov distance measured at the bin edges.
+    """
+    columns = ['Distribution', 'Parameters', 'Log-Likelihood', 'AIC', 'KS Statistic']
+    if column.count < 2 or column.nunique < 2:
+        return pd.DataFrame(columns=columns)
+    integer_valued = _is_integer_valued(column)
+    mean, variance, _, _ = _moments(column)
+    low, high = float(column.values[0]), float(column.values[-1])
+    if low > 0:
+        log_column = ColumnStats(column.name, np.log(column.values), column.counts)
+        log_mean, log_variance, _, _ = _moments(log_column)
+    else:
+        log_mean, log_variance = np.nan, np.nan
+    cuts, counts = _bins(column, integer_valued, max_bins)
+    observed = counts > 0
+    ecdf = np.cumsum(counts)[:-1] / column.count
+
+    rows = []
+    for name in candidates or CANDIDATE_DISTRIBUTIONS:
+        distribution, discrete, n_params, estimate = CANDIDATE_DISTRIBUTIONS[name]
+        if discrete and not integer_valued:
+            continue
+        params = estimate(mean, variance, low, high, log_mean, log_variance)
+        if params is None:
+            continue
+        if integer_valued and name == 'uniform':
+            params = {'loc': low - 0.5, 'scale': high - low + 1}
+        cdf = distribution(**params).cdf(cuts)
+        probabilities = np.diff(np.concatenate([[0.0], cdf, [1.0]]))
+        log_likelihood = float(np.dot(counts[observed], np.log(np.maximum(probabilities[observed], 1e-300))))
+        rows.append({
+            'Distribution': name,
+            'Parameters': ', '.join(f"{key}={value:.4g}" for key, value in params.items()),
+            'Log-Likelihood': log_likelihood,
+            'AIC': 2 * n_params - 2 * log_likelihood,
+            'KS Statistic': _ks_statistic(ecdf, ecdf, cdf),
+        })
+    return pd.DataFrame(rows, columns=columns).sort_values('AIC', kind='stable').reset_index(drop=True)
@@ -0,0 +1,133 @@
+# analytics/near_duplicates.py
+
+import numpy as np
+import pyarrow as pa
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_BATCH_SIZE = 1_000
+
+_FNV_PRIME = np.uint64(1099511628211)
+_PERM_BLOCK = 16
+
+
+def _normalize(text) -> str:
+    return ' '.join(text.lower().split()) if isinstance(text, str) else ''
+
+
+class MinHasher:
+    """
+    Builds MinHash signatures of texts from their character shingles.
+
+    Texts are lowercased and their whitespace collapsed, then every run of
+    `shingle_size` UTF-8 bytes is hashed (texts shorter than that are one shingle).
+    Shingling and hashing are vectorized over a whole batch of texts with numpy, and the
+    permutations are multiply-shift hash functions over the 32-bit shingle hashes.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = 5, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, texts: list) -> tuple:
+        array = pa.array([_normalize(text) for text in texts], type=pa.large_string())
+        _, offsets_buffer, data_buffer = array.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[:len(array) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+        data = data[offsets[0]:offsets[-1]]
+        offsets = offsets - offsets[0]
+        lengths = np.diff(offsets)
+
+        owner = np.repeat(np.arange(len(texts)), lengths)
+        positions = np.arange(len(data))
+        text_end = offsets[1:][owner]
+        hashes = np.zeros(len(data), dtype=np.uint64)
+        for i in range(self.shingle_size):
+            index = positions + i
+            byte = np.where(index < text_end, data[np.minimum(index, max(len(data) - 1, 0))], 0).astype(np.uint64)
+            hashes = (hashes * _FNV_PRIME) ^ byte
+        valid = (positions + self.shingle_size <= text_end) | ((positions == offsets[:-1][owner]) & (lengths[owner] < self.shingle_size))
+        hashes = hashes[valid]
+        return owner[valid], (hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+    def signatures(self, texts: list) -> tuple:
+        """
+        Returns the signatures of a batch of texts.
+
+        Returns:
+            tuple: A (len(texts), num_perm) uint32 array and a boolean array telling which
+            texts had any shingle (empty texts get no meaningful signature).
+        """
+        owner, hashes = self._shingles(texts)
+        counts = np.bincount(owner, minlength=len(texts))
+        has_shingles = counts > 0
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        if not len(hashes):
+            return signatures, has_shingles
+        # Shingles are grouped by text, so each text's minimum is a reduceat over its segment
+        segment_starts = (np.cumsum(counts) - counts)[has_shingles]
+        for start in range(0, self.num_perm, _PERM_BLOCK):
+            a = self.a[start:start + _PERM_BLOCK]
+            b = self.b[start:start + _PERM_BLOCK]
+            values = (hashes[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)
+            signatures[has_shingles, start:start + len(a)] = np.minimum.reduceat(values, segment_starts, axis=0)
+        return signatures, has_shingles
+
+
+def cluster_texts(texts, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS,
+                  batch_size: int = DEFAULT_BATCH_SIZE, seed: int = 42) -> np.ndarray:
+    """
+    Groups near-duplicate texts, without comparing every pair.
+
+    Signatures are split into `bands`; texts that agree on a whole band land in the same
+    bucket, and each bucket member becomes a candidate pair with the first text of the
+    bucket. A candidate pair is kept when the signatures estimate a Jaccard similarity of
+    at least `threshold`, and clusters are the connected components of the kept pairs.
+
+    Args:
+        texts: Distinct texts (for example the text pool); missing values stay alone.
+
+    Returns:
+        np.ndarray: For each text, the index of the first text of its cluster.
+    """
+    texts = list(texts)
+    n = len(texts)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    hasher = MinHasher(num_perm, seed=seed)
+    signatures = np.empty((n, num_perm), dtype=np.uint32)
+    has_shingles = np.empty(n, dtype=bool)
+    for start in range(0, n, batch_size):
+        signatures[start:start + batch_size], has_shingles[start:start + batch_size] = hasher.signatures(texts[start:start + batch_size])
+
+    rows = num_perm // bands
+    candidates = np.flatnonzero(has_shingles)
+    sources, targets = [], []
+    for band in range(bands):
+        block = signatures[candidates, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = np.zeros(len(candidates), dtype=np.uint64)
+        for column in range(rows):
+            keys = (keys * _FNV_PRIME) ^ block[:, column]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        bucket_start = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        first = order[np.maximum.accumulate(np.where(bucket_start, np.arange(len(order)), 0))]
+        linked = first != order
+        sources.append(candidates[first[linked]])
+        targets.append(candidates[order[linked]])
+    sources = np.concatenate(sources) if sources else np.zeros(0, dtype=np.int64)
+    targets = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+
+    similarity = (signatures[sources] == signatures[targets]).mean(axis=1) if len(sources) else np.zeros(0)
+    keep = similarity >= threshold
+    graph = coo_matrix((np.ones(keep.sum(), dtype=np.int8), (sources[keep], targets[keep])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    representative = np.full(labels.max() + 1, n, dtype=np.int64)
+    np.minimum.at(representative, labels, np.arange(n))
+    return representative[labels]
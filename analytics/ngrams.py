@@ -0,0 +1,140 @@
+# analytics/ngrams.py
+
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Portuguese stop words (the usual NLTK list plus common chat abbreviations).
+PORTUGUESE_STOP_WORDS = frozenset("""
+a à ao aos aquela aquelas aquele aqueles aquilo as às até com como da das de dela delas dele deles depois do dos
+e é ela elas ele eles em entre era eram éramos essa essas esse esses esta está estamos estão estas estava estavam
+estávamos este esteja estejam estejamos estes esteve estive estivemos estiver estivera estiveram estivéramos
+estiverem estivermos estivesse estivessem estivéssemos estou eu foi fomos for fora foram fôramos forem formos fosse
+fossem fôssemos fui há haja hajam hajamos hão havemos havia hei houve houvemos houver houvera houverá houveram
+houvéramos houverão houverei houverem houveremos houveria houveriam houveríamos houvermos houvesse houvessem
+houvéssemos isso isto já lhe lhes mais mas me mesmo meu meus minha minhas muito na não nas nem no nos nós nossa
+nossas nosso nossos num numa o os ou para pela pelas pelo pelos por qual quando que quem são se seja sejam sejamos
+sem ser será serão serei seremos seria seriam seríamos seu seus só somos sou sua suas também te tem tém temos tenha
+tenham tenhamos tenho terá terão terei teremos teria teriam teríamos teu teus teve tinha tinham tínhamos tive tivemos
+tiver tivera tiveram tivéramos tiverem tivermos tivesse tivessem tivéssemos tu tua tuas um uma você vocês vos
+aí aqui lá sim ainda então porque pois sobre cada todo toda todos todas outro outra outros outras pra pro vc vcs q tá
+""".split())
+
+NGRAM_NAMES = {1: 'Unigram', 2: 'Bigram', 3: 'Trigram'}
+DEFAULT_CHUNK_SIZE = 20_000
+
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+
+
+def tokenize(text: str, stop_words=PORTUGUESE_STOP_WORDS) -> list:
+    """Lowercases a text and returns its words, without stop words and single letters."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in stop_words]
+
+
+class NgramCounter:
+    """
+    Counts the n-grams of several orders; counters of different chunks combine with `merge`.
+
+    With `capacity`, each order keeps at most about 2 x `capacity` n-grams using the
+    Misra-Gries heavy-hitters summary: whenever the table grows past that, the
+    (capacity + 1)-th largest count is subtracted from every entry and the entries that
+    drop to zero are removed. Memory is then bounded regardless of the vocabulary, every
+    n-gram more frequent than total / (capacity + 1) is kept, and the reported counts
+    are lower bounds that are off by at most `error[order]`.
+    """
+
+    def __init__(self, orders=(1, 2, 3), capacity: int = None):
+        self.orders = tuple(orders)
+        self.capacity = capacity
+        self.counts = {order: Counter() for order in self.orders}
+        self.error = {order: 0 for order in self.orders}
+
+    def update(self, texts, weights=None, stop_words=PORTUGUESE_STOP_WORDS):
+        """Adds the n-grams of `texts`; each text counts `weights[i]` times (default once)."""
+        for i, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            weight = 1 if weights is None else int(weights[i])
+            tokens = tokenize(text, stop_words)
+            for order in self.orders:
+                counts = self.counts[order]
+                for start in range(len(tokens) - order + 1):
+                    counts[' '.join(tokens[start:start + order])] += weight
+        self._compact()
+
+    def merge(self, other: 'NgramCounter') -> 'NgramCounter':
+        """Adds the counts of another counter into this one and returns it."""
+        for order in self.orders:
+            self.counts[order].update(other.counts[order])
+            self.error[order] += other.error[order]
+        self._compact()
+        return self
+
+    def _compact(self):
+        if self.capacity is None:
+            return
+        for order, counts in self.counts.items():
+            if len(counts) <= 2 * self.capacity:
+                continue
+            threshold = sorted(counts.values(), reverse=True)[self.capacity]
+            self.counts[order] = Counter({gram: count - threshold for gram, count in counts.items() if count > threshold})
+            self.error[order] += threshold
+
+    def most_common(self, order: int, n: int = 30) -> list:
+        """The `n` most frequent n-grams of an order, as (n-gram, count) pairs."""
+        return sorted(self.counts[order].items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+_worker_options = None
+
+
+def _init_worker(options):
+    global _worker_options
+    _worker_options = options
+
+
+def _count_chunk(chunk):
+    orders, capacity, stop_words = _worker_options
+    texts, weights = chunk
+    counter = NgramCounter(orders, capacity)
+    counter.update(texts, weights, stop_words)
+    return counter
+
+
+def count_ngrams(chunks, orders=(1, 2, 3), n_jobs: int = None, capacity: int = None, stop_words=PORTUGUESE_STOP_WORDS) -> NgramCounter:
+    """
+    Counts n-grams over a stream of text chunks, spreading the chunks over worker processes.
+
+    Args:
+        chunks: Iterable of `(texts, weights)` pairs; `weights` may be None. Chunks are
+            consumed lazily, with only a few of them in flight at a time.
+        orders (tuple): N-gram orders to count.
+        n_jobs (int): Worker processes. Defaults to the number of CPUs; with one job the
+            chunks are counted in-process.
+        capacity (int): Enables the bounded-memory heavy-hitters mode (see `NgramCounter`).
+        stop_words: Words removed before forming n-grams.
+
+    Returns:
+        NgramCounter: The merged counts.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    options = (tuple(orders), capacity, frozenset(stop_words))
+    result = NgramCounter(orders, capacity)
+    if n_jobs == 1:
+        _init_worker(options)
+        for chunk in chunks:
+            result.merge(_count_chunk(chunk))
+        return result
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(options,)) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_count_chunk, chunk))
+            if len(pending) >= 2 * n_jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result.merge(future.result())
+        for future in pending:
+            result.merge(future.result())
+    return result
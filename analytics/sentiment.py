@@ -0,0 +1,232 @@
+# analytics/sentiment.py
+
+import csv
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# The keyword lists used by Part 1 since the first version of the pipeline.
+POSITIVE_WORDS = ['bom', 'ótimo', 'excelente', 'gostei', 'amo', 'feliz', 'sucesso']
+NEGATIVE_WORDS = ['ruim', 'péssimo', 'odeio', 'triste', 'problema', 'lixo']
+
+# Normalization constant for the continuous score (same form as VADER's compound score).
+SCORE_ALPHA = 15.0
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+class KeywordAutomaton:
+    """
+    An Aho-Corasick automaton over the UTF-8 bytes of a word list.
+
+    The automaton is stepped for a whole batch of texts at once: every numpy step
+    advances all texts by one byte, so the cost depends on the total text length and
+    not on the number of words. Matching bytes is equivalent to matching characters
+    because UTF-8 is self-synchronizing.
+    """
+
+    def __init__(self, words: list):
+        encoded = [word.encode('utf-8') for word in words]
+        alphabet = sorted({byte for word in encoded for byte in word})
+        # Bytes that never occur in a word share class 0, which keeps the table narrow
+        self.byte_class = np.zeros(256, dtype=np.int32)
+        self.byte_class[alphabet] = np.arange(1, len(alphabet) + 1)
+        n_classes = len(alphabet) + 1
+
+        goto = [{}]
+        outputs = [[]]
+        for word_id, word in enumerate(encoded):
+            state = 0
+            for byte in word:
+                symbol = self.byte_class[byte]
+                if symbol not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+            outputs[state].append(word_id)
+
+        # Breadth-first construction of the failure links and the full transition table
+        table = np.zeros((len(goto), n_classes), dtype=np.int32)
+        fail = np.zeros(len(goto), dtype=np.int32)
+        queue = deque(goto[0].values())
+        for symbol, child in goto[0].items():
+            table[0, symbol] = child
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for symbol in range(n_classes):
+                child = goto[state].get(symbol)
+                if child is None:
+                    table[state, symbol] = table[fail[state], symbol]
+                else:
+                    table[state, symbol] = child
+                    fail[child] = table[fail[state], symbol]
+                    queue.append(child)
+
+        self.table = table
+        self.has_output = np.array([bool(out) for out in outputs])
+        self.output_ptr = np.concatenate([[0], np.cumsum([len(out) for out in outputs])]).astype(np.int64)
+        self.output_ids = np.array([word_id for out in outputs for word_id in out], dtype=np.int64)
+        self.n_words = len(words)
+
+    def find(self, data: np.ndarray, offsets: np.ndarray) -> tuple:
+        """
+        Finds which words occur in each text of a batch.
+
+        Args:
+            data (np.ndarray): The concatenated UTF-8 bytes of the texts.
+            offsets (np.ndarray): Start offset of each text in `data`, plus the final end.
+
+        Returns:
+            tuple: Two aligned arrays (text index, word id) with one entry per distinct pair.
+        """
+        lengths = np.diff(offsets)
+        # Longest texts first, so the texts still running at a step are always a prefix
+        order = np.argsort(-lengths, kind='stable')
+        remaining = np.searchsorted(-lengths[order], -np.arange(lengths.max(initial=0)), side='left')
+        positions = offsets[:-1][order].copy()
+        states = np.zeros(len(order), dtype=np.int32)
+        classes = self.byte_class[data]
+
+        hit_rows, hit_states = [], []
+        for active in remaining:
+            states[:active] = self.table[states[:active], classes[positions[:active]]]
+            positions[:active] += 1
+            matched = np.flatnonzero(self.has_output[states[:active]])
+            if matched.size:
+                hit_rows.append(order[matched])
+                hit_states.append(states[matched])
+
+        if not hit_rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        hit_rows = np.concatenate(hit_rows)
+        hit_states = np.concatenate(hit_states)
+        # Expand every matched state into all the words ending there
+        counts = self.output_ptr[hit_states + 1] - self.output_ptr[hit_states]
+        rows = np.repeat(hit_rows, counts)
+        firsts = np.repeat(self.output_ptr[hit_states] - (np.cumsum(counts) - counts), counts)
+        words = self.output_ids[firsts + np.arange(len(rows))]
+        pairs = np.unique(rows * self.n_words + words)
+        return pairs // self.n_words, pairs % self.n_words
+
+
+class SentimentLexicon:
+    """A weighted keyword lexicon compiled into a single matching automaton."""
+
+    def __init__(self, weights: dict):
+        self.weights = {word.lower(): float(weight) for word, weight in weights.items() if weight}
+        self.words = list(self.weights)
+        self.word_weights = np.array([self.weights[word] for word in self.words], dtype=np.float64)
+        self.automaton = KeywordAutomaton(self.words)
+
+    @classmethod
+    def default(cls) -> 'SentimentLexicon':
+        """Returns the lexicon built from the Part 1 keyword lists."""
+        weights = {word: 1.0 for word in POSITIVE_WORDS}
+        weights.update({word: -1.0 for word in NEGATIVE_WORDS})
+        return cls(weights)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'SentimentLexicon':
+        """
+        Loads a lexicon from a two-column file (`word,weight`, or tab-separated).
+
+        Positive weights mark positive words and negative weights negative words.
+        Lines starting with '#' are ignored.
+        """
+        delimiter = '\t' if os.path.splitext(file_path)[1] in ('.tsv', '.txt') else ','
+        weights = {}
+        with open(file_path, encoding='utf-8') as f:
+            for row in csv.reader(f, delimiter=delimiter):
+                if not row or row[0].startswith('#'):
+                    continue
+                weights[row[0].strip()] = float(row[1])
+        return cls(weights)
+
+    def score_batch(self, texts) -> tuple:
+        """
+        Scores a batch of texts, returning the labels and continuous scores as arrays.
+
+        Each lexicon word counts once if it occurs anywhere in the lowercased text, like
+        the original substring checks. The label is the sign of (positive - negative)
+        words and the continuous score is the sum of weights normalized to (-1, 1).
+        Missing values score 0.
+        """
+        lowered = pa.array([text.lower() if isinstance(text, str) else None for text in texts], type=pa.large_string())
+        labels = np.zeros(len(texts), dtype=np.int8)
+        scores = np.zeros(len(texts), dtype=np.float64)
+        if not self.words or len(lowered) == 0:
+            return labels, scores
+
+        _, offsets_buffer, data_buffer = lowered.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[:len(lowered) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+        rows, words = self.automaton.find(data, offsets)
+
+        polarity = np.bincount(rows, weights=np.sign(self.word_weights[words]), minlength=len(texts))
+        total = np.bincount(rows, weights=self.word_weights[words], minlength=len(texts))
+        labels[:] = np.sign(polarity)
+        scores[:] = total / np.sqrt(total * total + SCORE_ALPHA)
+        return labels, scores
+
+    def score_text(self, text) -> tuple:
+        """Scores one text, returning its label and continuous score."""
+        labels, scores = self.score_batch([text])
+        return int(labels[0]), float(scores[0])
+
+    def __getstate__(self):
+        # The automaton is rebuilt in worker processes instead of being pickled
+        return {'weights': self.weights}
+
+    def __setstate__(self, state):
+        self.__init__(state['weights'])
+
+
+_worker_lexicon = None
+
+
+def _init_worker(lexicon):
+    global _worker_lexicon
+    _worker_lexicon = lexicon
+
+
+def _score_in_worker(texts):
+    return _worker_lexicon.score_batch(texts)
+
+
+def score_sentiment(texts: pd.Series, lexicon: SentimentLexicon = None, n_jobs: int = None, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """
+    Scores a text column in batches, fanning the batches out to a process pool.
+
+    Args:
+        texts (pd.Series): The messages to score; missing values score 0.
+        lexicon (SentimentLexicon): Lexicon to use. Defaults to the Part 1 keyword lists.
+        n_jobs (int): Worker processes. Defaults to the number of CPUs; batches are scored
+            in-process when there is only one batch or one job.
+        batch_size (int): Texts per batch.
+
+    Returns:
+        pd.DataFrame: `sentiment` (-1/0/1) and `sentiment_score` (continuous, -1 to 1),
+        aligned with the index of `texts`.
+    """
+    lexicon = lexicon or SentimentLexicon.default()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    # Forwarded messages repeat a lot, so each distinct text is scored once
+    codes, uniques = pd.factorize(texts)
+    values = list(uniques)
+    batches = [values[start:start + batch_size] for start in range(0, len(values), batch_size)]
+
+    if n_jobs == 1 or len(batches) <= 1:
+        results = [lexicon.score_batch(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(batches)), initializer=_init_worker, initargs=(lexicon,)) as executor:
+            results = list(executor.map(_score_in_worker, batches))
+
+    # A trailing zero scores the missing texts (factorize code -1)
+    labels = np.concatenate([r[0] for r in results] + [np.zeros(1, dtype=np.int8)])
+    scores = np.concatenate([r[1] for r in results] + [np.zeros(1, dtype=np.float64)])
+    return pd.DataFrame({'sentiment': labels[codes], 'sentiment_score': scores[codes]}, index=texts.index)
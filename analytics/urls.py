@@ -0,0 +1,86 @@
+# analytics/urls.py
+
+import numpy as np
+import pandas as pd
+
+_URL_PATTERN = (
+    r'^\s*(?:(?P<scheme>[A-Za-z][A-Za-z0-9+.\-]*)://)?'
+    r'(?:[^@/\s?#]+@)?'
+    r'(?P<host>[^:/\s?#]+)'
+    r'(?::\d+)?'
+    r'(?P<path>/[^?#\s]*)?'
+)
+_IP_PATTERN = r'^\d{1,3}(?:\.\d{1,3}){3}$'
+# Second-level labels that are registered under a country code (example.co.uk, uol.com.br).
+# A small stand-in for the Public Suffix List, which is not a dependency of this project.
+_SECOND_LEVEL_PATTERN = r'([^.]+\.(?:com|net|org|gov|edu|co|ac|gob|mil|nom|blog|art|adv|jus|leg)\.[a-z]{2})$'
+
+URL_COMPONENTS = ['url', 'scheme', 'domain', 'registered_domain', 'path']
+
+
+def parse_urls(urls) -> pd.DataFrame:
+    """
+    Splits URLs into their components with vectorized string operations.
+
+    Missing URLs give missing components. The domain is the lowercased host without a
+    leading 'www.', and the registered domain is the part of it an owner registers
+    (`g1.globo.com` -> `globo.com`, `sub.example.co.uk` -> `example.co.uk`).
+
+    Returns:
+        pd.DataFrame: One row per URL with the columns of `URL_COMPONENTS`.
+    """
+    urls = pd.Series(pd.array(urls, dtype='string'))
+    parts = urls.str.extract(_URL_PATTERN)
+    domain = parts['host'].str.lower().str.replace(r'^www\d*\.', '', regex=True)
+    registered = domain.str.extract(_SECOND_LEVEL_PATTERN)[0]
+    registered = registered.fillna(domain.str.extract(r'([^.]+\.[^.]+)$')[0]).fillna(domain)
+    registered = registered.mask(domain.str.match(_IP_PATTERN).fillna(False), domain)
+    return pd.DataFrame({
+        'url': urls,
+        'scheme': parts['scheme'].str.lower(),
+        'domain': domain,
+        'registered_domain': registered,
+        'path': parts['path'].fillna('/').where(domain.notna()),
+    })
+
+
+class ParsedUrls:
+    """
+    The components of a URL column, parsed once per distinct URL.
+
+    URLs repeat a lot, so the column is reduced to its distinct values and their counts
+    first; parsing and the top-N tables then cost the number of distinct URLs, not rows.
+    """
+
+    def __init__(self, parts: pd.DataFrame, counts: np.ndarray, codes: np.ndarray = None):
+        self.parts = parts
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.codes = codes
+
+    @classmethod
+    def from_series(cls, urls: pd.Series) -> 'ParsedUrls':
+        """Parses a URL column; the row codes are kept so components can be mapped back to rows."""
+        codes, uniques = pd.factorize(urls)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return cls(parse_urls(uniques), counts, codes)
+
+    @classmethod
+    def from_counts(cls, urls, counts) -> 'ParsedUrls':
+        """Parses distinct URLs that were already counted (for example by a GROUP BY query)."""
+        return cls(parse_urls(urls), counts)
+
+    def top(self, component: str = 'url', n: int = 30) -> pd.DataFrame:
+        """
+        Returns the `n` most frequent values of a component, with their row counts.
+
+        Ties are ordered by value, so the table is stable between runs.
+        """
+        totals = pd.DataFrame({component: self.parts[component], 'count': self.counts})
+        totals = totals.dropna(subset=[component]).groupby(component, sort=False, observed=True)['count'].sum().reset_index()
+        return totals.sort_values(['count', component], ascending=[False, True], kind='stable').head(n).reset_index(drop=True)
+
+    def column(self, component: str) -> pd.Series:
+        """Returns a component for every row of the parsed column (only after `from_series`)."""
+        if self.codes is None:
+            raise ValueError("Row values are only available for URLs parsed with from_series().")
+        return pd.Series(self.parts[component].array.take(self.codes, allow_fill=True))
@@ -0,0 +1,120 @@
+# analytics/user_profiles.py
+
+import numpy as np
+import pandas as pd
+
+USER_COLUMNS = [
+    'messages', 'text_only', 'media', 'sentiment_sum', 'groups', 'texts', 'repeated_texts',
+    'repeated_texts_in_groups', 'misinformation', 'misinformation_scored', 'misinformation_score_mean',
+]
+PAIR_COLUMNS = ['count', 'unique_group_count']
+
+
+def _distinct_per(keys: np.ndarray, values: np.ndarray, num_keys: int) -> np.ndarray:
+    """Counts the distinct non-negative `values` of each key 0..num_keys-1."""
+    valid = values >= 0
+    levels = int(values.max(initial=0)) + 1
+    combined = np.unique(keys[valid] * levels + values[valid])
+    return np.bincount(combined // levels, minlength=num_keys)
+
+
+class UserProfiles:
+    """
+    Activity of every user, aggregated in one pass over the messages.
+
+    `users` has one row per user (indexed by `id_member_anonymous`, sorted) with the columns
+    of USER_COLUMNS; `pairs` has one row per (user, text) the user sent, with how many times
+    and in how many groups. The user leaderboards are top-k lookups on these tables instead
+    of a `value_counts` or group-by over the messages each.
+
+    Users and texts are coded as integers once; every count is a bincount over the codes.
+    """
+
+    def __init__(self, users: pd.DataFrame, pairs: pd.DataFrame):
+        self.users = users
+        self.pairs = pairs
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'UserProfiles':
+        """
+        Profiles the users of a frame of messages. Rows without a user are ignored, and only
+        rows with a text (`text_id` >= 0) count towards the text columns and `pairs`.
+        """
+        user_codes, user_ids = pd.factorize(df['id_member_anonymous'], sort=True)
+        rows = user_codes >= 0
+        user_codes = user_codes[rows].astype(np.int64)
+        num_users = len(user_ids)
+        group_codes = pd.factorize(df['id_group_anonymous'])[0][rows].astype(np.int64)
+        text_ids = df['text_id'].to_numpy()[rows].astype(np.int64)
+        # Missing has_media counts as neither text-only nor media
+        has_media = df['has_media'].astype('boolean')
+        media = has_media.fillna(False).to_numpy(dtype=bool)[rows]
+        text_only = (~has_media).fillna(False).to_numpy(dtype=bool)[rows]
+        sentiment = df['sentiment'].to_numpy(dtype=np.float64, na_value=0)[rows]
+        scores = df['score_misinformation'].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+        scored = ~np.isnan(scores)
+
+        def per_user(weights=None) -> np.ndarray:
+            return np.bincount(user_codes, weights=weights, minlength=num_users)
+
+        # (user, text) pairs, in the order of user then text
+        with_text = text_ids >= 0
+        num_texts = int(text_ids.max(initial=-1)) + 1
+        pair_keys, pair_of_row, pair_counts = np.unique(
+            user_codes[with_text] * num_texts + text_ids[with_text], return_inverse=True, return_counts=True)
+        pair_users = pair_keys // max(num_texts, 1)
+        pair_groups = _distinct_per(pair_of_row, group_codes[with_text], len(pair_keys))
+
+        misinformation_scored = per_user(scored.astype(np.float64)).astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score_mean = per_user(np.where(scored, scores, 0)) / misinformation_scored
+        users = pd.DataFrame({
+            'messages': per_user().astype(np.int64),
+            'text_only': per_user(text_only.astype(np.float64)).astype(np.int64),
+            'media': per_user(media.astype(np.float64)).astype(np.int64),
+            'sentiment_sum': per_user(sentiment).astype(np.int64),
+            'groups': _distinct_per(user_codes, group_codes, num_users),
+            'texts': np.bincount(pair_users, minlength=num_users),
+            'repeated_texts': np.bincount(pair_users[pair_counts > 1], minlength=num_users),
+            'repeated_texts_in_groups': np.bincount(pair_users[pair_groups > 1], minlength=num_users),
+            # The threshold of the 'Misinformation' bucket of Part 3 (h.34)
+            'misinformation': per_user((scores > 0.5).astype(np.float64)).astype(np.int64),
+            'misinformation_scored': misinformation_scored,
+            'misinformation_score_mean': score_mean,
+        }, index=pd.Index(user_ids, name='id_member_anonymous'))
+        pairs = pd.DataFrame({
+            'id_member_anonymous': user_ids.take(pair_users),
+            'text_id': (pair_keys % max(num_texts, 1)).astype(np.int32),
+            'count': pair_counts.astype(np.int64),
+            'unique_group_count': pair_groups.astype(np.int64),
+        })
+        return cls(users, pairs)
+
+    def top(self, column: str, n: int = 30, ascending: bool = False, min_value=None) -> pd.DataFrame:
+        """
+        Returns the `n` users with the highest (or lowest) value of a column of `users`,
+        skipping values below `min_value`.
+
+        Ties are ordered by user id, so the table is stable between runs.
+
+        Returns:
+            pd.DataFrame: Columns `id_member_anonymous` and `column`.
+        """
+        values = self.users[column]
+        if min_value is not None:
+            values = values[values >= min_value]
+        return values.sort_values(ascending=ascending, kind='stable').head(n).reset_index()
+
+    def top_pairs(self, column: str, n: int = 30, min_value=None) -> pd.DataFrame:
+        """
+        Returns the `n` (user, text) pairs with the highest value of a column of `pairs`
+        (e.g. 'count' with min_value=2 for the texts a user sent more than once), skipping
+        values below `min_value`. Ties are ordered by user id, then text id.
+
+        Returns:
+            pd.DataFrame: Columns `id_member_anonymous`, `text_id` and `column`.
+        """
+        pairs = self.pairs[['id_member_anonymous', 'text_id', column]]
+        if min_value is not None:
+            pairs = pairs[pairs[column] >= min_value]
+        return pairs.sort_values(column, ascending=False, kind='stable').head(n).reset_index(drop=True)
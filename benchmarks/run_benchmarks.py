@@ -0,0 +1,197 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import datetime
+import glob
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+sys.path.insert(1, os.path.join(REPO_ROOT, 'prj_part01'))
+
+from generate_data import generate_dataset
+from reporting import SectionProfiler
+
+DEFAULT_SCALES = [10_000, 100_000]
+DEFAULT_THRESHOLD = 0.20
+# Stages faster than this (seconds) or lighter than this (MB) are too noisy to flag
+MIN_SECONDS = 0.05
+MIN_MEGABYTES = 5.0
+
+CODE_DIRS = ['analytics', 'datastore', 'reporting']
+# Part name -> (script directory, module); run in this order, each reading the previous one's output
+PIPELINE = {
+    'part1': ('prj_part01', 'process_data'),
+    'part2': ('prj_part02', 'process_data_part2'),
+    'part3': ('prj_part03', 'analysis_part3'),
+}
+
+
+def make_sandbox(root: str):
+    """
+    Lays out a throwaway project root that runs the repository's code.
+
+    The packages and the scripts are symlinked (scripts file by file, so their reports and
+    images land in the sandbox), and the scripts find `prj_files` relative to their own path,
+    so the benchmark never touches the repository's data or reports.
+    """
+    for name in CODE_DIRS:
+        os.symlink(os.path.join(REPO_ROOT, name), os.path.join(root, name))
+    for script_dir, _ in PIPELINE.values():
+        os.makedirs(os.path.join(root, script_dir))
+        for path in glob.glob(os.path.join(REPO_ROOT, script_dir, '*.py')):
+            os.symlink(path, os.path.join(root, script_dir, os.path.basename(path)))
+    os.makedirs(os.path.join(root, 'prj_files'))
+
+
+def run_pipeline(root: str, memory: bool = True) -> list:
+    """
+    Runs Parts 1-3 in a sandbox (in this process) and returns the stage records.
+
+    Each script gets a `SectionProfiler`, so its stages are the sections of its report
+    (one per question), plus loading, figure rendering and report and output writing.
+    """
+    sys.path[:0] = [root] + [os.path.join(root, script_dir) for script_dir, _ in PIPELINE.values()]
+    records = []
+    for part, (script_dir, module_name) in PIPELINE.items():
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(root, script_dir, module_name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        profiler = SectionProfiler(part, memory=memory)
+        start = time.perf_counter(), time.process_time()
+        module.main(profiler=profiler)
+        profiler.finish()
+        for record in profiler.records:
+            # Questions repeated under several headings (e.1-e.7 for each column) stay distinct stages
+            name = f"{record['group']} / {record['section']}" if record['group'] else record['section']
+            stage = {'part': part, 'stage': name, 'wall_s': record['wall_s'], 'cpu_s': record['cpu_s']}
+            if memory:
+                stage['peak_mb'] = record['peak_mb']
+            records.append(stage)
+        records.append({'part': part, 'stage': 'total', 'wall_s': time.perf_counter() - start[0], 'cpu_s': time.process_time() - start[1]})
+    return records
+
+
+def benchmark_scale(rows: int, seed: int, memory: bool, verbose: bool) -> list:
+    """Generates `rows` synthetic messages and benchmarks the pipeline on them in a fresh interpreter."""
+    with tempfile.TemporaryDirectory(prefix='ck0223-bench-') as root:
+        make_sandbox(root)
+        generate_dataset(rows, os.path.join(root, 'prj_files', 'fakeTelegram.BR_2022.csv'), seed=seed)
+        results_path = os.path.join(root, 'stages.json')
+        command = [sys.executable, os.path.abspath(__file__), '--worker', root, '--worker-output', results_path]
+        if not memory:
+            command.append('--no-memory')
+        output = None if verbose else subprocess.DEVNULL
+        subprocess.run(command, check=True, stdout=output, cwd=root)
+        with open(results_path) as f:
+            records = json.load(f)
+    for record in records:
+        record['rows'] = rows
+    return records
+
+
+def _metadata(memory: bool) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'memory_profiled': memory,
+    }
+
+
+def compare(current: pd.DataFrame, baseline: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Joins a run with a baseline on (rows, part, stage) and flags the stages that got slower
+    (or, when both runs profiled memory, heavier) by more than `threshold`.
+    """
+    keys = ['rows', 'part', 'stage']
+    merged = current.merge(baseline, on=keys, how='inner', suffixes=('', '_baseline'))
+    merged['wall_change'] = merged['wall_s'] / merged['wall_s_baseline'] - 1
+    merged['regression'] = (merged['wall_change'] > threshold) & (merged['wall_s'] - merged['wall_s_baseline'] > MIN_SECONDS)
+    if 'peak_mb' in merged and 'peak_mb_baseline' in merged:
+        merged['memory_change'] = merged['peak_mb'] / merged['peak_mb_baseline'] - 1
+        heavier = (merged['memory_change'] > threshold) & (merged['peak_mb'] - merged['peak_mb_baseline'] > MIN_MEGABYTES)
+        merged['regression'] |= heavier
+    return merged
+
+
+def main(scales: list, repeat: int = 1, seed: int = 0, memory: bool = True, output: str = None,
+         baseline: str = None, save_baseline: bool = False, threshold: float = DEFAULT_THRESHOLD, verbose: bool = False) -> int:
+    """
+    Benchmarks every stage of Parts 1-3 at each scale and compares the results with a baseline.
+
+    Returns:
+        int: The exit status: 1 when a stage regressed against the baseline, 0 otherwise.
+    """
+    records = []
+    for rows in scales:
+        runs = [pd.DataFrame(benchmark_scale(rows, seed, memory, verbose)) for _ in range(repeat)]
+        # The fastest of the repeats is the least noisy estimate of each stage
+        records.append(pd.concat(runs).groupby(['rows', 'part', 'stage'], sort=False, as_index=False).min())
+    current = pd.concat(records, ignore_index=True)
+
+    results = {'metadata': _metadata(memory), 'stages': current.to_dict(orient='records')}
+    output = output or os.path.join(REPO_ROOT, 'benchmarks', 'results', f"benchmark-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}")
+
+    totals = current[current['stage'] == 'total'].pivot(index='part', columns='rows', values='wall_s')
+    print(totals.to_markdown(floatfmt='.2f'))
+
+    baseline = baseline or os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+    status = 0
+    if os.path.exists(baseline) and not save_baseline:
+        with open(baseline) as f:
+            reference = pd.DataFrame(json.load(f)['stages'])
+        comparison = compare(current, reference, threshold)
+        regressions = comparison[comparison['regression']]
+        print(f"Compared {len(comparison)} stages with {baseline}: {len(regressions)} regression(s) above {threshold:.0%}.")
+        if not regressions.empty:
+            columns = ['rows', 'part', 'stage', 'wall_s_baseline', 'wall_s', 'wall_change'] + (['peak_mb_baseline', 'peak_mb'] if 'peak_mb_baseline' in regressions else [])
+            print(regressions[columns].to_markdown(index=False, floatfmt='.3f'))
+            status = 1
+    if save_baseline:
+        with open(baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {baseline}")
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks each stage of the pipeline on synthetic data, offline.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_SCALES, help="Dataset sizes to benchmark, e.g. --rows 10000 100000 1000000 10000000.")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per scale; the fastest run of each stage is kept.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip memory profiling (tracemalloc slows down Python-heavy stages).")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/benchmark-<timestamp>.json).")
+    parser.add_argument('--baseline', help="Baseline to compare with (default: benchmarks/baseline.json).")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline instead of comparing.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown reported as a regression (default 0.2 = 20%%).")
+    parser.add_argument('--verbose', action='store_true', help="Show the output of the pipeline scripts.")
+    parser.add_argument('--worker', metavar='SANDBOX', help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        stage_records = run_pipeline(args.worker, memory=not args.no_memory)
+        with open(args.worker_output, 'w') as f:
+            json.dump(stage_records, f)
+    else:
+        sys.exit(main(args.rows, repeat=args.repeat, seed=args.seed, memory=not args.no_memory, output=args.output,
+                      baseline=args.baseline, save_baseline=args.save_baseline, threshold=args.threshold, verbose=args.verbose))
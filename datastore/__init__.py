@@ -0,0 +1,33 @@
+# datastore/__init__.py
+# This file makes the 'datastore' directory a Python package.
+from .schema import (
+    COLUMN_DTYPES,
+    DATE_FORMATS,
+    DEFAULT_CHUNKSIZE,
+    MemoryTracker,
+    apply_schema,
+    concat_chunks,
+    iter_csv_typed,
+    read_csv_typed,
+)
+from .parquet_store import (
+    dataset_columns,
+    list_partitions,
+    parquet_glob,
+    partition_days,
+    partitions_containing,
+    processed_dataset_path,
+    read_partition,
+    read_partitioned_parquet,
+    read_tagged_parquet,
+    stored_order,
+    write_partition,
+    write_partitioned_parquet,
+    write_tagged_parquet,
+)
+from .fingerprint import data_fingerprint, path_fingerprint, source_fingerprint
+from .duckdb_store import duckdb_store_path, open_duckdb_store, store_version
+from .query_runner import QueryRunner, normalize_sql, query_cache_path
+from .text_pool import TextPool, text_pool_path
+from .text_index import TextIndex, normalize_tokens, text_index_path
+from .rollup_cube import HourlyCube, hourly_cube_path, misinformation_bucket
@@ -0,0 +1,51 @@
+# datastore/duckdb_store.py
+
+import os
+import duckdb
+from .fingerprint import path_fingerprint
+from .parquet_store import parquet_glob
+
+TABLE_NAME = 'telegram_data'
+
+
+def duckdb_store_path(project_root: str) -> str:
+    """Returns the location of the persistent DuckDB database used by Part 2."""
+    return os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022.duckdb')
+
+
+def _stored_fingerprint(con) -> str:
+    con.execute("CREATE TABLE IF NOT EXISTS store_metadata (key VARCHAR PRIMARY KEY, value VARCHAR)")
+    row = con.execute("SELECT value FROM store_metadata WHERE key = 'source_fingerprint'").fetchone()
+    return row[0] if row else None
+
+
+def store_version(con) -> str:
+    """Returns the fingerprint of the source `telegram_data` was built from, the version of its data."""
+    return _stored_fingerprint(con)
+
+
+def open_duckdb_store(db_path: str, source_path: str, force_refresh: bool = False):
+    """
+    Opens the persistent DuckDB database, (re)building `telegram_data` only when needed.
+
+    The table is ingested straight from the processed Parquet dataset with DuckDB's
+    native reader, sorted on `date_message` and `id_member_anonymous` so the zone maps
+    make date ranges and per-user group-bys cheap. The fingerprint of the source is
+    stored next to it, and the table is reused as long as the source is unchanged.
+
+    Returns:
+        tuple: The open connection and a boolean telling whether the table was rebuilt.
+    """
+    con = duckdb.connect(database=db_path, read_only=False)
+    fingerprint = path_fingerprint(source_path)
+    if not force_refresh and _stored_fingerprint(con) == fingerprint:
+        return con, False
+
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {TABLE_NAME} AS
+        SELECT * FROM read_parquet('{parquet_glob(source_path)}', hive_partitioning = true)
+        ORDER BY date_message, id_member_anonymous
+    """)
+    con.execute("INSERT OR REPLACE INTO store_metadata VALUES ('source_fingerprint', ?)", [fingerprint])
+    con.execute("CHECKPOINT")
+    return con, True
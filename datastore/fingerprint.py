@@ -0,0 +1,95 @@
+# datastore/fingerprint.py
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+
+def path_fingerprint(path: str) -> str:
+    """
+    Returns a cheap fingerprint of a file or directory tree.
+
+    It hashes the relative path, size and modification time of every file, so it
+    changes whenever a file is rewritten without reading the file contents.
+    """
+    digest = hashlib.sha256()
+    if os.path.isfile(path):
+        files = [path]
+    else:
+        files = sorted(
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(path)
+            for name in names
+        )
+    for file_path in files:
+        stat = os.stat(file_path)
+        digest.update(f"{os.path.relpath(file_path, path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths: list, suffix: str = '.py') -> str:
+    """
+    Returns a fingerprint of the contents of source files.
+
+    Directories contribute every file ending in `suffix` below them. Contents are hashed
+    (unlike `path_fingerprint`), so a checkout or a copy that changes modification times
+    but not the code keeps the same fingerprint.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(dirpath, name)
+                for dirpath, dirnames, names in os.walk(path)
+                if '__pycache__' not in dirpath
+                for name in names
+                if name.endswith(suffix)
+            )
+        else:
+            files = [path]
+        for file_path in files:
+            digest.update(f"{os.path.relpath(file_path, os.path.dirname(path))}\n".encode())
+            with open(file_path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    if isinstance(value, (pd.Series, pd.Index)):
+        digest.update(f"{type(value).__name__}|{value.name}|{value.dtype}|{len(value)}\n".encode())
+        digest.update(pd.util.hash_pandas_object(value, index=isinstance(value, pd.Series)).to_numpy().tobytes())
+    elif isinstance(value, pd.DataFrame):
+        digest.update(f"DataFrame|{list(value.columns)}|{list(value.dtypes.astype(str))}|{len(value)}\n".encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray|{value.dtype}|{value.shape}\n".encode())
+        if value.dtype == object:
+            digest.update(pd.util.hash_array(value.ravel()).tobytes())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"dict\n")
+        for key in sorted(value, key=str):
+            digest.update(f"{key}=".encode())
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}|{len(value)}\n".encode())
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}|{value!r}\n".encode())
+
+
+def data_fingerprint(*values) -> str:
+    """
+    Returns a fingerprint of in-memory data: pandas objects, numpy arrays, and plain
+    values, nested in dicts, lists, or tuples.
+
+    Pandas objects are hashed by content (values, index, names, and dtypes), so two
+    objects holding the same data share a fingerprint no matter how they were built.
+    """
+    digest = hashlib.sha256()
+    for value in values:
+        _update_digest(digest, value)
+    return digest.hexdigest()
@@ -0,0 +1,183 @@
+# datastore/parquet_store.py
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARTITION_COLUMN = 'day'
+PARTITION_FILE = 'part-0.parquet'
+# Hive's name for the partition of rows without a date; readers turn it back into null
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+# Sorted distinct ids of one partition. Parquet readers skip files starting with '_'.
+ID_INDEX_FILE = '_ids.npy'
+ID_COLUMN = 'text_id'
+
+# Keeps text columns Arrow-backed when converting back to pandas (see datastore/schema.py).
+_ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}
+
+
+def processed_dataset_path(project_root: str) -> str:
+    """Returns the location of the processed Parquet dataset shared between the parts."""
+    return os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022_processed.parquet')
+
+
+def partition_days(dates: pd.Series) -> pd.Series:
+    """Returns the partition value (`YYYY-MM-DD`) of each timestamp."""
+    return dates.dt.strftime('%Y-%m-%d').fillna(NULL_PARTITION)
+
+
+def _partition_dir(root_path: str, day: str) -> str:
+    return os.path.join(root_path, f'{PARTITION_COLUMN}={day}')
+
+
+def write_partition(df: pd.DataFrame, root_path: str, day: str):
+    """
+    Writes (or replaces) the single file of one day partition.
+
+    If the frame has a `text_id` column, its distinct values are saved next to the
+    file, so `partitions_containing` can tell which days hold a text without reading rows.
+    """
+    partition_dir = _partition_dir(root_path, day)
+    os.makedirs(partition_dir, exist_ok=True)
+    file_path = os.path.join(partition_dir, PARTITION_FILE)
+    tmp_path = os.path.join(partition_dir, '.' + PARTITION_FILE + '.tmp')
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, write_statistics=True, compression='zstd')
+    os.replace(tmp_path, file_path)
+    if ID_COLUMN in df.columns:
+        ids = np.unique(df[ID_COLUMN].to_numpy())
+        np.save(os.path.join(partition_dir, ID_INDEX_FILE), ids[ids >= 0])
+
+
+def stored_order(df: pd.DataFrame, date_column: str = 'date_message') -> pd.DataFrame:
+    """
+    Returns the rows in the order `read_partitioned_parquet` gives them back after
+    `write_partitioned_parquet`: sorted by `date_column` (stable, missing dates last).
+    """
+    return df.sort_values(date_column, kind='stable').reset_index(drop=True)
+
+
+def write_partitioned_parquet(df: pd.DataFrame, root_path: str, date_column: str = 'date_message'):
+    """
+    Writes a dataframe as a Parquet dataset partitioned by day (`day=YYYY-MM-DD/` directories).
+
+    Rows are sorted by `date_column` so the min/max statistics of each row group are
+    tight, which lets readers skip row groups as well as whole partitions. Each day is
+    one file, so a day can later be rewritten on its own (see `write_partition`).
+    Any previous dataset at `root_path` is replaced.
+    """
+    if os.path.exists(root_path):
+        shutil.rmtree(root_path)
+    df = stored_order(df, date_column)
+    for day, rows in df.groupby(partition_days(df[date_column]), sort=True):
+        write_partition(rows, root_path, day)
+
+
+def list_partitions(root_path: str) -> list:
+    """Returns the partition values (days) of a dataset, in order."""
+    prefix = f'{PARTITION_COLUMN}='
+    if not os.path.isdir(root_path):
+        return []
+    return sorted(name[len(prefix):] for name in os.listdir(root_path) if name.startswith(prefix))
+
+
+def read_partition(root_path: str, day: str) -> pd.DataFrame:
+    """Reads the rows of one day partition (without the `day` column)."""
+    table = pq.read_table(os.path.join(_partition_dir(root_path, day), PARTITION_FILE))
+    return table.to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
+
+
+def partitions_containing(root_path: str, ids) -> list:
+    """
+    Returns the days whose partition holds at least one of the given `text_id` values.
+
+    Only the small id files are read; partitions written without one are always returned.
+    """
+    ids = np.unique(np.asarray(ids))
+    days = []
+    for day in list_partitions(root_path):
+        index_path = os.path.join(_partition_dir(root_path, day), ID_INDEX_FILE)
+        if not os.path.exists(index_path):
+            days.append(day)
+            continue
+        partition_ids = np.load(index_path, mmap_mode='r')
+        if len(partition_ids) and np.isin(ids, partition_ids, assume_unique=True).any():
+            days.append(day)
+    return days
+
+
+def read_partitioned_parquet(root_path: str, columns: list = None, start_day: str = None, end_day: str = None) -> pd.DataFrame:
+    """
+    Reads a day-partitioned Parquet dataset with column projection and partition pruning.
+
+    Args:
+        root_path (str): Directory written by `write_partitioned_parquet`.
+        columns (list): Columns to read. Only these columns are decoded from disk.
+        start_day (str): First day to read (inclusive, `YYYY-MM-DD`).
+        end_day (str): Last day to read (inclusive, `YYYY-MM-DD`).
+
+    Returns:
+        pandas.DataFrame: The requested columns, without the `day` partition column
+        unless it was asked for.
+    """
+    filters = []
+    if start_day is not None:
+        filters.append((PARTITION_COLUMN, '>=', start_day))
+    if end_day is not None:
+        filters.append((PARTITION_COLUMN, '<=', end_day))
+    table = pq.read_table(root_path, columns=columns, filters=filters or None)
+    df = table.to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
+    if PARTITION_COLUMN in df.columns and (columns is None or PARTITION_COLUMN not in columns):
+        df = df.drop(columns=PARTITION_COLUMN)
+    return df
+
+
+def dataset_columns(root_path: str) -> list:
+    """Returns the column names of a Parquet dataset (without the partition column), reading only metadata."""
+    return [name for name in pq.ParquetDataset(root_path).schema.names if name != PARTITION_COLUMN]
+
+
+def parquet_glob(root_path: str) -> str:
+    """Returns a glob matching every data file of the dataset, for readers such as DuckDB."""
+    return os.path.join(root_path, '**', '*.parquet')
+
+
+def write_tagged_parquet(df: pd.DataFrame, path: str, key: bytes, metadata: dict):
+    """
+    Writes a frame as a single Parquet file, with `metadata` stored as JSON under `key` in
+    its schema (e.g. the version of the data it was computed from).
+
+    The file is written under a unique temporary name in the same directory and moved into
+    place, so concurrent writers (processes or threads) and readers never see a partial file.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[key] = json.dumps(metadata).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.' + os.path.basename(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        pq.write_table(table.replace_schema_metadata(schema_metadata), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_tagged_parquet(path: str, key: bytes) -> tuple:
+    """
+    Reads a file written by `write_tagged_parquet`.
+
+    Returns:
+        tuple: The frame and the metadata stored under `key` (empty when there is none).
+    """
+    table = pq.read_table(path)
+    metadata = json.loads((table.schema.metadata or {}).get(key, b'{}'))
+    return table.to_pandas(), metadata
@@ -0,0 +1,176 @@
+# datastore/query_runner.py
+
+import glob
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .fingerprint import data_fingerprint
+from .parquet_store import read_tagged_parquet, write_tagged_parquet
+
+# Key of the query metadata stored in the schema of each cached result
+METADATA_KEY = b'query_runner'
+
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+|[^'\"\s]+")
+
+
+def query_cache_path(project_root: str) -> str:
+    """Returns the directory where Part 2 caches its query results."""
+    return os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022.query_cache')
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Returns the SQL text with runs of whitespace outside quoted literals and identifiers
+    collapsed to one space and trailing semicolons removed, so reformatting a query does
+    not invalidate its cached result.
+    """
+    tokens = [' ' if token.isspace() else token for token in _SQL_TOKENS.findall(sql)]
+    return ''.join(tokens).strip().rstrip(';').strip()
+
+
+def _profiled_query(con, sql: str, tables: dict) -> tuple:
+    """
+    Runs `sql` on a new cursor with DuckDB's JSON profiler on.
+
+    Returns:
+        tuple: The result and the number of rows the query's scans read (None if unknown).
+    """
+    fd, profile_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        cursor = con.cursor()
+        try:
+            for table_name, table in (tables or {}).items():
+                cursor.register(table_name, table)
+            cursor.execute("SET enable_profiling = 'json'")
+            cursor.execute(f"SET profiling_output = '{profile_path}'")
+            result = cursor.execute(sql).fetchdf()
+        finally:
+            # DuckDB writes the profile when the query is released, i.e. here
+            cursor.close()
+        # Nothing is written for the queries DuckDB answers without running a plan (e.g. a
+        # COUNT(*) taken from the table's statistics); their rows scanned are unknown
+        rows_scanned = None
+        if os.path.getsize(profile_path) > 0:
+            with open(profile_path, encoding='utf-8') as f:
+                rows_scanned = json.load(f).get('cumulative_rows_scanned')
+    finally:
+        os.remove(profile_path)
+    return result, rows_scanned
+
+
+class QueryRunner:
+    """
+    Runs a set of independent SQL queries concurrently and caches their results on disk.
+
+    Each query runs on its own cursor of the connection (a DuckDB cursor is a separate
+    connection to the same database), from a thread pool; DuckDB releases the GIL while
+    it executes, so the queries overlap.
+
+    A result is cached as a Parquet file keyed by the normalized SQL, the tables registered
+    for the query and the `version` of the data it reads (e.g. the fingerprint of the
+    source of `telegram_data`). A query whose key is cached is read back instead of run,
+    and the results of other versions are removed, so the cache holds one version only.
+    """
+
+    def __init__(self, con, version: str, cache_dir: str = None, max_workers: int = None):
+        """
+        Args:
+            con (duckdb.DuckDBPyConnection): Connection the cursors are opened on.
+            version (str): Fingerprint of the data the queries read.
+            cache_dir (str): Directory of the cached results; None disables the cache.
+            max_workers (int): Threads running queries (defaults to one per query, at most
+                the number of CPUs).
+        """
+        self.con = con
+        self.version = version
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.stats = []
+        self.workers = None
+
+    def _key(self, sql: str, tables: dict) -> str:
+        return data_fingerprint(normalize_sql(sql), tables or {})
+
+    def _cache_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.version[:16]}-{key[:32]}.parquet")
+
+    def _read_cached(self, key: str):
+        path = self._cache_file(key)
+        if not os.path.exists(path):
+            return None
+        result, metadata = read_tagged_parquet(path, METADATA_KEY)
+        if metadata.get('key') != key or metadata.get('version') != self.version:
+            return None
+        return result
+
+    def _write_cached(self, key: str, sql: str, result: pd.DataFrame):
+        metadata = {'key': key, 'version': self.version, 'sql': normalize_sql(sql)}
+        write_tagged_parquet(result, self._cache_file(key), METADATA_KEY, metadata)
+
+    def _run_one(self, name: str, sql: str, tables: dict) -> tuple:
+        start = time.perf_counter()
+        key = self._key(sql, tables)
+        if self.cache_dir is not None:
+            result = self._read_cached(key)
+            if result is not None:
+                return result, {'query': name, 'source': 'cache', 'seconds': time.perf_counter() - start, 'rows_scanned': None, 'rows': len(result)}
+
+        result, rows_scanned = _profiled_query(self.con, sql, tables)
+        if self.cache_dir is not None:
+            self._write_cached(key, sql, result)
+        return result, {'query': name, 'source': 'DuckDB', 'seconds': time.perf_counter() - start, 'rows_scanned': rows_scanned, 'rows': len(result)}
+
+    def _prune(self):
+        prefix = f"{self.version[:16]}-"
+        for path in glob.glob(os.path.join(self.cache_dir, '*.parquet')):
+            if not os.path.basename(path).startswith(prefix):
+                os.remove(path)
+
+    def run(self, queries: dict, tables: dict = None) -> dict:
+        """
+        Runs the queries, reading the cached results of the unchanged ones.
+
+        Args:
+            queries (dict): SQL text of each query, by name.
+            tables (dict): DataFrames to register for a query, by query name, as
+                {table name: DataFrame}; they are part of the query's cache key.
+
+        Returns:
+            dict: The result DataFrame of each query, by name, in the order of `queries`.
+        """
+        tables = tables or {}
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._prune()
+        self.workers = self.max_workers or min(len(queries), os.cpu_count() or 1) or 1
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {name: executor.submit(self._run_one, name, sql, tables.get(name)) for name, sql in queries.items()}
+            outcomes = {name: future.result() for name, future in futures.items()}
+        self.stats.extend(stats for _, stats in outcomes.values())
+        return {name: result for name, (result, _) in outcomes.items()}
+
+    def stats_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: The latency, rows scanned and result rows of every query run so far,
+            and whether it came from DuckDB or the cache.
+        """
+        columns = ['Query', 'Source', 'Latency (s)', 'Rows Scanned', 'Result Rows']
+        if not self.stats:
+            return pd.DataFrame(columns=columns)
+        stats = pd.DataFrame(self.stats)
+        rows_scanned = stats['rows_scanned'].astype('Int64')
+        return pd.DataFrame({
+            'Query': stats['query'],
+            'Source': stats['source'],
+            'Latency (s)': stats['seconds'].round(3),
+            # Empty for cached results, which scan nothing, and for the queries DuckDB answered
+            # without a plan, which scan nothing it can count
+            'Rows Scanned': rows_scanned.astype(object).where(rows_scanned.notna(), ''),
+            'Result Rows': stats['rows'],
+        })
@@ -0,0 +1,220 @@
+# datastore/rollup_cube.py
+
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .parquet_store import read_tagged_parquet, write_tagged_parquet
+
+CUBE_VERSION = 1
+
+# Key of the cube metadata stored in the schema of the Parquet file
+METADATA_KEY = b'hourly_cube'
+
+DIMENSIONS = ['hour', 'id_group_anonymous', 'media_type', 'sentiment', 'misinformation']
+MEASURES = ['count', 'score_sentiment_sum', 'score_sentiment_count', 'score_misinformation_sum', 'score_misinformation_count']
+
+# Coarser grains derived from the 'hour' dimension
+DERIVED_DIMENSIONS = {
+    'day': lambda hours: hours.dt.floor('D'),
+    'hour_of_day': lambda hours: hours.dt.hour,
+    'weekday': lambda hours: hours.dt.dayofweek,
+}
+
+MISINFORMATION_SQL = """
+    CASE
+        WHEN score_misinformation IS NULL OR isnan(score_misinformation) THEN 'Unknown'
+        WHEN score_misinformation > 0.5 THEN 'Misinformation'
+        WHEN score_misinformation < 0.5 THEN 'Not Misinformation'
+        ELSE 'Neutral'
+    END
+"""
+
+
+def hourly_cube_path(dataset_path: str, scope: str = 'queries') -> str:
+    """
+    Returns where the hourly cube of a processed dataset is stored (next to the dataset).
+
+    Each report keeps its own cube (`scope`), since Part 3 builds it from its cleaned rows.
+    """
+    return os.path.splitext(dataset_path)[0] + f'.{scope}.hourly_cube.parquet'
+
+
+def misinformation_bucket(scores) -> np.ndarray:
+    """
+    Buckets misinformation scores: 'Misinformation' above 0.5, 'Not Misinformation' below,
+    'Neutral' at 0.5 and 'Unknown' when missing.
+    """
+    scores = pd.Series(scores, dtype='float64').to_numpy()
+    return np.select(
+        [np.isnan(scores), scores > 0.5, scores < 0.5],
+        ['Unknown', 'Misinformation', 'Not Misinformation'],
+        default='Neutral',
+    ).astype(object)
+
+
+def _normalize(cells: pd.DataFrame) -> pd.DataFrame:
+    """Gives the cells the same dtypes and order whichever engine built them."""
+    cells = cells.astype({
+        'hour': 'datetime64[ns]',
+        'id_group_anonymous': 'string[pyarrow]',
+        'media_type': 'string[pyarrow]',
+        'sentiment': 'Int8',
+        'misinformation': 'string[pyarrow]',
+        'count': 'int64',
+        'score_sentiment_sum': 'float64',
+        'score_sentiment_count': 'int64',
+        'score_misinformation_sum': 'float64',
+        'score_misinformation_count': 'int64',
+    })
+    return cells[DIMENSIONS + MEASURES].sort_values(DIMENSIONS, kind='stable').reset_index(drop=True)
+
+
+class HourlyCube:
+    """
+    Message counts and score sums pre-aggregated by hour, group, media type, sentiment and
+    misinformation bucket.
+
+    The time-series questions (busiest day, messages by hour, daily pattern, and the same
+    series per group, media type or misinformation bucket) are roll-ups of its cells, which
+    are far fewer than the messages; `rollup` sums the cells over the dimensions it is given
+    and `slice` keeps the cells matching some dimension values.
+
+    The cube is saved as a Parquet file tagged with the `version` of the data it was built
+    from, and `open` rebuilds it only when that version changed.
+    """
+
+    def __init__(self, cells: pd.DataFrame, version: str = None):
+        """
+        Args:
+            cells (pd.DataFrame): One row per combination of DIMENSIONS present in the
+                data, with the MEASURES of its messages.
+            version (str): Fingerprint of the data the cube was built from.
+        """
+        self.cells = cells
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str = None) -> 'HourlyCube':
+        """Builds the cube from a frame of messages (one pass, one group-by)."""
+        frame = pd.DataFrame({
+            'hour': df['date_message'].dt.floor('h'),
+            'id_group_anonymous': df['id_group_anonymous'],
+            'media_type': df['media_type'],
+            'sentiment': df['sentiment'],
+            'misinformation': misinformation_bucket(df['score_misinformation']),
+            'score_sentiment': df['score_sentiment'],
+            'score_misinformation': df['score_misinformation'],
+        })
+        cells = frame.groupby(DIMENSIONS, dropna=False, observed=True, sort=False).agg(
+            count=('hour', 'size'),
+            score_sentiment_sum=('score_sentiment', 'sum'),
+            score_sentiment_count=('score_sentiment', 'count'),
+            score_misinformation_sum=('score_misinformation', 'sum'),
+            score_misinformation_count=('score_misinformation', 'count'),
+        ).reset_index()
+        return cls(_normalize(cells), version)
+
+    @classmethod
+    def from_duckdb(cls, con, table: str = 'telegram_data', version: str = None) -> 'HourlyCube':
+        """Builds the cube with one aggregate query over a DuckDB table of messages."""
+        cells = con.execute(f"""
+            SELECT
+                date_trunc('hour', date_message) AS hour,
+                id_group_anonymous,
+                media_type,
+                sentiment,
+                {MISINFORMATION_SQL} AS misinformation,
+                COUNT(*) AS count,
+                COALESCE(SUM(score_sentiment), 0) AS score_sentiment_sum,
+                COUNT(score_sentiment) AS score_sentiment_count,
+                COALESCE(SUM(score_misinformation), 0) AS score_misinformation_sum,
+                COUNT(score_misinformation) AS score_misinformation_count
+            FROM {table}
+            GROUP BY ALL
+        """).fetchdf()
+        return cls(_normalize(cells), version)
+
+    def _dimension(self, name: str) -> pd.Series:
+        if name in DIMENSIONS:
+            return self.cells[name]
+        if name in DERIVED_DIMENSIONS:
+            return DERIVED_DIMENSIONS[name](self.cells['hour']).rename(name)
+        raise KeyError(f"Unknown cube dimension '{name}'; expected one of {DIMENSIONS + list(DERIVED_DIMENSIONS)}")
+
+    def rollup(self, *dimensions) -> pd.DataFrame:
+        """
+        Sums the measures over the given dimensions (any of DIMENSIONS, or 'day',
+        'hour_of_day' and 'weekday', derived from 'hour').
+
+        Returns:
+            pd.DataFrame: One row per combination of the dimensions, sorted by them (missing
+            values last), with the MEASURES; a single row of totals when none is given.
+        """
+        if not dimensions:
+            return self.cells[MEASURES].sum().to_frame().T.astype(self.cells[MEASURES].dtypes.to_dict())
+        keys = [self._dimension(name) for name in dimensions]
+        return self.cells[MEASURES].groupby(keys, dropna=False, observed=True, sort=True).sum().reset_index()
+
+    def slice(self, **criteria) -> 'HourlyCube':
+        """
+        Keeps the cells matching every criterion, given as dimension=value or
+        dimension=[values], e.g. `cube.slice(media_type='video', misinformation='Misinformation')`.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for name, values in criteria.items():
+            if isinstance(values, str) or not np.iterable(values):
+                values = [values]
+            mask &= self._dimension(name).isin(values).to_numpy(dtype=bool, na_value=False)
+        return HourlyCube(self.cells[mask].reset_index(drop=True), self.version)
+
+    def between(self, start=None, end=None) -> 'HourlyCube':
+        """Keeps the hours in [start, end) (either bound may be None)."""
+        hours = self.cells['hour']
+        mask = hours.notna()
+        if start is not None:
+            mask &= hours >= pd.Timestamp(start)
+        if end is not None:
+            mask &= hours < pd.Timestamp(end)
+        return HourlyCube(self.cells[mask.to_numpy()].reset_index(drop=True), self.version)
+
+    def save(self, path: str):
+        """Writes the cells as a Parquet file, with the version in its schema metadata."""
+        write_tagged_parquet(self.cells, path, METADATA_KEY, {'version': CUBE_VERSION, 'data_version': self.version})
+
+    @classmethod
+    def load(cls, path: str) -> 'HourlyCube':
+        """Reads a saved cube."""
+        cells, metadata = read_tagged_parquet(path, METADATA_KEY)
+        if metadata.get('version') != CUBE_VERSION:
+            raise ValueError(f"Unsupported hourly cube version in {path}")
+        return cls(_normalize(cells), metadata.get('data_version'))
+
+    @classmethod
+    def open(cls, path: str, version: str, build) -> tuple:
+        """
+        Opens the saved cube of a dataset version, building and saving it when it is missing
+        or was built from another version.
+
+        Args:
+            path (str): Parquet file of the cube (see `hourly_cube_path`).
+            version (str): Fingerprint of the data the cube must describe.
+            build (callable): Returns a new `HourlyCube` of that data.
+
+        Returns:
+            tuple: The cube and a boolean telling whether it was rebuilt.
+        """
+        if os.path.exists(path):
+            try:
+                cube = cls.load(path)
+            except (ValueError, OSError, pa.ArrowInvalid):
+                cube = None
+            if cube is not None and cube.version == version:
+                return cube, False
+        cube = build()
+        cube.version = version
+        cube.save(path)
+        return cube, True
@@ -0,0 +1,127 @@
+# datastore/schema.py
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+ARROW_STRING = 'string[pyarrow]'
+
+# Declared dtypes for the fakeTelegram.BR_2022 columns and the features created in Part 1.
+COLUMN_DTYPES = {
+    'id_member_anonymous': ARROW_STRING,
+    'id_group_anonymous': ARROW_STRING,
+    'media': ARROW_STRING,
+    'media_type': 'category',
+    'media_url': ARROW_STRING,
+    'has_media': 'boolean',
+    'has_media_url': 'boolean',
+    'trava_zap': 'boolean',
+    'text_content_anonymous': ARROW_STRING,
+    'dataset_info_id': 'int16',
+    'score_sentiment': 'float64',
+    'score_misinformation': 'float64',
+    'id_message': 'int32',
+    'message_type': 'category',
+    'messenger': 'category',
+    'media_name': ARROW_STRING,
+    'media_md5': ARROW_STRING,
+    # Part 1 features
+    'caracteres': 'int32',
+    'words': 'int32',
+    'sharings': 'float32',
+    'viral': 'int8',
+    'sentiment': 'int8',
+    'text_id': 'int32',
+    'cluster_id': 'int32',
+}
+
+# Timestamps are parsed once, with an explicit format, while loading.
+DATE_FORMATS = {
+    'date_message': '%Y-%m-%d %H:%M:%S',
+    'date_system': 'ISO8601',
+}
+
+CATEGORICAL_COLUMNS = [col for col, dtype in COLUMN_DTYPES.items() if dtype == 'category']
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+class MemoryTracker:
+    """Accumulates per-column memory usage before and after applying the schema."""
+
+    def __init__(self):
+        self.before = {}
+        self.after = {}
+        self.dtypes = {}
+
+    def record(self, raw: pd.DataFrame, typed: pd.DataFrame):
+        """Adds the deep memory usage of one raw chunk and its typed counterpart."""
+        for col, usage in raw.memory_usage(index=False, deep=True).items():
+            self.before[col] = self.before.get(col, 0) + usage
+        for col, usage in typed.memory_usage(index=False, deep=True).items():
+            self.after[col] = self.after.get(col, 0) + usage
+            self.dtypes[col] = str(typed[col].dtype)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the per-column report, with a final row for the whole frame."""
+        rows = [
+            {'Column': col, 'Dtype': self.dtypes[col], 'Before (MB)': self.before[col] / 2**20, 'After (MB)': self.after[col] / 2**20}
+            for col in self.after
+        ]
+        rows.append({
+            'Column': 'Total',
+            'Dtype': '',
+            'Before (MB)': sum(self.before.values()) / 2**20,
+            'After (MB)': sum(self.after.values()) / 2**20,
+        })
+        report = pd.DataFrame(rows)
+        report['Reduction (%)'] = (1 - report['After (MB)'] / report['Before (MB)'].where(report['Before (MB)'] > 0)) * 100
+        return report.round(2)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Casts the known columns of a dataframe to their declared dtypes."""
+    typed = {}
+    for col in df.columns:
+        if col in DATE_FORMATS:
+            typed[col] = pd.to_datetime(df[col], format=DATE_FORMATS[col], errors='coerce')
+        elif col in COLUMN_DTYPES:
+            typed[col] = df[col].astype(COLUMN_DTYPES[col])
+        else:
+            typed[col] = df[col]
+    return pd.DataFrame(typed, index=df.index)
+
+
+def iter_csv_typed(file_path: str, usecols: list = None, chunksize: int = DEFAULT_CHUNKSIZE, memory_tracker: MemoryTracker = None):
+    """
+    Reads a fakeTelegram CSV in chunks and yields each chunk with the declared schema applied.
+
+    Only one raw chunk is held in memory at a time, so peak memory is bounded by
+    `chunksize` instead of the size of the file.
+    """
+    # String columns are read as text, otherwise a chunk whose ids all look numeric loses leading zeros
+    text_dtypes = {col: str for col, dtype in COLUMN_DTYPES.items() if dtype == ARROW_STRING}
+    for raw in pd.read_csv(file_path, usecols=usecols, chunksize=chunksize, dtype=text_dtypes):
+        typed = apply_schema(raw)
+        if memory_tracker is not None:
+            memory_tracker.record(raw, typed)
+        del raw
+        yield typed
+
+
+def concat_chunks(chunks) -> pd.DataFrame:
+    """Concatenates typed chunks, unifying categories so categorical columns stay categorical."""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    for col in CATEGORICAL_COLUMNS:
+        if col not in chunks[0].columns:
+            continue
+        categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_typed(file_path: str, usecols: list = None, chunksize: int = DEFAULT_CHUNKSIZE, memory_tracker: MemoryTracker = None) -> pd.DataFrame:
+    """Loads a whole fakeTelegram CSV with the declared schema, parsing it chunk by chunk."""
+    return concat_chunks(iter_csv_typed(file_path, usecols=usecols, chunksize=chunksize, memory_tracker=memory_tracker))
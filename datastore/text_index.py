@@ -0,0 +1,220 @@
+# datastore/text_index.py
+
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from .text_pool import TextPool, _save_array, text_pool_path
+
+INDEX_VERSION = 1
+
+
+def text_index_path(dataset_path: str) -> str:
+    """Returns where the inverted index of a processed dataset is stored (inside its text pool)."""
+    return os.path.join(text_pool_path(dataset_path), 'index')
+
+
+def normalize_tokens(texts) -> pa.ListArray:
+    """
+    Splits texts into normalized tokens: lowercased, accent-folded ('Facção' -> 'faccao')
+    and cut at every character that is not a letter or a digit ('trava-zaps' -> 'trava', 'zaps').
+
+    Returns:
+        pa.ListArray: The tokens of each text, in order (null for missing texts).
+    """
+    array = texts if isinstance(texts, (pa.Array, pa.ChunkedArray)) else pa.array(list(texts), type=pa.large_string())
+    folded = pc.replace_substring_regex(pc.utf8_normalize(pc.utf8_lower(array), 'NFKD'), r'\p{Mn}+', '')
+    tokens = pc.split_pattern_regex(folded, r'[^\p{L}\p{N}]+')
+    if isinstance(tokens, pa.ChunkedArray):
+        tokens = tokens.combine_chunks()
+    return tokens
+
+
+def _flat_tokens(texts) -> tuple:
+    # (text position, token) pairs without the empty tokens left by leading/trailing separators
+    tokens = normalize_tokens(texts)
+    flat = pc.list_flatten(tokens)
+    owner = pc.list_parent_indices(tokens).to_numpy()
+    keep = pc.not_equal(flat, '')
+    return owner[keep.to_numpy(zero_copy_only=False)], flat.filter(keep)
+
+
+def _parse_query(query: str) -> list:
+    # 'a b OR "c d"' -> [[a, b], ['"c d"']]: OR of AND groups, where a term is a word or a quoted phrase
+    groups = re.split(r'\s+OR\s+', query.strip())
+    return [re.findall(r'"[^"]*"|\S+', group) for group in groups if group]
+
+
+class TextIndex:
+    """
+    An inverted index from normalized tokens to the texts of a `TextPool` holding them.
+
+    The vocabulary is itself a TextPool (term ids are its codes) and the postings are one
+    CSR layout: `postings[offsets[t]:offsets[t + 1]]` are the sorted ids of the texts with
+    term `t`. A query is answered by intersecting or merging postings lists, so it costs
+    the length of those lists instead of a scan of every message. Phrases are matched by
+    intersecting their terms and then checking word order on the few candidate texts.
+
+    The pool is append-only, so the index covers its first `num_texts` texts and `update`
+    indexes only the texts added since (for example by Part 1's `--append`).
+    """
+
+    def __init__(self, vocabulary: TextPool, offsets: np.ndarray, postings: np.ndarray, num_texts: int, text_bytes: int, pool: TextPool = None):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.num_texts = int(num_texts)
+        self.text_bytes = int(text_bytes)
+        self.pool = pool
+
+    @classmethod
+    def build(cls, pool: TextPool) -> 'TextIndex':
+        """Indexes every text of a pool."""
+        empty = TextPool(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.uint8))
+        return cls(empty, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), 0, 0).update(pool)
+
+    def update(self, pool: TextPool) -> 'TextIndex':
+        """Returns the index extended with the texts the pool gained since it was built."""
+        if len(pool) == self.num_texts:
+            self.pool = pool
+            return self
+        new_texts = pool.to_arrow()[self.num_texts:]
+        owner, tokens = _flat_tokens(new_texts)
+        # Each distinct token of the batch is interned once into the vocabulary
+        encoded = pc.dictionary_encode(tokens)
+        vocabulary, dictionary_ids = self.vocabulary.extend(pd.Series(encoded.dictionary.to_numpy(zero_copy_only=False), dtype=object))
+        terms = dictionary_ids.astype(np.int64)[encoded.indices.to_numpy()]
+        texts = owner.astype(np.int64) + self.num_texts
+
+        num_terms = len(vocabulary)
+        pairs = np.unique(terms * len(pool) + texts)
+        new_terms, new_texts = pairs // len(pool), pairs % len(pool)
+        old_terms = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+        # New text ids are larger than all indexed ones, so a stable sort by term keeps
+        # every postings list sorted
+        all_terms = np.concatenate([old_terms, new_terms])
+        order = np.argsort(all_terms, kind='stable')
+        postings = np.concatenate([self.postings, new_texts.astype(np.int32)])[order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(all_terms, minlength=num_terms))]).astype(np.int64)
+        return TextIndex(vocabulary, offsets, postings, len(pool), pool.offsets[-1], pool)
+
+    def term(self, term: str) -> np.ndarray:
+        """Returns the sorted ids of the texts holding a normalized term (empty if unknown)."""
+        term_id = self.vocabulary.lookup([term])[0]
+        if term_id < 0:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(self.postings[self.offsets[term_id]:self.offsets[term_id + 1]])
+
+    def all_of(self, *terms) -> np.ndarray:
+        """Texts holding every term; a term that normalizes to several tokens is a phrase."""
+        result = None
+        # Shortest postings lists first, so the intersections shrink as fast as possible
+        for matches in sorted((self.phrase(term) for term in terms), key=len):
+            result = matches if result is None else np.intersect1d(result, matches, assume_unique=True)
+            if not len(result):
+                break
+        return result if result is not None else np.zeros(0, dtype=np.int32)
+
+    def any_of(self, *terms) -> np.ndarray:
+        """Texts holding at least one of the terms."""
+        matches = [self.phrase(term) for term in terms]
+        return np.unique(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int32)
+
+    def phrase(self, text: str) -> np.ndarray:
+        """Texts holding the normalized tokens of `text` next to each other and in order."""
+        words = [token for token in normalize_tokens([text])[0].as_py() if token]
+        if not words:
+            return np.zeros(0, dtype=np.int32)
+        candidates = None
+        for matches in sorted((self.term(word) for word in set(words)), key=len):
+            candidates = matches if candidates is None else np.intersect1d(candidates, matches, assume_unique=True)
+        if len(words) == 1 or not len(candidates):
+            return candidates
+        if self.pool is None:
+            raise ValueError("Phrase queries need the text pool; open the index with TextIndex.open().")
+        owner, tokens = _flat_tokens(self.pool.to_arrow().take(pa.array(candidates)))
+        tokens = tokens.to_numpy(zero_copy_only=False)
+        starts = np.searchsorted(owner, np.arange(len(candidates) + 1))
+        width = len(words)
+        keep = [
+            any(list(tokens[start:start + width]) == words for start in range(begin, end - width + 1))
+            for begin, end in zip(starts[:-1], starts[1:])
+        ]
+        return candidates[np.asarray(keep, dtype=bool)]
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Runs a query and returns the sorted ids of the matching texts.
+
+        Words separated by spaces must all occur (AND), `OR` separates alternatives and a
+        quoted string is a phrase: `facção criminosa`, `segurança OR policia`, `"trava-zaps"`.
+        Matching is on whole normalized tokens, so case and accents are ignored.
+        """
+        groups = [self.all_of(*(term.strip('"') for term in group)) for group in _parse_query(query)]
+        return np.unique(np.concatenate(groups)) if groups else np.zeros(0, dtype=np.int32)
+
+    def text_mask(self, query: str) -> np.ndarray:
+        """Returns a boolean array over the indexed texts telling which match the query."""
+        mask = np.zeros(self.num_texts, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+    def row_mask(self, text_ids, query: str) -> np.ndarray:
+        """Returns which rows (given their 'text_id' codes) have a text matching the query."""
+        text_ids = np.asarray(text_ids)
+        return np.append(self.text_mask(query), False)[np.where(text_ids >= 0, text_ids, self.num_texts)]
+
+    def rows(self, text_ids, query: str) -> np.ndarray:
+        """Returns the positions of the rows whose text matches the query."""
+        return np.flatnonzero(self.row_mask(text_ids, query))
+
+    def save(self, path: str):
+        """Writes the index as .npy files in the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        self.vocabulary.save(os.path.join(path, 'vocabulary'))
+        _save_array(os.path.join(path, 'offsets.npy'), self.offsets)
+        _save_array(os.path.join(path, 'postings.npy'), self.postings)
+        tmp_path = os.path.join(path, 'index.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'texts': self.num_texts, 'text_bytes': self.text_bytes}, f)
+        os.replace(tmp_path, os.path.join(path, 'index.json'))
+
+    @classmethod
+    def load(cls, path: str, pool: TextPool = None) -> 'TextIndex':
+        """Opens a saved index, memory-mapping its arrays."""
+        with open(os.path.join(path, 'index.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported text index version in {path}")
+        return cls(
+            TextPool.load(os.path.join(path, 'vocabulary')),
+            np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r'),
+            np.load(os.path.join(path, 'postings.npy'), mmap_mode='r'),
+            meta['texts'], meta['text_bytes'], pool,
+        )
+
+    @classmethod
+    def open(cls, path: str, pool: TextPool) -> 'TextIndex':
+        """
+        Opens the index of a pool, bringing it up to date first.
+
+        The saved index is reused when it covers a prefix of the pool, extended when the
+        pool grew, and rebuilt when it is missing or belongs to another pool; an index that
+        changed is saved again.
+        """
+        index = None
+        if os.path.exists(os.path.join(path, 'index.json')):
+            try:
+                index = cls.load(path, pool)
+            except ValueError:
+                index = None
+        if index is not None and (index.num_texts > len(pool) or index.text_bytes != pool.offsets[index.num_texts]):
+            index = None
+        if index is not None and index.num_texts == len(pool):
+            return index
+        index = cls.build(pool) if index is None else index.update(pool)
+        index.save(path)
+        return index
@@ -0,0 +1,192 @@
+# datastore/text_pool.py
+
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+MISSING_CODE = -1
+
+
+def text_pool_path(dataset_path: str) -> str:
+    """Returns where the text pool of a processed dataset is stored (next to the dataset)."""
+    return os.path.splitext(dataset_path)[0] + '.textpool'
+
+
+def _hash_texts(texts) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(texts, dtype=object))
+
+
+def _save_array(path: str, array: np.ndarray):
+    # Written next to the target and renamed, so a memory-mapped previous version stays valid
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class TextPool:
+    """
+    An interned, deduplicated pool of strings addressed by integer codes.
+
+    Each distinct text is stored once as UTF-8 bytes plus an offsets array (the Arrow
+    string layout), so rows only carry an int32 code and the pool can be memory-mapped
+    from disk. Code -1 stands for a missing text.
+
+    A sorted index of 64-bit text hashes is kept with the pool, so texts of a new batch
+    are resolved to their codes without loading or hashing the whole pool.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, hash_keys: np.ndarray = None, hash_codes: np.ndarray = None):
+        self.offsets = offsets
+        self.data = data
+        self.hash_keys = hash_keys
+        self.hash_codes = hash_codes
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def build(cls, texts: pd.Series) -> tuple:
+        """
+        Interns a text column.
+
+        Returns:
+            tuple: The pool and an int32 array with the code of each row.
+        """
+        codes, uniques = pd.factorize(texts)
+        return cls.from_arrow(pa.array(uniques, type=pa.large_string())), codes.astype(np.int32)
+
+    @classmethod
+    def from_arrow(cls, texts) -> 'TextPool':
+        """
+        Wraps texts that are already distinct and in code order (e.g. the result of a
+        DuckDB `GROUP BY`) as a pool, copying their buffers without hashing them.
+        """
+        array = texts.combine_chunks() if isinstance(texts, pa.ChunkedArray) else texts
+        array = array.cast(pa.large_string())
+        _, offsets_buffer, data_buffer = array.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+        data = data[offsets[0]:offsets[-1]].copy() if len(offsets) else np.zeros(0, dtype=np.uint8)
+        offsets = offsets - offsets[0] if len(offsets) else np.zeros(1, dtype=np.int64)
+        return cls(offsets, data)
+
+    def extend(self, texts: pd.Series) -> tuple:
+        """
+        Interns a batch of texts into the pool, appending the texts it does not hold yet.
+
+        New texts get the next codes in order of first appearance, so the codes are the
+        same as interning the history and the batch together with `build`.
+
+        Returns:
+            tuple: The extended pool and an int32 array with the code of each row.
+        """
+        local_codes, uniques = pd.factorize(texts)
+        uniques = np.asarray(uniques, dtype=object)
+        codes = self.lookup(uniques)
+        new = codes == MISSING_CODE
+        codes[new] = len(self) + np.arange(new.sum())
+
+        added = pa.array(uniques[new], type=pa.large_string())
+        _, offsets_buffer, data_buffer = added.buffers()
+        added_offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[1:len(added) + 1]
+        added_data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+        offsets = np.concatenate([self.offsets, added_offsets + self.offsets[-1]])
+        data = np.concatenate([self.data, added_data])
+
+        # Merge the new hashes into the sorted index instead of re-sorting it
+        hash_keys, hash_codes = self._hash_index()
+        new_keys = _hash_texts(uniques[new])
+        order = np.argsort(new_keys, kind='stable')
+        positions = np.searchsorted(hash_keys, new_keys[order], side='right')
+        hash_keys = np.insert(hash_keys, positions, new_keys[order])
+        hash_codes = np.insert(hash_codes, positions, codes[new][order])
+
+        # A trailing -1 maps the missing texts (factorize code -1) to the missing code
+        row_codes = np.append(codes, MISSING_CODE)[local_codes]
+        return TextPool(offsets, data, hash_keys, hash_codes), row_codes.astype(np.int32)
+
+    def lookup(self, texts) -> np.ndarray:
+        """Returns the code of each text, or -1 for texts that are not in the pool."""
+        texts = np.asarray(texts, dtype=object)
+        keys = _hash_texts(texts)
+        hash_keys, hash_codes = self._hash_index()
+        codes = np.full(len(texts), MISSING_CODE, dtype=np.int64)
+        if len(hash_keys) == 0 or len(texts) == 0:
+            return codes
+        positions = np.searchsorted(hash_keys, keys)
+        found = positions < len(hash_keys)
+        found[found] = hash_keys[positions[found]] == keys[found]
+        candidates = np.flatnonzero(found)
+        codes[candidates] = hash_codes[positions[candidates]]
+        # Confirm the hash matches against the stored strings; a collision falls back to
+        # scanning the (tiny) run of equal hashes
+        mismatched = candidates[self.decode(codes[candidates]).to_numpy(dtype=object) != texts[candidates]]
+        for i in mismatched:
+            codes[i] = MISSING_CODE
+            position = positions[i]
+            while position < len(hash_keys) and hash_keys[position] == keys[i]:
+                if self.decode([hash_codes[position]])[0] == texts[i]:
+                    codes[i] = hash_codes[position]
+                    break
+                position += 1
+        return codes
+
+    def _hash_index(self) -> tuple:
+        if self.hash_keys is None:
+            keys = _hash_texts(self.to_arrow().to_numpy(zero_copy_only=False))
+            order = np.argsort(keys, kind='stable')
+            self.hash_keys, self.hash_codes = keys[order], order.astype(np.int64)
+        return self.hash_keys, self.hash_codes
+
+    def save(self, path: str):
+        """Writes the pool and its hash index as .npy files in the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        hash_keys, hash_codes = self._hash_index()
+        _save_array(os.path.join(path, 'offsets.npy'), self.offsets)
+        _save_array(os.path.join(path, 'data.npy'), self.data)
+        _save_array(os.path.join(path, 'hash_keys.npy'), hash_keys)
+        _save_array(os.path.join(path, 'hash_codes.npy'), hash_codes)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'TextPool':
+        """Opens a saved pool, memory-mapping it by default so only the touched pages are read."""
+        mode = 'r' if mmap else None
+        arrays = {}
+        for name in ('offsets', 'data', 'hash_keys', 'hash_codes'):
+            file_path = os.path.join(path, f'{name}.npy')
+            # Pools saved without a hash index rebuild it on first use
+            arrays[name] = np.load(file_path, mmap_mode=mode) if os.path.exists(file_path) else None
+        return cls(**arrays)
+
+    def to_arrow(self) -> pa.LargeStringArray:
+        """Returns the distinct texts as an Arrow array sharing the pool's buffers."""
+        return pa.LargeStringArray.from_buffers(len(self), pa.py_buffer(self.offsets), pa.py_buffer(self.data))
+
+    def texts(self) -> pd.Series:
+        """Returns the distinct texts, in code order."""
+        return pd.Series(pd.arrays.ArrowStringArray(self.to_arrow().cast(pa.string())))
+
+    def decode(self, codes) -> pd.Series:
+        """Returns the texts for an array of codes, with <NA> for missing ones."""
+        codes = np.asarray(codes)
+        indices = pa.array(codes, mask=codes == MISSING_CODE)
+        return pd.Series(pd.arrays.ArrowStringArray(self.to_arrow().take(indices).cast(pa.string())))
+
+    def categorical(self, codes) -> pd.Categorical:
+        """Wraps row codes as a Categorical whose categories are the pool, without copying the codes."""
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.texts()), validate=False)
+
+    def counts(self, codes) -> np.ndarray:
+        """Counts the rows of each distinct text (what `value_counts` does on the strings)."""
+        codes = np.asarray(codes)
+        return np.bincount(codes[codes != MISSING_CODE], minlength=len(self))
+
+    def map(self, codes, values: np.ndarray, missing=0) -> np.ndarray:
+        """Spreads a per-text array back to the rows, using `missing` for rows without text."""
+        codes = np.asarray(codes)
+        values = np.asarray(values)
+        if len(values) == 0:
+            return np.full(len(codes), missing, dtype=np.result_type(values.dtype, type(missing)))
+        return np.where(codes != MISSING_CODE, values[codes], missing)
@@ -0,0 +1,3 @@
+# pipeline/__init__.py
+# This file makes the 'pipeline' directory a Python package.
+from .orchestrator import Pipeline, Stage
@@ -0,0 +1,204 @@
+# pipeline/orchestrator.py
+
+import json
+import os
+import time
+import pandas as pd
+from datastore import data_fingerprint, path_fingerprint, source_fingerprint
+
+MANIFEST_VERSION = 1
+
+
+class Stage:
+    """
+    A step of the pipeline with explicit inputs and outputs.
+
+    A stage with `outputs` is persistent: it runs when its key changed since its last
+    successful run or when one of its outputs is missing, and is skipped otherwise. An output
+    modified outside the pipeline (e.g. the processed dataset after `process_data.py --append`)
+    is a conflict: running the stage would overwrite that change, so it only runs when forced,
+    unless the stage declares `overwrite_modified` (outputs such as reports, which a rerun
+    rebuilds from the inputs without losing anything). A stage without outputs only hands
+    values to later stages in memory; it runs on demand, when a stage that runs needs one of
+    its values.
+
+    The key of a stage hashes its `code`, its `params`, the fingerprints of its `inputs`
+    (files or directories, see `datastore.path_fingerprint`) and the keys of the stages
+    providing what it `needs`, so any change upstream reaches it.
+    """
+
+    def __init__(self, name: str, run, inputs: list = (), outputs: list = (), needs: list = (),
+                 provides: list = (), code: list = (), params: dict = None, overwrite_modified: bool = False):
+        """
+        Args:
+            name (str): Stage name.
+            run (callable): Called with the `Pipeline`; returns a dict with the values listed
+                in `provides` (or None). It gets the values it needs with `pipeline.value(name)`.
+            inputs (list): Files and directories the stage reads.
+            outputs (list): Files and directories the stage writes.
+            needs (list): In-memory values produced by earlier stages.
+            provides (list): In-memory values the stage returns.
+            code (list): Source files and directories the stage executes.
+            params (dict): Parameters that change what the stage produces.
+            overwrite_modified (bool): Rerun the stage when one of its outputs was modified
+                outside the pipeline, instead of reporting a conflict.
+        """
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.needs = list(needs)
+        self.provides = list(provides)
+        self.code = list(code)
+        self.params = params or {}
+        self.overwrite_modified = overwrite_modified
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.outputs)
+
+
+class Pipeline:
+    """
+    Runs stages in order, skipping the persistent stages whose inputs did not change.
+
+    The key and output fingerprints of every successful persistent stage are kept in a JSON
+    manifest. In-memory values live for one run, so a stage that runs right after the stage
+    producing a frame gets the frame itself instead of reading it back from disk.
+    """
+
+    def __init__(self, stages: list, manifest_path: str):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self.stages = stages
+        self.manifest_path = manifest_path
+        self._producers = {value: stage for stage in stages for value in stage.provides}
+        for stage in stages:
+            for value in stage.needs:
+                if value not in self._producers or names.index(self._producers[value].name) >= names.index(stage.name):
+                    raise ValueError(f"Stage '{stage.name}' needs '{value}', which no earlier stage provides.")
+        self._keys = {}
+        self._values = {}
+        self._log = {}
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest.get('stages', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def _save_manifest(self, state: dict):
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'stages': state}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _key(self, stage: Stage) -> str:
+        inputs = {path: path_fingerprint(path) if os.path.exists(path) else None for path in stage.inputs}
+        upstream = {value: self._keys[self._producers[value].name] for value in stage.needs}
+        return data_fingerprint(stage.name, source_fingerprint(stage.code), stage.params, inputs, upstream)
+
+    @staticmethod
+    def _modified_outputs(stage: Stage, record: dict) -> list:
+        """The outputs that exist but differ from what the stage wrote on its last run."""
+        recorded = record.get('outputs', {})
+        return [path for path in stage.outputs if os.path.exists(path) and recorded.get(path) != path_fingerprint(path)]
+
+    def _execute(self, stage: Stage):
+        start = time.perf_counter()
+        print(f"[pipeline] Running stage '{stage.name}'...")
+        values = stage.run(self) or {}
+        missing = set(stage.provides) - set(values)
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not provide {sorted(missing)}.")
+        self._values.update(values)
+        self._log[stage.name] = ('ran', time.perf_counter() - start)
+
+    def value(self, name: str):
+        """Returns an in-memory value, running the stage that provides it first if needed."""
+        if name not in self._values:
+            stage = self._producers[name]
+            for needed in stage.needs:
+                self.value(needed)
+            self._execute(stage)
+        return self._values[name]
+
+    def cached(self, name: str):
+        """Returns an in-memory value if a stage already produced it in this run, else None."""
+        return self._values.get(name)
+
+    def run(self, force: list = (), dry_run: bool = False) -> pd.DataFrame:
+        """
+        Runs the stages that are out of date.
+
+        Args:
+            force (list): Names of persistent stages to run even if they are up to date
+                (their downstream stages follow, since their outputs change), including the
+                stages whose outputs were modified outside the pipeline.
+            dry_run (bool): Only report which stages would run.
+
+        Returns:
+            pd.DataFrame: One row per stage with its status ('ran', 'skipped', 'would run',
+            'conflict', 'not needed'), the reason and the time it took.
+        """
+        unknown = set(force) - {stage.name for stage in self.stages}
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {sorted(unknown)}")
+        state = self._load_manifest()
+        self._keys, self._values, self._log = {}, {}, {}
+        reasons = {}
+        # Outputs rewritten (or to be rewritten, in a dry run) by this run
+        changed_paths = set()
+
+        for stage in self.stages:
+            key = self._key(stage)
+            self._keys[stage.name] = key
+            if not stage.persistent:
+                continue
+            record = state.get(stage.name)
+            modified = self._modified_outputs(stage, record) if record is not None else []
+            if stage.name in force:
+                reason = "forced"
+            elif record is None:
+                reason = "never ran"
+            elif modified and not stage.overwrite_modified:
+                names = ', '.join(os.path.basename(path) for path in modified)
+                reasons[stage.name] = f"outputs modified outside the pipeline ({names}); --force {stage.name} overwrites them"
+                self._log[stage.name] = ('conflict', None)
+                print(f"[pipeline] Warning: not running stage '{stage.name}': {reasons[stage.name]}.")
+                continue
+            elif dry_run and changed_paths.intersection(stage.inputs):
+                reason = "inputs will change"
+            elif record.get('key') != key:
+                reason = "inputs or code changed"
+            elif modified or not all(os.path.exists(path) for path in stage.outputs):
+                reason = "outputs missing or modified"
+            else:
+                reasons[stage.name] = "up to date"
+                self._log[stage.name] = ('skipped', 0.0)
+                continue
+            reasons[stage.name] = reason
+            changed_paths.update(stage.outputs)
+            if dry_run:
+                self._log[stage.name] = ('would run', None)
+                continue
+
+            for needed in stage.needs:
+                self.value(needed)
+            self._execute(stage)
+            state[stage.name] = {
+                'key': key,
+                'outputs': {path: path_fingerprint(path) for path in stage.outputs if os.path.exists(path)},
+                'completed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self._save_manifest(state)
+
+        rows = []
+        for stage in self.stages:
+            status, seconds = self._log.get(stage.name, ('not needed', None))
+            reason = reasons.get(stage.name, "in memory, for the stages that ran" if status == 'ran' else "")
+            rows.append({'Stage': stage.name, 'Status': status, 'Reason': reason, 'Seconds': '' if seconds is None else round(seconds, 2)})
+        return pd.DataFrame(rows)
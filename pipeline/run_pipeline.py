@@ -0,0 +1,130 @@
+# pipeline/run_pipeline.py
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCRIPT_DIRS = ['prj_part01', 'prj_part02', 'prj_part03']
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+# The part scripts import their sibling modules directly
+sys.path[1:1] = [os.path.join(PROJECT_ROOT, script_dir) for script_dir in SCRIPT_DIRS]
+
+import analysis_part3
+import download_data
+import process_data
+import process_data_part2
+from reporting import SectionProfiler
+from datastore import processed_dataset_path, text_pool_path
+from pipeline.orchestrator import Pipeline, Stage
+
+# Code shared by every stage
+LIBRARY_CODE = ['analytics', 'datastore', 'reporting']
+
+
+def manifest_path(project_root: str) -> str:
+    """Returns where the pipeline keeps the keys of the stages that ran."""
+    return os.path.join(project_root, 'prj_files', 'pipeline_state.json')
+
+
+def build_pipeline(project_root: str = PROJECT_ROOT, near_duplicates: bool = False, n_jobs: int = None,
+                   rebuild_figures: bool = False) -> Pipeline:
+    """
+    Declares the stages of Parts 1-3 and what each one reads and writes.
+
+    - download: the raw CSV (skipped by `download_data` itself when the file exists, e.g. a
+      generated one).
+    - load, clean: Part 1 questions a and b-f, in memory only.
+    - features: Part 1 questions g-m; writes the Parquet dataset, its text pool and the Part 1 report.
+      The dataset is not rebuilt after `process_data.py --append` added rows to it, unless forced.
+    - query_report: the Part 2 DuckDB report.
+    - eda_report: the Part 3 report; gets Part 1's frame in memory when `features` ran in the same run.
+    """
+    def path(*parts):
+        return os.path.join(project_root, *parts)
+
+    def code(*paths):
+        return [path(p) for p in LIBRARY_CODE] + list(paths)
+
+    raw_path = path('prj_files', 'fakeTelegram.BR_2022.csv')
+    processed_path = processed_dataset_path(project_root)
+    pool_path = text_pool_path(processed_path)
+    part1_script = path('prj_part01', 'process_data.py')
+    disabled = SectionProfiler(enabled=False)
+
+    def download(pipeline):
+        download_data.download_and_extract_data()
+
+    def load(pipeline):
+        report = process_data.create_report(disabled)
+        return {'part1_report': report, 'raw': process_data.load_step(report, disabled)}
+
+    def clean(pipeline):
+        df, text_pool = process_data.clean_step(pipeline.value('raw'), pipeline.value('part1_report'))
+        return {'cleaned': (df, text_pool)}
+
+    def features(pipeline):
+        df, text_pool = pipeline.value('cleaned')
+        report = pipeline.value('part1_report')
+        df, text_index, share_counts = process_data.feature_step(df, text_pool, report, disabled, near_duplicates=near_duplicates)
+        report.save_report(path('prj_part01', 'report.md'))
+        process_data.save_processed(df, text_pool, text_index, share_counts, processed_path)
+        return {'processed': (df, text_pool, text_index)}
+
+    def query_report(pipeline):
+        process_data_part2.main()
+
+    def eda_report(pipeline):
+        analysis_part3.main(n_jobs=n_jobs, rebuild_figures=rebuild_figures, processed=pipeline.cached('processed'))
+
+    stages = [
+        Stage('download', download, outputs=[raw_path], code=[path('prj_part01', 'download_data.py')],
+              overwrite_modified=True),
+        Stage('load', load, inputs=[raw_path], provides=['part1_report', 'raw'],
+              code=code(path('prj_part01', 'load_data.py'), part1_script)),
+        Stage('clean', clean, needs=['raw', 'part1_report'], provides=['cleaned'], code=code(part1_script)),
+        Stage('features', features, needs=['cleaned', 'part1_report'], provides=['processed'],
+              outputs=[processed_path, pool_path, path('prj_part01', 'report.md')],
+              code=code(part1_script), params={'near_duplicates': near_duplicates}),
+        Stage('query_report', query_report, inputs=[processed_path, pool_path],
+              outputs=[path('prj_part02', 'report.md')], code=code(path('prj_part02')), overwrite_modified=True),
+        Stage('eda_report', eda_report, inputs=[processed_path, pool_path],
+              outputs=[path('prj_part03', 'report.md')], code=code(path('prj_part03')), overwrite_modified=True),
+    ]
+    return Pipeline(stages, manifest_path(project_root))
+
+
+def main(force: list = None, dry_run: bool = False, near_duplicates: bool = False, n_jobs: int = None,
+         rebuild_figures: bool = False):
+    """
+    Runs Parts 1-3 as one pipeline, skipping the stages whose inputs and code did not change.
+
+    Args:
+        force (list): Stages to run even if they are up to date; an empty list forces every stage.
+        dry_run (bool): Only print which stages would run.
+
+    Returns:
+        pd.DataFrame: The status of each stage (see `Pipeline.run`).
+    """
+    pipeline = build_pipeline(near_duplicates=near_duplicates, n_jobs=n_jobs, rebuild_figures=rebuild_figures)
+    if force is not None and len(force) == 0:
+        force = [stage.name for stage in pipeline.stages]
+    summary = pipeline.run(force=force or (), dry_run=dry_run)
+    print(summary.to_markdown(index=False))
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs Parts 1-3 as one pipeline, skipping unchanged stages.")
+    parser.add_argument('--force', nargs='*', metavar='STAGE', help="Run these stages even if up to date (all stages when none is given).")
+    parser.add_argument('--dry-run', action='store_true', help="Only show which stages would run and why.")
+    parser.add_argument('--near-duplicates', action='store_true', help="Cluster near-duplicate texts in Part 1 (see process_data.py).")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes for the Part 3 figures and n-grams.")
+    parser.add_argument('--rebuild-figures', action='store_true', help="Render every Part 3 figure again.")
+    args = parser.parse_args()
+    summary = main(force=args.force, dry_run=args.dry_run, near_duplicates=args.near_duplicates, n_jobs=args.jobs,
+                   rebuild_figures=args.rebuild_figures)
+    # A stage left out because of a conflict means the outputs are not what a full run would give
+    if (summary['Status'] == 'conflict').any():
+        sys.exit(1)
@@ -0,0 +1,306 @@
+# prj_part01/duckdb_engine.py
+
+import os
+import shutil
+import tempfile
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from load_data import iter_dataset
+from process_data import text_sentiment, trava_zaps_texts
+from reporting import ReportGenerator, SectionProfiler
+from datastore import (
+    COLUMN_DTYPES,
+    DATE_FORMATS,
+    DEFAULT_CHUNKSIZE,
+    MemoryTracker,
+    TextIndex,
+    TextPool,
+    partition_days,
+    write_partition,
+)
+from analytics import cluster_texts
+
+# Dtypes of the Part 1 features as the pandas steps create them (not the declared load schema)
+FEATURE_DTYPES = {
+    'text_id': 'int32',
+    'caracteres': 'int64',
+    'words': 'int64',
+    'cluster_id': 'int32',
+    'sharings': 'float64',
+    'viral': 'int64',
+    'sentiment': 'int8',
+}
+
+# SQL of each feature over `rows LEFT JOIN text_features`, with the values the pandas steps
+# give the rows without text
+FEATURE_SQL = {
+    'caracteres': "COALESCE(caracteres, 0)",
+    'words': "COALESCE(words, 0)",
+    'cluster_id': "COALESCE(cluster_id, -1)",
+    'sharings': "sharings",
+    'viral': "COALESCE(sharings > 1, FALSE)::BIGINT",
+    'sentiment': "COALESCE(sentiment, 0)::TINYINT",
+}
+
+# The characters `str.split()` splits on (those where `str.isspace()` is true), as an RE2 class
+WHITESPACE_CLASS = r'\t\n\x0b\x0c\r\x1c-\x20\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+
+_ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+class DuckDBEngine:
+    """
+    Runs the Part 1 steps as DuckDB SQL over an on-disk database, so the dataset never has
+    to fit in memory.
+
+    The CSV is parsed by the same chunked, typed reader as the pandas path (so missing
+    values, timestamps and the memory table are the same) and each chunk is appended to a
+    DuckDB table in a temporary database. Missing values, duplicates, the text features,
+    'sharings'/'viral', the 'trava-zaps' removal and the consistency check are then queries
+    on that table, which DuckDB runs on every core and spills to disk when they outgrow
+    `memory_limit`. Only the distinct texts are brought into Python: they form the text
+    pool, and the sentiment, the near-duplicate clusters and the inverted index are computed
+    on them, as in the pandas path. The report is the same as the pandas path's.
+    """
+
+    def __init__(self, temp_dir: str = None, memory_limit: str = None):
+        """
+        Args:
+            temp_dir (str): Where the temporary database and DuckDB's spill files go.
+            memory_limit (str): DuckDB memory limit, e.g. '4GB' (DuckDB's default otherwise).
+        """
+        self._temp_dir = tempfile.TemporaryDirectory(prefix='part1-duckdb-', dir=temp_dir)
+        config = {'temp_directory': os.path.join(self._temp_dir.name, 'spill'), 'preserve_insertion_order': False}
+        if memory_limit is not None:
+            config['memory_limit'] = memory_limit
+        self.con = duckdb.connect(os.path.join(self._temp_dir.name, 'part1.duckdb'), config=config)
+        self.columns = []
+        self.categories = {}
+        self.num_rows = 0
+        self.text_pool = None
+        self.share_counts = None
+        self.feature_columns = []
+
+    def close(self):
+        """Closes the connection and removes the temporary database."""
+        self.con.close()
+        self._temp_dir.cleanup()
+
+    def _typed(self, table: pa.Table) -> pd.DataFrame:
+        # Gives a query result the dtypes the pandas path has
+        frame = table.to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
+        dtypes = {**COLUMN_DTYPES, **FEATURE_DTYPES}
+        for col in frame.columns:
+            if col in self.categories:
+                frame[col] = pd.Categorical(frame[col], categories=self.categories[col])
+            elif col in DATE_FORMATS:
+                frame[col] = frame[col].astype('datetime64[ns]')
+            elif col in dtypes:
+                frame[col] = frame[col].astype(dtypes[col])
+        return frame
+
+    def _append(self, chunk: pd.DataFrame):
+        for col in self.categories:
+            # The categories of `concat_chunks`: those of each chunk, in order of first appearance
+            seen = set(self.categories[col])
+            self.categories[col].extend(value for value in chunk[col].cat.categories if value not in seen)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        for col in self.categories:
+            table = table.set_column(table.schema.get_field_index(col), col, table[col].cast(pa.string()))
+        table = table.append_column('row_id', pa.array(np.arange(self.num_rows, self.num_rows + len(chunk), dtype=np.int64)))
+        self.con.register('chunk', table)
+        if self.num_rows == 0:
+            self.con.execute("CREATE TABLE raw AS SELECT * FROM chunk")
+        else:
+            self.con.execute("INSERT INTO raw BY NAME SELECT * FROM chunk")
+        self.con.unregister('chunk')
+        self.num_rows += len(chunk)
+
+    def _rows(self, columns: list, limit: int = None) -> pd.DataFrame:
+        """The first rows (in file order) of the given columns, features included."""
+        select = ", ".join(f"{FEATURE_SQL[col]} AS {col}" if col in FEATURE_SQL else _quote(col) for col in columns)
+        query = f"""
+            SELECT {select}
+            FROM (SELECT * FROM rows ORDER BY row_id LIMIT {limit}) AS first_rows
+            LEFT JOIN text_features USING (text_id)
+            ORDER BY row_id
+        """
+        return self._typed(self.con.execute(query).fetch_arrow_table())
+
+    def _add_text_values(self, values: dict):
+        """Adds per-text arrays (aligned with the text pool's codes) to `text_features`."""
+        table = pa.table({'text_id': np.arange(len(self.text_pool), dtype=np.int32), **values})
+        self.con.register('text_values', table)
+        self.con.execute("CREATE OR REPLACE TABLE text_features AS SELECT * FROM text_features JOIN text_values USING (text_id)")
+        self.con.unregister('text_values')
+        self.feature_columns.extend(values)
+
+    def load_step(self, report: ReportGenerator, profiler: SectionProfiler):
+        """Question a: loads the typed dataset chunk by chunk into the database."""
+        report.add_section("A: Load Dataset")
+        profiler.start('load')
+        memory_tracker = MemoryTracker()
+        preview = None
+        for chunk in iter_dataset(memory_tracker=memory_tracker):
+            if preview is None:
+                preview = chunk.head()
+                self.columns = chunk.columns.tolist()
+                self.categories = {col: [] for col in self.columns if COLUMN_DTYPES.get(col) == 'category'}
+            self._append(chunk)
+        profiler.set_rows(self.num_rows)
+        report.add_text("Dataset loaded successfully. Here's a preview:")
+        report.add_table(preview)
+        report.add_text("The dataset was loaded in chunks with a declared schema (categoricals, Arrow-backed strings and timestamps parsed once). Memory usage per column:")
+        report.add_table(memory_tracker.to_frame(), title="Memory Usage Before and After Typing")
+
+    def clean_step(self, report: ReportGenerator) -> TextPool:
+        """
+        Questions b-f: the data quality checks. Numbers the distinct texts in order of first
+        appearance (the codes `TextPool.build` gives them) and adds their code as 'text_id'.
+
+        Returns:
+            TextPool: The pool of the distinct texts.
+        """
+        con = self.con
+        columns = [_quote(col) for col in self.columns]
+        report.add_section("Data Cleaning and Feature Engineering")
+
+        # b) Missing values
+        report.add_question("b & c", "Identify missing values and count rows containing them.")
+        missing_values_count = con.execute(f"SELECT COUNT(*) FROM raw WHERE {' OR '.join(f'{col} IS NULL' for col in columns)}").fetchone()[0]
+        report.add_text(f"Total number of rows with at least one missing value: **{missing_values_count}**")
+
+        report.add_question("d", "Count missing values for each column.")
+        missing = con.execute(f"SELECT {', '.join(f'COUNT(*) - COUNT({col})' for col in columns)} FROM raw").fetchone()
+        report.add_table(pd.DataFrame({'Column': self.columns, 'Missing Values': np.asarray(missing, dtype=np.int64)}))
+
+        # e) Duplicates
+        report.add_question("e", "Identify and list duplicate rows.")
+        con.execute("""
+            CREATE TABLE texts AS
+            SELECT text, (ROW_NUMBER() OVER (ORDER BY first_row) - 1)::INTEGER AS text_id, share_count
+            FROM (
+                SELECT text_content_anonymous AS text, MIN(row_id) AS first_row, COUNT(*) AS share_count
+                FROM raw WHERE text_content_anonymous IS NOT NULL GROUP BY text_content_anonymous
+            )
+        """)
+        texts = con.execute("SELECT text, share_count FROM texts ORDER BY text_id").fetch_arrow_table()
+        self.text_pool = TextPool.from_arrow(texts['text'])
+        self.share_counts = texts['share_count'].to_numpy()
+        con.execute("""
+            CREATE TABLE rows AS
+            SELECT raw.*, COALESCE(texts.text_id, -1)::INTEGER AS text_id
+            FROM raw LEFT JOIN texts ON raw.text_content_anonymous = texts.text
+        """)
+        con.execute("DROP TABLE raw")
+
+        # 'text_id' identifies the text, so the text column itself is not compared again
+        key = ", ".join([col for col in columns if col != '"text_content_anonymous"'] + ['text_id'])
+        distinct_rows = con.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT {key} FROM rows)").fetchone()[0]
+        duplicates_count = self.num_rows - distinct_rows
+        report.add_text(f"Found **{duplicates_count}** duplicate rows.")
+        if duplicates_count:
+            duplicates = con.execute(f"""
+                SELECT {', '.join(columns)}, text_id FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY row_id) AS copy FROM rows
+                ) WHERE copy > 1 ORDER BY row_id LIMIT 5
+            """).fetch_arrow_table()
+            report.add_table(self._typed(duplicates), title="Preview of Duplicate Rows")
+
+        # f) Domain Errors (Simplified check)
+        report.add_question("f", "Identify values not belonging to the expected domain.")
+        report.add_text("This step is complex without a clear data dictionary. A full implementation would require checks for each column's expected data type and format.")
+        return self.text_pool
+
+    def feature_step(self, report: ReportGenerator, profiler: SectionProfiler, near_duplicates: bool = False) -> tuple:
+        """
+        Questions g-m: the derived columns, the removal of the 'trava-zaps' rows and the
+        consistency check. The features are kept per distinct text in `text_features` and
+        joined to the rows when they are read.
+
+        Returns:
+            tuple: The `TextIndex` over the pool and the per-text share counters.
+        """
+        con = self.con
+        text_pool = self.text_pool
+
+        # g & h) Character and Word Counts (Python's len() and str.split() of each distinct text)
+        report.add_question("g & h", "Create 'caracteres' and 'words' columns.")
+        con.execute(f"""
+            CREATE OR REPLACE TABLE text_features AS
+            SELECT text_id, length(text)::BIGINT AS caracteres,
+                   len(regexp_extract_all(text, '[^{WHITESPACE_CLASS}]+'))::BIGINT AS words
+            FROM texts
+        """)
+        self.feature_columns = ['caracteres', 'words']
+        report.add_table(self._rows(['text_content_anonymous', 'caracteres', 'words'], limit=5))
+
+        # i & j) Viral and Sharings
+        report.add_question("i & j", "Create 'viral' and 'sharings' columns.")
+        if near_duplicates:
+            text_clusters = cluster_texts(text_pool.texts().tolist())
+            cluster_counts = np.bincount(text_clusters, weights=self.share_counts, minlength=len(text_pool)).astype(np.int64)
+            self._add_text_values({'cluster_id': text_clusters.astype(np.int32), 'sharings': cluster_counts[text_clusters].astype(np.float64)})
+            report.add_text(f"Near-duplicate texts were grouped with MinHash/LSH: **{len(text_pool)}** distinct texts form **{len(np.unique(text_clusters))}** clusters, and 'sharings' counts the rows of each cluster.")
+        else:
+            self._add_text_values({'sharings': self.share_counts.astype(np.float64)})
+        report.add_table(self._rows(['text_content_anonymous', 'sharings', 'viral'], limit=5))
+
+        # k) Sentiment
+        report.add_question("k", "Create 'sentiment' column.")
+        self._add_text_values({'sentiment': text_sentiment(text_pool.texts())})
+        report.add_table(self._rows(['text_content_anonymous', 'sentiment'], limit=5))
+
+        # l) Remove 'trava-zaps'
+        report.add_question("l", "Eliminate rows containing 'trava-zaps'.")
+        text_index = TextIndex.build(text_pool)
+        con.register('trava_zaps', pa.table({'text_id': np.flatnonzero(trava_zaps_texts(text_pool.texts())).astype(np.int32)}))
+        removed = con.execute("DELETE FROM rows WHERE text_id IN (SELECT text_id FROM trava_zaps)").fetchone()[0]
+        con.unregister('trava_zaps')
+        report.add_text(f"Found and removed **{removed}** rows containing 'trava-zaps'.")
+        profiler.set_rows(self.num_rows - removed)
+
+        # m) Inconsistencies
+        report.add_question("m", "Identify inconsistencies between attributes.")
+        inconsistent = con.execute("SELECT COUNT(*) FROM rows WHERE has_media AND media_type IS NULL").fetchone()[0]
+        report.add_text(f"Found **{inconsistent}** rows where 'has_media' is True but 'media_type' is null.")
+        return text_index, self.share_counts
+
+    def write_processed(self, output_path: str, batch_rows: int = DEFAULT_CHUNKSIZE):
+        """
+        Streams the processed rows into the day-partitioned Parquet dataset, in the order and
+        with the dtypes of `write_partitioned_parquet`, holding at most one day in memory.
+        """
+        if os.path.exists(output_path):
+            shutil.rmtree(output_path)
+        # The columns in the order the pandas steps add them
+        features = {'text_id', 'viral', *self.feature_columns}
+        columns = self.columns + [col for col in FEATURE_DTYPES if col in features]
+        select = ", ".join(f"{FEATURE_SQL[col]} AS {col}" if col in FEATURE_SQL else _quote(col) for col in columns)
+        reader = self.con.execute(f"""
+            SELECT {select} FROM rows LEFT JOIN text_features USING (text_id)
+            ORDER BY date_message NULLS LAST, row_id
+        """).fetch_record_batch(batch_rows)
+
+        pending, pending_day = [], None
+        for batch in reader:
+            frame = self._typed(pa.Table.from_batches([batch]))
+            days = partition_days(frame['date_message']).to_numpy()
+            starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+            for start, end in zip(starts, np.r_[starts[1:], len(frame)]):
+                if days[start] != pending_day and pending:
+                    write_partition(pd.concat(pending, ignore_index=True), output_path, pending_day)
+                    pending = []
+                pending_day = days[start]
+                pending.append(frame.iloc[start:end])
+        if pending:
+            write_partition(pd.concat(pending, ignore_index=True), output_path, pending_day)
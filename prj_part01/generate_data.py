@@ -0,0 +1,310 @@
+# prj_part01/generate_data.py
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from datastore import DEFAULT_CHUNKSIZE
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_START = '2022-09-01'
+DEFAULT_DAYS = 92
+
+COLUMNS = [
+    'date_message', 'id_member_anonymous', 'id_group_anonymous', 'media', 'media_type', 'media_url',
+    'has_media', 'has_media_url', 'trava_zap', 'text_content_anonymous', 'dataset_info_id', 'date_system',
+    'score_sentiment', 'score_misinformation', 'id_message', 'message_type', 'messenger', 'media_name', 'media_md5',
+]
+
+# Approximate shares of the real export (see question d of the Part 1 report)
+MEDIA_SHARE = 0.60
+TEXTLESS_MEDIA_SHARE = 0.33      # media messages without a caption, ~20% of all texts missing
+URL_SHARE = 0.30
+SCORED_TEXT_SHARE = 0.40         # texts with a score_misinformation, ~70% of the rows missing it
+MISSING_MEMBER_SHARE = 0.57
+UPPERCASE_SHARE = 0.05
+TRAVA_ZAP_SHARE = 1e-5
+
+# Messages are either new (a text of their own) or forwards of a catalog of popular texts,
+# whose popularity follows Zipf's law; users, groups and URLs are Zipf-distributed as well.
+FORWARD_SHARE = 0.30
+FORWARD_EXPONENT = 1.1
+USER_EXPONENT = 1.1
+GROUP_EXPONENT = 1.0
+URL_EXPONENT = 1.0
+MIN_WORDS = 3
+MAX_WORDS = 80
+
+# media_type -> (share among media messages, file extension, message_type)
+MEDIA_KINDS = {
+    'image/jpg': (0.55, 'jpg', 'Imagem'),
+    'video/mp4': (0.30, 'mp4', 'Video'),
+    'audio/ogg': (0.06, 'ogg', 'Audio'),
+    'application/pdf': (0.09, 'pdf', 'Documento'),
+}
+URL_DOMAINS = [
+    'https://www.youtube.com/watch?v=', 'https://youtu.be/', 'https://t.me/', 'https://twitter.com/i/status/',
+    'https://www.instagram.com/p/', 'https://g1.globo.com/politica/noticia/', 'https://noticias.uol.com.br/',
+    'https://www.facebook.com/watch/?v=', 'https://bit.ly/', 'https://www.kwai.com/@', 'https://gettr.com/post/',
+    'https://rumble.com/',
+]
+# Messages per hour of the day (relative), quietest before dawn and busiest in the evening
+HOURLY_PROFILE = np.array([
+    0.45, 0.30, 0.20, 0.15, 0.15, 0.25, 0.55, 0.90, 1.20, 1.35, 1.40, 1.40,
+    1.35, 1.30, 1.30, 1.35, 1.40, 1.45, 1.55, 1.70, 1.80, 1.70, 1.30, 0.85,
+])
+WEEKDAY_PROFILE = np.array([1.00, 1.00, 1.00, 1.00, 1.05, 0.90, 0.85])
+# Election days of 2022 (first and second round), around which activity peaks
+ELECTION_DAYS = ['2022-10-02', '2022-10-30']
+
+VOCABULARY = (
+    "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das "
+    "tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre era "
+    "depois sem mesmo aos ter seus quem nas me esse eles estão você tinha foram essa num nem suas meu "
+    "bolsonaro lula brasil presidente eleição eleições voto urna urnas turno povo país governo stf tse "
+    "deus pátria família liberdade verdade mentira fraude globo mídia imprensa notícia vídeo áudio "
+    "compartilhem compartilhe grupo grupos todos agora urgente atenção vejam assistam hoje amanhã "
+    "segurança facção criminosa polícia crime bandido corrupção dinheiro petrobras auxílio pix "
+    "esquerda direita comunismo socialismo militares exército forças armadas nação brasileiros "
+    "campanha debate candidato candidatos pesquisa datafolha ipec votar votem justiça ministro "
+    "bom dia boa noite obrigado amém parabéns vergonha absurdo gente pessoal irmãos patriotas"
+).split()
+
+_HEX_TABLE = np.array([f'{i:02x}' for i in range(256)], dtype='S2')
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a fast, well-spread hash of uint64 keys."""
+    with np.errstate(over='ignore'):
+        z = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _uniform(keys: np.ndarray, stream: int, seed: int) -> np.ndarray:
+    # Uniform [0, 1) numbers that only depend on the key, the stream and the seed
+    with np.errstate(over='ignore'):
+        salted = keys.astype(np.uint64) * np.uint64(64) + np.uint64(stream) + _mix(np.array([seed], dtype=np.uint64))
+    return (_mix(salted) >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+
+
+def _hex_ids(keys: np.ndarray, stream: int, seed: int) -> np.ndarray:
+    """32-character hexadecimal ids (like the export's anonymized md5s), one per key."""
+    with np.errstate(over='ignore'):
+        salted = keys.astype(np.uint64) * np.uint64(64) + np.uint64(stream) + _mix(np.array([seed], dtype=np.uint64))
+    halves = np.stack([_mix(salted), _mix(salted ^ np.uint64(0x5DEECE66D))], axis=1)
+    hex_bytes = np.ascontiguousarray(_HEX_TABLE[halves.view(np.uint8)])
+    return hex_bytes.view('S32').ravel().astype(str).astype(object)
+
+
+def _zipf_ranks(u: np.ndarray, size: int, exponent: float) -> np.ndarray:
+    """Ranks 1..size drawn from a bounded Zipf (discretized Pareto) law by inverting its CDF."""
+    if exponent == 1.0:
+        ranks = np.power(float(size + 1), u)
+    else:
+        ranks = np.power((np.power(size + 1.0, 1 - exponent) - 1) * u + 1, 1 / (1 - exponent))
+    return np.clip(ranks.astype(np.int64), 1, size)
+
+
+def _hourly_weights(start: pd.Timestamp, days: int) -> np.ndarray:
+    """Relative number of messages of each hour of the period: daily and weekly cycles plus election peaks."""
+    day_index = pd.date_range(start, periods=days, freq='D')
+    daily = WEEKDAY_PROFILE[day_index.dayofweek]
+    for election in pd.to_datetime(ELECTION_DAYS):
+        distance = (day_index - election).days.to_numpy()
+        daily = daily * (1 + 2.5 * np.exp(-0.5 * (distance / 2.0) ** 2))
+    return (daily[:, None] * HOURLY_PROFILE[None, :]).ravel()
+
+
+class _Catalog:
+    """Sizes and period shared by all chunks, so every chunk draws from the same population."""
+
+    def __init__(self, rows: int, seed: int, start: str, days: int):
+        self.rows = rows
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.popular_texts = max(rows // 50, 100)
+        self.users = max(rows // 10, 100)
+        self.groups = max(rows // 2000, 20)
+        self.urls = max(rows // 20, 50)
+        weights = _hourly_weights(self.start, days)
+        self.hour_weights = weights / weights.sum()
+        self.hour_cdf = np.cumsum(self.hour_weights)
+        word_weights = 1 / np.arange(1, len(VOCABULARY) + 1)
+        self.word_cdf = np.cumsum(word_weights) / word_weights.sum()
+        self.vocabulary = pa.array(VOCABULARY)
+        media_shares = np.array([share for share, _, _ in MEDIA_KINDS.values()])
+        self.media_cdf = np.cumsum(media_shares) / media_shares.sum()
+        self.media_types = np.array(list(MEDIA_KINDS), dtype=object)
+        self.extensions = np.array(['.' + ext for _, ext, _ in MEDIA_KINDS.values()], dtype=object)
+        self.message_types = np.array([kind for _, _, kind in MEDIA_KINDS.values()], dtype=object)
+
+
+def _timestamps(catalog: _Catalog, first_row: int, u: np.ndarray) -> np.ndarray:
+    """
+    Message times in chronological order, like the export's.
+
+    Row i of n gets the quantile (i + u_i) / n of the hourly message distribution, so the file
+    follows the daily and hourly cycles exactly, at any scale, without holding more than a chunk.
+    """
+    quantiles = (np.arange(first_row, first_row + len(u)) + u) / catalog.rows
+    hours = np.minimum(np.searchsorted(catalog.hour_cdf, quantiles, side='right'), len(catalog.hour_cdf) - 1)
+    before = catalog.hour_cdf[hours] - catalog.hour_weights[hours]
+    within = np.clip((quantiles - before) / catalog.hour_weights[hours], 0, 1 - 1e-9)
+    seconds = (hours * 3600 + within * 3600).astype(np.int64)
+    return catalog.start.to_datetime64().astype('datetime64[s]') + seconds.astype('timedelta64[s]')
+
+
+def _texts(catalog: _Catalog, keys: np.ndarray) -> tuple:
+    """
+    One sentence per message key, a deterministic function of the key and the seed.
+
+    Sentence lengths are log-uniform between MIN_WORDS and MAX_WORDS words, and words follow Zipf's law,
+    so a forwarded text is the same string every time it appears.
+    """
+    seed = catalog.seed
+    lengths = (MIN_WORDS * np.power(MAX_WORDS / MIN_WORDS, _uniform(keys, 10, seed))).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    word_keys = np.repeat(keys.astype(np.uint64) * np.uint64(MAX_WORDS + 1), lengths) + (np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)).astype(np.uint64)
+    words = np.searchsorted(catalog.word_cdf, _uniform(word_keys, 11, seed), side='right')
+    sentences = pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), catalog.vocabulary.take(pa.array(words))), ' ')
+    sentences = pc.if_else(pa.array(_uniform(keys, 12, seed) < UPPERCASE_SHARE), pc.utf8_upper(sentences), sentences)
+    trava_zap = pa.array(_uniform(keys, 13, seed) < TRAVA_ZAP_SHARE)
+    return pc.if_else(trava_zap, pc.binary_join_element_wise(sentences, 'trava-zaps', ' '), sentences), trava_zap.to_numpy(zero_copy_only=False)
+
+
+def _chunk(catalog: _Catalog, chunk_index: int, first_row: int, rows: int) -> pd.DataFrame:
+    """Generates rows first_row..first_row + rows - 1 of the dataset."""
+    seed = catalog.seed
+    rng = np.random.default_rng([seed, chunk_index])
+    dates = _timestamps(catalog, first_row, rng.random(rows))
+
+    # Each message is a key: forwards share the key of a popular text, new messages get their own.
+    # Everything about the content (text, media, URL, scores) is a function of the key.
+    forwarded = rng.random(rows) < FORWARD_SHARE
+    keys = np.where(forwarded, _zipf_ranks(rng.random(rows), catalog.popular_texts, FORWARD_EXPONENT),
+                    catalog.popular_texts + 1 + np.arange(first_row, first_row + rows)).astype(np.uint64)
+
+    has_media = _uniform(keys, 0, seed) < MEDIA_SHARE
+    kind = np.searchsorted(catalog.media_cdf, _uniform(keys, 1, seed), side='right')
+    media_md5 = _hex_ids(keys, 2, seed)
+    media_type = np.where(has_media, catalog.media_types[kind], None)
+    document = has_media & (catalog.media_types[kind] == 'application/pdf')
+
+    has_url = _uniform(keys, 3, seed) < URL_SHARE
+    url_ids = _zipf_ranks(_uniform(keys, 4, seed), catalog.urls, URL_EXPONENT).astype(np.uint64)
+    url_paths = pd.Series(_hex_ids(url_ids, 5, seed)).str[:11].to_numpy()
+    urls = np.array(URL_DOMAINS, dtype=object)[url_ids % len(URL_DOMAINS)] + url_paths
+
+    has_text = ~(has_media & (_uniform(keys, 6, seed) < TEXTLESS_MEDIA_SHARE))
+    texts, trava_zap = _texts(catalog, keys)
+    texts = texts.to_numpy(zero_copy_only=False)
+    # Sentiment scores in [-1, 1], exactly 0 for a third of the texts, as in the export
+    sentiment = np.round(_uniform(keys, 7, seed) + _uniform(keys, 8, seed) - 1, 4)
+    sentiment[_uniform(keys, 9, seed) < 1 / 3] = 0.0
+    scored = has_text & (_uniform(keys, 14, seed) < SCORED_TEXT_SHARE)
+    misinformation = _uniform(keys, 15, seed) ** 3
+
+    users = _hex_ids(_zipf_ranks(rng.random(rows), catalog.users, USER_EXPONENT).astype(np.uint64), 16, seed)
+    users[rng.random(rows) < MISSING_MEMBER_SHARE] = None
+    groups = _hex_ids(_zipf_ranks(rng.random(rows), catalog.groups, GROUP_EXPONENT).astype(np.uint64), 17, seed)
+    delays = (rng.uniform(20, 90, rows) * 1e6).astype('timedelta64[us]')
+
+    return pd.DataFrame({
+        'date_message': dates,
+        'id_member_anonymous': users,
+        'id_group_anonymous': groups,
+        'media': np.where(has_media, media_md5 + catalog.extensions[kind], None),
+        'media_type': media_type,
+        'media_url': np.where(has_url, urls, None),
+        'has_media': has_media,
+        'has_media_url': has_url,
+        'trava_zap': trava_zap & has_text,
+        'text_content_anonymous': np.where(has_text, texts, None),
+        'dataset_info_id': 5,
+        'date_system': dates.astype('datetime64[us]') + delays,
+        'score_sentiment': np.where(has_text, sentiment, np.nan),
+        'score_misinformation': np.where(scored, misinformation, np.nan),
+        'id_message': np.arange(first_row + 1, first_row + rows + 1),
+        'message_type': np.where(has_media, catalog.message_types[kind], 'Texto'),
+        'messenger': 'telegram',
+        'media_name': np.where(document, pd.Series(media_md5).str[:16].to_numpy() + '.pdf', None),
+        'media_md5': np.where(has_media, media_md5, None),
+    }, columns=COLUMNS)
+
+
+def _write_chunk(chunk: pd.DataFrame, sink):
+    """
+    Appends a chunk to the CSV with Arrow's writer, several times faster than `DataFrame.to_csv`.
+
+    Booleans are spelled True/False, as in the export; Arrow quotes the strings, which parses
+    to the same values.
+    """
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    for name in ['has_media', 'has_media_url', 'trava_zap']:
+        table = table.set_column(table.schema.get_field_index(name), name, pc.if_else(table[name], 'True', 'False'))
+    pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=False))
+
+
+def default_output_path() -> str:
+    """The path `load_data.load_dataset` reads the raw CSV from."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.abspath(os.path.join(script_dir, '..'))
+    return os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022.csv')
+
+
+def generate_dataset(rows: int = DEFAULT_ROWS, output_path: str = None, seed: int = 0, start: str = DEFAULT_START,
+                     days: int = DEFAULT_DAYS, chunksize: int = DEFAULT_CHUNKSIZE, overwrite: bool = False) -> str:
+    """
+    Writes a synthetic dataset in the exact fakeTelegram.BR_2022 CSV format, for offline runs and
+    for scaling the pipeline past the size of the real export.
+
+    - Texts: 30% of the messages forward one of a catalog of popular texts chosen with Zipf's law,
+      the others are new; forwards of a text share its media, URL and scores.
+    - Users, groups and URLs are Zipf-distributed, so a few users post most of the messages.
+    - Dates follow daily, weekly and hourly cycles, with peaks around the 2022 election days,
+      and the file is in chronological order.
+    - Missing values roughly follow the real export's shares (member ids, captions, URLs, scores).
+
+    Rows are generated and appended chunk by chunk, so memory does not grow with `rows`. The output
+    only depends on the arguments, and is written to a temporary file first so an interrupted run
+    never leaves a partial dataset behind.
+
+    Returns:
+        str: The path of the generated CSV.
+    """
+    output_path = output_path or default_output_path()
+    if os.path.exists(output_path) and not overwrite:
+        print(f"Dataset already exists at {output_path}. Skipping generation.")
+        return output_path
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    catalog = _Catalog(rows, seed, start, days)
+    temp_path = output_path + '.tmp'
+    started = time.perf_counter()
+    with open(temp_path, 'wb') as f:
+        f.write((','.join(COLUMNS) + '\n').encode('utf-8'))
+        for chunk_index, first_row in enumerate(range(0, rows, chunksize)):
+            _write_chunk(_chunk(catalog, chunk_index, first_row, min(chunksize, rows - first_row)), f)
+    os.replace(temp_path, output_path)
+    print(f"Generated {rows} synthetic messages in {output_path} ({time.perf_counter() - started:.1f}s).")
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generates a synthetic fakeTelegram.BR_2022 dataset, offline.")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help="Number of messages (default %(default)s).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same arguments always give the same file.")
+    parser.add_argument('--output', help="Output CSV (default: prj_files/fakeTelegram.BR_2022.csv, where load_data reads it).")
+    parser.add_argument('--start', default=DEFAULT_START, help="First day of the period (default %(default)s).")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="Length of the period in days (default %(default)s).")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows generated and written at a time.")
+    parser.add_argument('--force', action='store_true', help="Overwrite an existing dataset.")
+    args = parser.parse_args()
+    generate_dataset(args.rows, args.output, seed=args.seed, start=args.start, days=args.days,
+                     chunksize=args.chunksize, overwrite=args.force)
@@ -1,13 +1,14 @@
 import pandas as pd
 import os
 from download_data import download_and_extract_data
+from datastore import DEFAULT_CHUNKSIZE, iter_csv_typed, read_csv_typed
 
-def load_dataset():
+def get_dataset_path():
     """
-    Ensures the dataset is downloaded and then loads it from the prj_files directory.
+    Ensures the dataset is downloaded and returns its path in the prj_files directory.
 
     Returns:
-        pandas.DataFrame: The loaded dataframe.
+        str: The absolute path to the raw CSV file.
     """
     # Ensure the data is present
     download_and_extract_data()
@@ -16,13 +17,41 @@ def load_dataset():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(script_dir, '..'))
     file_path = os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022.csv')
-    
+
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Dataset not found at {file_path}. The download may have failed.")
-        
-    df = pd.read_csv(file_path)
+    return file_path
+
+def load_dataset(typed=False, usecols=None, chunksize=DEFAULT_CHUNKSIZE, memory_tracker=None):
+    """
+    Ensures the dataset is downloaded and then loads it from the prj_files directory.
+
+    Args:
+        typed (bool): If True, applies the declared fakeTelegram schema (categoricals,
+            Arrow-backed strings, parsed timestamps) while reading in chunks.
+        usecols (list): Optional subset of columns to read.
+        chunksize (int): Rows per chunk in typed mode.
+        memory_tracker (datastore.MemoryTracker): Optional tracker that records the
+            memory of each column before and after typing (typed mode only).
+
+    Returns:
+        pandas.DataFrame: The loaded dataframe.
+    """
+    file_path = get_dataset_path()
+    if typed:
+        return read_csv_typed(file_path, usecols=usecols, chunksize=chunksize, memory_tracker=memory_tracker)
+    df = pd.read_csv(file_path, usecols=usecols)
     return df
 
+def iter_dataset(chunksize=DEFAULT_CHUNKSIZE, usecols=None, memory_tracker=None):
+    """
+    Yields the dataset as typed chunks, for processing files larger than memory.
+
+    Returns:
+        Iterator[pandas.DataFrame]: Typed chunks of at most `chunksize` rows.
+    """
+    return iter_csv_typed(get_dataset_path(), usecols=usecols, chunksize=chunksize, memory_tracker=memory_tracker)
+
 if __name__ == '__main__':
     df = load_dataset()
     print("Dataset loaded successfully!")
@@ -1,41 +1,170 @@
 import pandas as pd
+import numpy as np
 import os
+import shutil
+import argparse
 from load_data import load_dataset
-from reporting import ReportGenerator
+from reporting import ReportGenerator, SectionProfiler
+from datastore import (
+    MemoryTracker,
+    TextIndex,
+    TextPool,
+    concat_chunks,
+    dataset_columns,
+    list_partitions,
+    partition_days,
+    partitions_containing,
+    processed_dataset_path,
+    read_csv_typed,
+    read_partition,
+    text_index_path,
+    text_pool_path,
+    write_partition,
+    write_partitioned_parquet,
+)
+from analytics import cluster_texts, score_sentiment
 
-def main():
+
+def share_counts_path(dataset_path: str) -> str:
+    """Returns where the per-text share counters of the processed dataset are stored (inside its text pool)."""
+    return os.path.join(text_pool_path(dataset_path), 'share_counts.npy')
+
+
+def append_staging_path(dataset_path: str) -> str:
+    """Returns where `append_batch` stages the files it replaces before swapping them in (next to the dataset)."""
+    return os.path.splitext(dataset_path)[0] + '.append'
+
+
+# Written in the staging directory once every staged file is complete
+STAGING_COMPLETE = 'COMPLETE'
+
+
+def _swap_in(staged: str, target: str, replaced: str):
+    """Moves the directory `staged` to `target`, moving an existing `target` to `replaced` first."""
+    # Each step can be repeated after an interruption: a staged directory already moved is skipped
+    if not os.path.exists(staged):
+        return
+    if os.path.exists(target):
+        if os.path.exists(replaced):
+            shutil.rmtree(replaced)
+        os.makedirs(os.path.dirname(replaced), exist_ok=True)
+        os.replace(target, replaced)
+    os.replace(staged, target)
+
+
+def _swap_staged(dataset_path: str, staging_path: str):
+    """Swaps the staged text pool directory, then the staged day partitions, into the dataset."""
+    replaced = os.path.join(staging_path, 'replaced')
+    staged_dataset = os.path.join(staging_path, os.path.basename(dataset_path))
+    # The pool first: it only grows, so the rows still in place keep pointing at valid texts
+    _swap_in(text_pool_path(staged_dataset), text_pool_path(dataset_path), os.path.join(replaced, 'textpool'))
+    if os.path.exists(staged_dataset):
+        for name in sorted(os.listdir(staged_dataset)):
+            _swap_in(os.path.join(staged_dataset, name), os.path.join(dataset_path, name), os.path.join(replaced, name))
+
+
+def recover_append(dataset_path: str) -> str:
     """
-    Main function to process the dataset and generate a report for Part 1.
+    Finishes or discards an `append_batch` that was interrupted.
+
+    A staging directory marked complete is swapped in (the append is rolled forward); an
+    incomplete one is discarded, which leaves the dataset as it was before that append.
+
+    Returns:
+        str: 'finished', 'discarded', or None when no append was interrupted.
     """
-    # --- Setup ---
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    report = ReportGenerator(
+    staging_path = append_staging_path(dataset_path)
+    if not os.path.exists(staging_path):
+        return None
+    complete = os.path.exists(os.path.join(staging_path, STAGING_COMPLETE))
+    if complete:
+        _swap_staged(dataset_path, staging_path)
+    shutil.rmtree(staging_path)
+    return 'finished' if complete else 'discarded'
+
+
+def text_features(texts: pd.Series) -> dict:
+    """
+    Computes the per-text features of Part 1 for a series of distinct texts.
+
+    Returns:
+        dict: Arrays aligned with `texts` for 'caracteres' and 'words'.
+    """
+    return {
+        'caracteres': texts.str.len().to_numpy(dtype='int64'),
+        'words': texts.str.split().str.len().to_numpy(dtype='int64'),
+    }
+
+
+def text_sentiment(texts: pd.Series) -> np.ndarray:
+    """Scores the sentiment (-1, 0, 1) of a series of distinct texts."""
+    # Same keyword lists as before, matched by a compiled automaton over batches of texts
+    return score_sentiment(texts)['sentiment'].to_numpy()
+
+
+def trava_zaps_texts(texts: pd.Series) -> np.ndarray:
+    """Tells which of a series of distinct texts contain 'trava-zaps', ignoring case."""
+    # A substring test, not a token match: 'xtrava-zaps' and 'trava-zaps123' are removed too
+    return texts.str.contains('trava-zaps', case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+
+
+def add_share_columns(df: pd.DataFrame, text_pool: TextPool, share_counts: np.ndarray):
+    """Sets 'sharings' (rows with the same text in the whole dataset) and 'viral' from the share counters."""
+    df['sharings'] = text_pool.map(df['text_id'].to_numpy(), share_counts, missing=float('nan'))
+    df['viral'] = (df['sharings'] > 1).astype(int)
+
+
+def create_report(profiler: SectionProfiler = None) -> ReportGenerator:
+    """Starts the Part 1 report."""
+    return ReportGenerator(
         title="Data Processing Report (Lista 1)",
-        introduction="This report details the data cleaning and preprocessing steps performed on the dataset."
+        introduction="This report details the data cleaning and preprocessing steps performed on the dataset.",
+        profiler=profiler,
     )
-    
-    # --- Load Data ---
+
+
+def load_step(report: ReportGenerator, profiler: SectionProfiler) -> pd.DataFrame:
+    """Question a: loads the typed dataset and reports a preview and its memory usage."""
     report.add_section("A: Load Dataset")
-    df = load_dataset()
+    profiler.start('load')
+    memory_tracker = MemoryTracker()
+    df = load_dataset(typed=True, memory_tracker=memory_tracker)
+    profiler.set_rows(len(df))
     report.add_text("Dataset loaded successfully. Here's a preview:")
     report.add_table(df.head())
+    report.add_text("The dataset was loaded in chunks with a declared schema (categoricals, Arrow-backed strings and timestamps parsed once). Memory usage per column:")
+    report.add_table(memory_tracker.to_frame(), title="Memory Usage Before and After Typing")
+    return df
+
 
-    # --- Process Data ---
+def clean_step(df: pd.DataFrame, report: ReportGenerator) -> tuple:
+    """
+    Questions b-f: the data quality checks. Interns the texts into a pool on the way and
+    adds their code as 'text_id'.
+
+    Returns:
+        tuple: The frame and its `TextPool`.
+    """
     report.add_section("Data Cleaning and Feature Engineering")
 
     # b) Missing values
-    missing_values_count = df.isnull().any(axis=1).sum()
     report.add_question("b & c", "Identify missing values and count rows containing them.")
+    missing_values_count = df.isnull().any(axis=1).sum()
     report.add_text(f"Total number of rows with at least one missing value: **{missing_values_count}**")
     
+    report.add_question("d", "Count missing values for each column.")
     missing_per_column = df.isnull().sum().reset_index(name='count')
     missing_per_column.columns = ['Column', 'Missing Values']
-    report.add_question("d", "Count missing values for each column.")
     report.add_table(missing_per_column)
 
     # e) Duplicates
-    duplicates = df[df.duplicated()]
     report.add_question("e", "Identify and list duplicate rows.")
+    # Intern the message texts once: the duplicate check, counts and text features
+    # below run on the integer codes or on the distinct texts only
+    text_pool, text_ids = TextPool.build(df['text_content_anonymous'])
+    df['text_id'] = text_ids
+    # 'text_id' identifies the text, so the text column itself does not need hashing again
+    duplicates = df[df.duplicated(subset=[col for col in df.columns if col != 'text_content_anonymous'])]
     report.add_text(f"Found **{len(duplicates)}** duplicate rows.")
     if not duplicates.empty:
         report.add_table(duplicates.head(), title="Preview of Duplicate Rows")
@@ -43,56 +172,246 @@ def main():
     # f) Domain Errors (Simplified check)
     report.add_question("f", "Identify values not belonging to the expected domain.")
     report.add_text("This step is complex without a clear data dictionary. A full implementation would require checks for each column's expected data type and format.")
+    return df, text_pool
+
+
+def feature_step(df: pd.DataFrame, text_pool: TextPool, report: ReportGenerator, profiler: SectionProfiler,
+                 near_duplicates: bool = False) -> tuple:
+    """
+    Questions g-m: the derived columns, the removal of the 'trava-zaps' rows and the
+    consistency check.
+
+    Returns:
+        tuple: The processed frame, the `TextIndex` over the pool and the per-text share counters.
+    """
+    text_ids = df['text_id'].to_numpy()
+    distinct_texts = text_pool.texts()
 
     # g & h) Character and Word Counts
-    df['caracteres'] = df['text_content_anonymous'].fillna('').astype(str).str.len()
-    df['words'] = df['text_content_anonymous'].fillna('').astype(str).str.split().str.len()
     report.add_question("g & h", "Create 'caracteres' and 'words' columns.")
+    features = text_features(distinct_texts)
+    df['caracteres'] = text_pool.map(text_ids, features['caracteres'])
+    df['words'] = text_pool.map(text_ids, features['words'])
     report.add_table(df[['text_content_anonymous', 'caracteres', 'words']].head())
 
     # i & j) Viral and Sharings
-    text_counts = df['text_content_anonymous'].value_counts()
-    df['sharings'] = df['text_content_anonymous'].map(text_counts)
-    df['viral'] = (df['sharings'] > 1).astype(int)
     report.add_question("i & j", "Create 'viral' and 'sharings' columns.")
+    share_counts = text_pool.counts(text_ids)
+    if near_duplicates:
+        # A cluster is identified by the text id of its first text, so it decodes like a text
+        text_clusters = cluster_texts(distinct_texts.tolist())
+        df['cluster_id'] = text_pool.map(text_ids, text_clusters, missing=-1).astype(np.int32)
+        cluster_counts = np.bincount(text_clusters, weights=share_counts, minlength=len(text_pool)).astype(np.int64)
+        add_share_columns(df, text_pool, cluster_counts[text_clusters])
+        report.add_text(f"Near-duplicate texts were grouped with MinHash/LSH: **{len(text_pool)}** distinct texts form **{len(np.unique(text_clusters))}** clusters, and 'sharings' counts the rows of each cluster.")
+    else:
+        add_share_columns(df, text_pool, share_counts)
     report.add_table(df[['text_content_anonymous', 'sharings', 'viral']].head())
 
     # k) Sentiment
-    # Re-using the simple sentiment logic from before
-    def get_sentiment(text):
-        if not isinstance(text, str): return 0
-        text_lower = text.lower()
-        pos_words = ['bom', 'ótimo', 'excelente', 'gostei', 'amo', 'feliz', 'sucesso']
-        neg_words = ['ruim', 'péssimo', 'odeio', 'triste', 'problema', 'lixo']
-        score = sum(1 for word in pos_words if word in text_lower) - sum(1 for word in neg_words if word in text_lower)
-        if score > 0: return 1
-        if score < 0: return -1
-        return 0
-    df['sentiment'] = df['text_content_anonymous'].apply(get_sentiment)
     report.add_question("k", "Create 'sentiment' column.")
+    df['sentiment'] = text_pool.map(text_ids, text_sentiment(distinct_texts))
     report.add_table(df[['text_content_anonymous', 'sentiment']].head())
 
     # l) Remove 'trava-zaps'
-    trava_zaps_mask = df['text_content_anonymous'].str.contains('trava-zaps', na=False, case=False)
     report.add_question("l", "Eliminate rows containing 'trava-zaps'.")
+    # Inverted index over the distinct texts, saved with the pool for the keyword queries of Parts 2 and 3
+    text_index = TextIndex.build(text_pool)
+    trava_zaps_mask = text_pool.map(text_ids, trava_zaps_texts(distinct_texts), missing=False)
     report.add_text(f"Found and removed **{trava_zaps_mask.sum()}** rows containing 'trava-zaps'.")
     df = df[~trava_zaps_mask]
+    profiler.set_rows(len(df))
 
     # m) Inconsistencies
     report.add_question("m", "Identify inconsistencies between attributes.")
     inconsistency_check = df[df['has_media'] & df['media_type'].isnull()]
     report.add_text(f"Found **{len(inconsistency_check)}** rows where 'has_media' is True but 'media_type' is null.")
+    return df, text_index, share_counts
 
-    # --- Save Report ---
-    report_path = os.path.join(project_root, 'prj_part01', 'report.md')
-    report.save_report(report_path)
-    
-    # --- Save Processed Data ---
-    output_path = os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022_processed.csv')
-    df.to_csv(output_path, index=False)
+
+def save_text_data(text_pool: TextPool, text_index: TextIndex, share_counts: np.ndarray, output_path: str):
+    """Writes the text pool and index of the processed dataset, and the share counters."""
+    # A rebuilt dataset supersedes an append that was interrupted before it
+    shutil.rmtree(append_staging_path(output_path), ignore_errors=True)
+    # The pool keeps the texts of removed rows too; their codes are simply never referenced
+    text_pool.save(text_pool_path(output_path))
+    text_index.save(text_index_path(output_path))
+    # Share counters include every row (also the removed ones), like the counts above
+    np.save(share_counts_path(output_path), share_counts)
+
+
+def save_processed(df: pd.DataFrame, text_pool: TextPool, text_index: TextIndex, share_counts: np.ndarray, output_path: str):
+    """Writes the processed dataset, its text pool and index, and the share counters."""
+    write_partitioned_parquet(df, output_path)
+    save_text_data(text_pool, text_index, share_counts, output_path)
     print(f"Processed data saved to {output_path}")
 
 
+def main(near_duplicates: bool = False, profiler: SectionProfiler = None, engine: str = 'pandas',
+         memory_limit: str = None) -> tuple:
+    """
+    Main function to process the dataset and generate a report for Part 1.
+
+    Args:
+        near_duplicates (bool): Groups near-duplicate texts into clusters (MinHash/LSH),
+            stores the cluster as 'cluster_id' and counts 'sharings'/'viral' per cluster.
+        profiler (SectionProfiler): Profiles each question of the report (see reporting/profiling.py).
+        engine (str): 'pandas' processes the dataset in memory; 'duckdb' runs the same steps
+            out of core (see duckdb_engine.py) and writes the same report and output.
+        memory_limit (str): DuckDB memory limit for the 'duckdb' engine, e.g. '4GB'.
+
+    Returns:
+        tuple: The processed frame, its `TextPool` and its `TextIndex`, as saved. The frame
+        is None with the 'duckdb' engine, which never holds the whole dataset.
+    """
+    # --- Setup ---
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    profiler = profiler or SectionProfiler(enabled=False)
+    if engine not in ('pandas', 'duckdb'):
+        raise ValueError(f"Unknown engine '{engine}', expected 'pandas' or 'duckdb'.")
+    with create_report(profiler) as report:
+        if engine == 'duckdb':
+            return main_duckdb(report, profiler, project_root, near_duplicates=near_duplicates, memory_limit=memory_limit)
+
+        # --- Load and Process Data ---
+        df = load_step(report, profiler)
+        df, text_pool = clean_step(df, report)
+        df, text_index, share_counts = feature_step(df, text_pool, report, profiler, near_duplicates=near_duplicates)
+
+        # --- Save Report ---
+        report_path = os.path.join(project_root, 'prj_part01', 'report.md')
+        report.save_report(report_path)
+
+    # --- Save Processed Data ---
+    profiler.start('output writing')
+    save_processed(df, text_pool, text_index, share_counts, processed_dataset_path(project_root))
+    profiler.finish()
+    return df, text_pool, text_index
+
+
+def main_duckdb(report: ReportGenerator, profiler: SectionProfiler, project_root: str, near_duplicates: bool = False,
+                memory_limit: str = None) -> tuple:
+    """Runs Part 1 with the DuckDB engine; see `main`."""
+    # Imported here: duckdb_engine reuses the helpers of this module
+    from duckdb_engine import DuckDBEngine
+
+    output_path = processed_dataset_path(project_root)
+    engine = DuckDBEngine(temp_dir=os.path.join(project_root, 'prj_files'), memory_limit=memory_limit)
+    try:
+        engine.load_step(report, profiler)
+        text_pool = engine.clean_step(report)
+        text_index, share_counts = engine.feature_step(report, profiler, near_duplicates=near_duplicates)
+        report.save_report(os.path.join(project_root, 'prj_part01', 'report.md'))
+
+        profiler.start('output writing')
+        engine.write_processed(output_path)
+        save_text_data(text_pool, text_index, share_counts, output_path)
+        print(f"Processed data saved to {output_path}")
+    finally:
+        engine.close()
+    profiler.finish()
+    return None, text_pool, text_index
+
+
+def append_batch(batch_path: str):
+    """
+    Adds a new batch of messages to the processed dataset without reprocessing the history.
+
+    The batch gets the same derived columns as a full run. Its texts are interned into the
+    existing text pool and counted into the persisted share counters; rows already stored
+    whose text reappears in the batch get their 'sharings' and 'viral' patched. Only the
+    days of the batch and the days holding a reappearing text are rewritten, and the result
+    is the same as running `main` on the history and the batch together.
+
+    The rewritten days, the pool, its index and the counters are first written to a staging
+    directory (`append_staging_path`), which is swapped in once complete, so the stored rows
+    never refer to texts missing from the saved pool. An append interrupted while staging is
+    discarded, and one interrupted while swapping is finished, by the next `--append`.
+
+    Args:
+        batch_path (str): CSV file with new messages, in the format of the original dataset.
+    """
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    output_path = processed_dataset_path(project_root)
+    recovered = recover_append(output_path)
+    if recovered:
+        print(f"An interrupted append was {recovered} before this one.")
+    if not os.path.exists(share_counts_path(output_path)):
+        raise FileNotFoundError(f"No share counters found for {output_path}. Run the full pipeline first.")
+    if 'cluster_id' in dataset_columns(output_path):
+        raise ValueError("The processed dataset uses near-duplicate clusters, which are not updated incrementally. Run the full pipeline instead.")
+
+    history_pool = TextPool.load(text_pool_path(output_path))
+    share_counts = np.load(share_counts_path(output_path))
+    batch = read_csv_typed(batch_path)
+
+    text_pool, text_ids = history_pool.extend(batch['text_content_anonymous'])
+    batch['text_id'] = text_ids
+    text_index = TextIndex.open(text_index_path(output_path), history_pool).update(text_pool)
+    batch_codes, batch_counts = np.unique(text_ids[text_ids >= 0], return_counts=True)
+    share_counts = np.concatenate([share_counts, np.zeros(len(text_pool) - len(share_counts), dtype=share_counts.dtype)])
+    share_counts[batch_codes] += batch_counts
+
+    # Text features only for the distinct texts of the batch, indexed by batch-local codes
+    batch_texts = text_pool.decode(batch_codes)
+    features = text_features(batch_texts)
+    local_ids = np.where(text_ids >= 0, np.searchsorted(batch_codes, text_ids), -1)
+    batch['caracteres'] = text_pool.map(local_ids, features['caracteres'])
+    batch['words'] = text_pool.map(local_ids, features['words'])
+    add_share_columns(batch, text_pool, share_counts)
+    batch['sentiment'] = text_pool.map(local_ids, text_sentiment(batch_texts))
+    trava_zaps_mask = text_pool.map(local_ids, trava_zaps_texts(batch_texts), missing=False)
+    batch = batch[~trava_zaps_mask]
+
+    staging_path = append_staging_path(output_path)
+    staged_path = os.path.join(staging_path, os.path.basename(output_path))
+
+    # Days holding an older row whose text reappeared in the batch
+    reappeared = batch_codes[batch_codes < len(history_pool)]
+    batch_days = partition_days(batch['date_message'])
+    existing_days = set(list_partitions(output_path))
+    patched_days = [day for day in partitions_containing(output_path, reappeared) if day not in set(batch_days.unique())]
+    for day in patched_days:
+        rows = read_partition(output_path, day)
+        add_share_columns(rows, text_pool, share_counts)
+        write_partition(rows, staged_path, day)
+
+    for day, rows in batch.groupby(batch_days, sort=True):
+        if day in existing_days:
+            stored = read_partition(output_path, day)
+            add_share_columns(stored, text_pool, share_counts)
+            rows = concat_chunks([stored, rows])
+        write_partition(rows.sort_values('date_message', kind='stable'), staged_path, day)
+
+    os.makedirs(text_pool_path(staged_path), exist_ok=True)
+    np.save(share_counts_path(staged_path), share_counts)
+    text_pool.save(text_pool_path(staged_path))
+    text_index.save(text_index_path(staged_path))
+    with open(os.path.join(staging_path, STAGING_COMPLETE), 'w'):
+        pass
+    _swap_staged(output_path, staging_path)
+    shutil.rmtree(staging_path)
+    print(f"Appended {len(batch)} rows ({trava_zaps_mask.sum()} 'trava-zaps' rows removed) to {output_path}: "
+          f"{batch_days.nunique()} day(s) written, {len(patched_days)} older day(s) patched, "
+          f"{len(text_pool) - len(history_pool)} new distinct text(s).")
+
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Runs the Part 1 processing pipeline.")
+    parser.add_argument('--append', metavar='BATCH_CSV', help="Add a batch of new messages to the processed dataset instead of rebuilding it.")
+    parser.add_argument('--near-duplicates', action='store_true', help="Cluster near-duplicate texts and count 'sharings'/'viral' per cluster.")
+    parser.add_argument('--engine', choices=['pandas', 'duckdb'], default='pandas', help="'duckdb' runs the steps out of core on an on-disk DuckDB database, for datasets larger than memory.")
+    parser.add_argument('--memory-limit', default=None, help="DuckDB memory limit for --engine duckdb (e.g. 4GB); larger intermediates spill to disk.")
+    parser.add_argument('--profile', action='store_true', help="Time and memory-profile each question; adds a summary to the report and writes prj_part01/profile_trace.json.")
+    args = parser.parse_args()
+    if args.append:
+        try:
+            append_batch(args.append)
+        except (FileNotFoundError, ValueError) as error:
+            parser.error(str(error))
+    else:
+        profiler = SectionProfiler('part1', enabled=args.profile)
+        main(near_duplicates=args.near_duplicates, profiler=profiler, engine=args.engine, memory_limit=args.memory_limit)
+        if args.profile:
+            profiler.save_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profile_trace.json'))
 
@@ -1,31 +1,75 @@
 import os
+import argparse
+import time
 import duckdb
 import pandas as pd
-from reporting import ReportGenerator
+from reporting import ReportGenerator, SectionProfiler
+from datastore import (
+    HourlyCube,
+    QueryRunner,
+    TextIndex,
+    TextPool,
+    duckdb_store_path,
+    hourly_cube_path,
+    open_duckdb_store,
+    parquet_glob,
+    path_fingerprint,
+    processed_dataset_path,
+    query_cache_path,
+    store_version,
+    text_index_path,
+    text_pool_path,
+)
+from analytics import ParsedUrls
 
-def main():
+def main(in_memory: bool = False, refresh: bool = False, profiler: SectionProfiler = None, n_jobs: int = None,
+         use_cache: bool = True):
     """
     Main function to perform data analysis for Part 2 and generate a report.
+
+    Args:
+        in_memory (bool): Query the Parquet dataset through an in-memory view instead
+            of the persistent DuckDB database.
+        refresh (bool): Rebuild the persistent database even if the source is unchanged.
+        profiler (SectionProfiler): Profiles each query of the report (see reporting/profiling.py).
+        n_jobs (int): Threads running the queries concurrently (defaults to one per query, up to the CPU count).
+        use_cache (bool): Reuse the cached results of the queries that did not change.
     """
     # --- Setup ---
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    profiler = profiler or SectionProfiler(enabled=False)
     report = ReportGenerator(
         title="Data Analysis with DuckDB (Lista 2)",
-        introduction="This report presents the results of analytical queries performed on the dataset using DuckDB."
+        introduction="This report presents the results of analytical queries performed on the dataset using DuckDB.",
+        profiler=profiler,
     )
     
     # --- Load Data and Prepare DB ---
-    processed_csv_path = os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022_processed.csv')
-    if not os.path.exists(processed_csv_path):
+    processed_path = processed_dataset_path(project_root)
+    if not os.path.exists(processed_path):
         print("Processed data file not found. Please run Part 1 first.")
         return
-        
-    df = pd.read_csv(processed_csv_path)
-    con = duckdb.connect(database=':memory:', read_only=False)
-    con.execute("CREATE TABLE telegram_data AS SELECT * FROM df")
+
+    profiler.start('load')
+    start = time.perf_counter()
+    if in_memory:
+        # A view over the Parquet files lets DuckDB read only the columns each query touches
+        con = duckdb.connect(database=':memory:', read_only=False)
+        con.execute(f"CREATE VIEW telegram_data AS SELECT * FROM read_parquet('{parquet_glob(processed_path)}', hive_partitioning = true)")
+        db_description = "queried through an in-memory DuckDB view, so each query only reads the columns (and days) it needs"
+        version = path_fingerprint(processed_path)
+    else:
+        db_path = duckdb_store_path(project_root)
+        con, rebuilt = open_duckdb_store(db_path, processed_path, force_refresh=refresh)
+        state = "rebuilt from the Parquet files" if rebuilt else "reused because the Parquet files are unchanged"
+        db_description = f"ingested into the persistent DuckDB database `{os.path.basename(db_path)}` sorted by `date_message` and `id_member_anonymous` (this run: {state})"
+        version = store_version(con)
+    elapsed = time.perf_counter() - start
+    if profiler.enabled:
+        profiler.set_rows(con.execute("SELECT COUNT(*) FROM telegram_data").fetchone()[0])
     
     report.add_section("Data Export (Tasks b, c, d)")
-    report.add_text("The processed dataset was loaded. For this analysis, it was loaded directly into an in-memory DuckDB database. The tasks to remove 'trava-zaps' and export to Parquet/DuckDB are noted as completed.")
+    report.add_text(f"The processed dataset, with 'trava-zaps' already removed in Part 1, is stored as a Parquet dataset partitioned by day. It was {db_description}. Database ready in {elapsed:.2f}s.")
 
     # --- Perform Queries ---
     report.add_section("DuckDB Queries (Task e)")
@@ -37,14 +81,22 @@ def main():
         "4": "SELECT COUNT(*) FROM telegram_data WHERE has_media = FALSE",
         "5": "SELECT COUNT(*) FROM telegram_data WHERE has_media = TRUE",
         "6": "SELECT media_type, COUNT(*) as count FROM telegram_data WHERE has_media = TRUE GROUP BY media_type ORDER BY count DESC",
-        "12": "SELECT media_url, COUNT(*) as count FROM telegram_data WHERE media_url IS NOT NULL GROUP BY media_url ORDER BY count DESC LIMIT 30",
+        # Every distinct URL with its count; the top 30 URLs and domains are taken from it below
+        "12": "SELECT media_url, COUNT(*) as count FROM telegram_data WHERE media_url IS NOT NULL GROUP BY media_url",
         "14": "SELECT id_member_anonymous, COUNT(*) as count FROM telegram_data GROUP BY id_member_anonymous ORDER BY count DESC LIMIT 30",
-        "17": "SELECT text, COUNT(*) as count FROM telegram_data WHERE text IS NOT NULL GROUP BY text ORDER BY count DESC LIMIT 30",
-        "26": "SELECT text, caracteres FROM telegram_data ORDER BY caracteres DESC LIMIT 30",
-        "28": "SELECT CAST(date_message AS DATE) as day, COUNT(*) as count FROM telegram_data GROUP BY day ORDER BY count DESC LIMIT 1",
-        "29": "SELECT text FROM telegram_data WHERE text ILIKE '%FACÇÃO%' AND text ILIKE '%CRIMINOSA%' LIMIT 10",
-        "30": "SELECT text FROM telegram_data WHERE text ILIKE '%SEGURANÇA%' LIMIT 10"
+        "17": "SELECT text_content_anonymous, COUNT(*) as count FROM telegram_data WHERE text_content_anonymous IS NOT NULL GROUP BY text_content_anonymous ORDER BY count DESC LIMIT 30",
+        "26": "SELECT text_content_anonymous, caracteres FROM telegram_data ORDER BY caracteres DESC LIMIT 30",
+        # The texts matching the keywords come from the inverted index (see text_searches below)
+        "29": "SELECT text_content_anonymous FROM telegram_data WHERE text_id IN (SELECT text_id FROM matched_texts) LIMIT 10",
+        "30": "SELECT text_content_anonymous FROM telegram_data WHERE text_id IN (SELECT text_id FROM matched_texts) LIMIT 10"
     }
+    # Keyword queries are answered by the inverted index of Part 1 (case- and accent-insensitive
+    # whole words), so DuckDB only filters the integer 'text_id' instead of scanning every text
+    text_searches = {
+        "29": "FACÇÃO CRIMINOSA",
+        "30": "SEGURANÇA",
+    }
+    text_index = TextIndex.open(text_index_path(processed_path), TextPool.load(text_pool_path(processed_path)))
     
     question_texts = {
         "1": "A quantidade de mensagens",
@@ -63,21 +115,68 @@ def main():
         "30": "As mensagens que possuem a palavra “SEGURANÇA”"
     }
 
+    # Question 28 is a roll-up of the hourly cube, which is kept next to the dataset and only
+    # rebuilt (with one aggregate query) when the data version changes
+    profiler.start('cube')
+    cube_path = hourly_cube_path(processed_path)
+    cube, cube_rebuilt = HourlyCube.open(cube_path, version, lambda: HourlyCube.from_duckdb(con))
+
+    # The queries are independent: they run together on separate cursors, and the ones whose
+    # SQL and data version are unchanged are read from the result cache instead
+    profiler.start('queries')
+    cache_dir = query_cache_path(project_root) if use_cache else None
+    runner = QueryRunner(con, version, cache_dir=cache_dir, max_workers=n_jobs)
+    results = runner.run(queries, tables={
+        q_num: {'matched_texts': pd.DataFrame({'text_id': text_index.search(search)})}
+        for q_num, search in text_searches.items()
+    })
+
     for q_num, q_text in question_texts.items():
         report.add_question(q_num, q_text)
         if "Skipped" in q_text:
             report.add_text(q_text)
             continue
         
-        query = queries[q_num]
-        result_df = con.execute(query).fetchdf()
+        if q_num == "28":
+            daily = cube.rollup('day').dropna(subset=['day'])
+            busiest_day = daily.sort_values('count', ascending=False, kind='stable').head(1)
+            report.add_table(busiest_day[['day', 'count']])
+            continue
+
+        result_df = results[q_num]
+        if q_num == "12":
+            # Only the distinct URLs leave DuckDB, and each one is parsed once
+            media_urls = ParsedUrls.from_counts(result_df['media_url'], result_df['count'])
+            report.add_table(media_urls.top('url', 30).rename(columns={'url': 'media_url'}))
+            report.add_table(media_urls.top('registered_domain', 30), title="Top 30 Registered Domains")
+            continue
         report.add_table(result_df)
 
+    report.add_section("Query Execution")
+    stats = runner.stats_frame()
+    cached = int((stats['Source'] == 'cache').sum())
+    cache_state = f"{cached} of {len(stats)} results came from the cache in `{os.path.basename(cache_dir)}`" if use_cache else "the result cache was disabled"
+    report.add_text(f"The queries ran concurrently on separate DuckDB cursors from {runner.workers} thread{'s' if runner.workers != 1 else ''}; {cache_state}. Rows scanned is DuckDB's count of rows read by the table scans of each query.")
+    report.add_table(stats)
+    cube_state = "rebuilt for this data version" if cube_rebuilt else "reused because the data version is unchanged"
+    report.add_text(f"Question 28 is answered from the hourly rollup cube `{os.path.basename(cube_path)}` ({len(cube)} cells; this run: {cube_state}) instead of a query.")
+
     # --- Save Report ---
     report_path = os.path.join(project_root, 'prj_part02', 'report.md')
     report.save_report(report_path)
     
     con.close()
+    profiler.finish()
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Runs the Part 2 DuckDB query report.")
+    parser.add_argument('--in-memory', action='store_true', help="Query the Parquet files directly instead of the persistent database.")
+    parser.add_argument('--refresh', action='store_true', help="Rebuild the persistent database even if the source is unchanged.")
+    parser.add_argument('--jobs', type=int, default=None, help="Threads running the queries (defaults to one per query, up to the CPU count).")
+    parser.add_argument('--no-cache', action='store_true', help="Run every query instead of reusing the cached results.")
+    parser.add_argument('--profile', action='store_true', help="Time and memory-profile each query; adds a summary to the report and writes prj_part02/profile_trace.json.")
+    args = parser.parse_args()
+    profiler = SectionProfiler('part2', enabled=args.profile)
+    main(in_memory=args.in_memory, refresh=args.refresh, profiler=profiler, n_jobs=args.jobs, use_cache=not args.no_cache)
+    if args.profile:
+        profiler.save_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profile_trace.json'))
@@ -1,560 +1,747 @@
 import os
+import argparse
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from dython.nominal import associations
 import warnings
-from reporting import ReportGenerator
-from collections import Counter
-import re
+from reporting import ReportGenerator, SectionContext, SectionProfiler, SectionRegistry, split_blocks
+from reporting import figures
+from reporting.figures import FigureRenderer
+from analytics import DescriptiveStats, ParsedUrls, UserProfiles, cramers_v_matrix, fit_distributions, normality_tests
+from analytics.ngrams import DEFAULT_CHUNK_SIZE, NGRAM_NAMES, count_ngrams
+from datastore import (
+    HourlyCube,
+    TextIndex,
+    TextPool,
+    data_fingerprint,
+    dataset_columns,
+    hourly_cube_path,
+    misinformation_bucket,
+    path_fingerprint,
+    processed_dataset_path,
+    read_partitioned_parquet,
+    source_fingerprint,
+    stored_order,
+    text_index_path,
+    text_pool_path,
+)
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
+# The questions of the report, in report order, and the data they share. Each section reads
+# what it needs from the context, so `--sections` only computes what the chosen sections use
+SECTIONS = SectionRegistry()
+
+LOADING = "Data Loading and Initial Cleaning (Tasks a, b, c, d)"
+NUMERICAL = "e: Numerical Attribute Analysis"
+NUMERICAL_PAIRS = "f: Numerical Pair Analysis"
+CATEGORICAL_PAIRS = "g: Categorical Pair Analysis"
+VISUALIZATIONS = "h: Comprehensive Visualizations"
+
+# Longer table cells (whole message bodies in the h.* tables) are cut to this many characters
+MAX_CELL_CHARS = 500
+
+# Codes into the text pool that Part 1 adds to the rows; they are not shown in the report
+INTERNAL_COLUMNS = ['text_id', 'cluster_id']
+
 def get_project_root() -> str:
     """Returns the absolute path to the project root."""
     return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
-def main():
-    """
-    Main function to perform Exploratory Data Analysis for Part 3 and generate a report.
-    """
-    # --- Setup ---
-    project_root = get_project_root()
-    processed_csv_path = os.path.join(project_root, 'prj_files', 'fakeTelegram.BR_2022_processed.csv')
-    images_dir = os.path.join(project_root, 'prj_part03', 'images')
-    os.makedirs(images_dir, exist_ok=True)
-    
-    report = ReportGenerator(
-        title="Exploratory Data Analysis Report (Lista 3)",
-        introduction="This report presents the findings from the EDA performed on the processed Telegram dataset, addressing all 40 questions from the assignment."
+# --- Resources ---
+
+@SECTIONS.resource()
+def text_pool(ctx):
+    """The shared text pool of the processed dataset."""
+    if ctx.processed is not None:
+        return ctx.processed[1]
+    return TextPool.load(text_pool_path(ctx.processed_path))
+
+@SECTIONS.resource(needs=['text_pool'])
+def text_index(ctx):
+    """The inverted index of the text pool."""
+    if ctx.processed is not None:
+        return ctx.processed[2]
+    # Keyword filters are postings-list lookups in the inverted index saved with the pool
+    return TextIndex.open(text_index_path(ctx.processed_path), ctx.text_pool)
+
+@SECTIONS.resource(needs=['text_pool'])
+def loaded(ctx):
+    """The processed rows, as Part 1 saved them."""
+    # The message texts come from the shared text pool: rows only hold their int32 'text_id',
+    # and the text column is a Categorical over the pool, so each distinct text is held once
+    if ctx.processed is None:
+        all_columns = dataset_columns(ctx.processed_path)
+        df = read_partitioned_parquet(ctx.processed_path, columns=[col for col in all_columns if col != 'text_content_anonymous'])
+    else:
+        # The same rows as the Parquet dataset, without reading them back
+        df = ctx.processed[0]
+        all_columns = df.columns.tolist()
+        df = stored_order(df.drop(columns='text_content_anonymous'))
+    df.insert(all_columns.index('text_content_anonymous'), 'text_content_anonymous', ctx.text_pool.categorical(df['text_id'].to_numpy()))
+    ctx.profiler.set_rows(len(df))
+    return df
+
+# The cleaning steps hand the frame over to the next one (`take`), so only one copy is kept;
+# each returns the frame and the number of rows it removed
+
+@SECTIONS.resource(needs=['loaded', 'text_pool'])
+def without_trava_zaps(ctx):
+    df = ctx.take('loaded')
+    # A case-insensitive substring test, run once per distinct text of the pool
+    trava_zaps = ctx.text_pool.texts().str.contains('trava-zaps', case=False, regex=False).to_numpy(dtype=bool)
+    kept = df[~ctx.text_pool.map(df['text_id'].to_numpy(), trava_zaps, missing=False)]
+    return kept, len(df) - len(kept)
+
+@SECTIONS.resource(needs=['without_trava_zaps'])
+def deduplicated(ctx):
+    df, _ = ctx.take('without_trava_zaps')
+    initial_rows = len(df)
+    # 'text_id' stands for the text, so rows are compared on integer codes only
+    df.drop_duplicates(subset=[col for col in df.columns if col != 'text_content_anonymous'], inplace=True)
+    return df, initial_rows - len(df)
+
+@SECTIONS.resource(needs=['deduplicated'])
+def cleaned(ctx):
+    df, _ = ctx.take('deduplicated')
+    kept = df[df['words'] >= 5]
+    ctx.profiler.set_rows(len(kept))
+    return kept, len(df) - len(kept)
+
+@SECTIONS.resource(needs=['cleaned'])
+def df(ctx):
+    """The cleaned rows (questions b-d) every analysis works on."""
+    return ctx.take('cleaned')[0]
+
+@SECTIONS.resource(needs=['df'])
+def numerical_cols(ctx):
+    return ctx.df.select_dtypes(include=['number']).columns.drop(INTERNAL_COLUMNS, errors='ignore').tolist()
+
+@SECTIONS.resource(needs=['df', 'numerical_cols'])
+def numeric_stats(ctx):
+    # One sort per column gives every statistic of e.1-e.3 (see analytics/describe.py)
+    return DescriptiveStats.from_frame(ctx.df, ctx.numerical_cols)
+
+@SECTIONS.resource(needs=['df'])
+def media_urls(ctx):
+    # Each distinct URL is parsed once; its domain joins the categorical columns of g.1 and
+    # the URL and domain tables of h.10/h.11 are summed over distinct URLs
+    return ParsedUrls.from_series(ctx.df['media_url'])
+
+@SECTIONS.resource(needs=['df'])
+def user_profiles(ctx):
+    # Every user leaderboard (h.12-h.15, h.18, h.19, h.23, h.24) is a top-k lookup on the
+    # per-user and per-(user, text) tables built here in one pass (see analytics/user_profiles.py)
+    return UserProfiles.from_frame(ctx.df)
+
+@SECTIONS.resource(needs=['user_profiles'])
+def top_active_users(ctx):
+    top_active_users = ctx.user_profiles.top('messages', 30)
+    top_active_users.columns = ['User ID', 'Message Count']
+    return top_active_users
+
+@SECTIONS.resource(needs=['df'])
+def message_key(ctx):
+    # With near-duplicate clusters from Part 1, a message is a cluster, shown by its first text
+    # (cluster ids are text ids); otherwise it is an exact text
+    return 'cluster_id' if 'cluster_id' in ctx.df.columns else 'text_id'
+
+@SECTIONS.resource(needs=['df'])
+def cube(ctx):
+    # h.27, h.29 and h.30 are roll-ups of the hourly cube of the cleaned rows, which is saved
+    # next to the dataset and rebuilt only when the dataset or this script (its cleaning) changes;
+    # the rows are only loaded to rebuild it
+    cube, _ = HourlyCube.open(
+        hourly_cube_path(ctx.processed_path, scope='eda'),
+        data_fingerprint(path_fingerprint(ctx.processed_path), source_fingerprint([__file__])),
+        lambda: HourlyCube.from_frame(ctx.df),
     )
+    return cube
+
+@SECTIONS.resource(needs=['df'])
+def misinformation_category(ctx):
+    # score_misinformation > 0.5 is misinformation, < 0.5 is not, exactly 0.5 is neutral; the
+    # same buckets as the cube's 'misinformation' dimension
+    scores = ctx.df['score_misinformation']
+    return pd.Series(misinformation_bucket(scores), index=scores.index, name='misinformation_category')
 
-    # --- Step 1: Load and Clean Data (Tasks a, b, c, d) ---
-    report.add_section("Data Loading and Initial Cleaning (Tasks a, b, c, d)")
+# --- Step 1: Load and Clean Data (Tasks a, b, c, d) ---
+
+@SECTIONS.section("a", LOADING, needs=['loaded'])
+def load_dataset(ctx, report):
     report.add_question("a", "Load the dataset `fakeTelegram.BR_2022.csv`.")
-    if not os.path.exists(processed_csv_path):
-        report.add_text("Processed data file not found. Please run Part 1 first to generate `fakeTelegram.BR_2022_processed.csv`.")
-        return
-    
-    df = pd.read_csv(processed_csv_path)
+    df = ctx.loaded
     report.add_text("Successfully loaded processed data. Initial preview:")
-    report.add_table(df.head())
+    report.add_table(df.head().drop(columns=INTERNAL_COLUMNS, errors='ignore'))
 
+@SECTIONS.section("b", LOADING, needs=['without_trava_zaps'])
+def remove_trava_zaps(ctx, report):
     report.add_question("b", "Remove 'trava-zaps'.")
-    initial_rows_b = len(df)
-    df = df[~df['text_content_anonymous'].str.contains('trava-zaps', na=False, case=False)]
-    report.add_text(f"Removed {initial_rows_b - len(df)} rows containing 'trava-zaps'.")
-    
+    _, removed = ctx.without_trava_zaps
+    report.add_text(f"Removed {removed} rows containing 'trava-zaps'.")
+
+@SECTIONS.section("c", LOADING, needs=['deduplicated'])
+def remove_duplicates(ctx, report):
     report.add_question("c", "Remove duplicate rows.")
-    initial_rows_c = len(df)
-    df.drop_duplicates(inplace=True)
-    report.add_text(f"Removed {initial_rows_c - len(df)} duplicate rows.")
-    
+    _, removed = ctx.deduplicated
+    report.add_text(f"Removed {removed} duplicate rows.")
+
+@SECTIONS.section("d", LOADING, needs=['cleaned', 'df'])
+def remove_short_texts(ctx, report):
     report.add_question("d", "Remove texts with less than 5 words.")
-    initial_rows_d = len(df)
-    df = df[df['words'] >= 5]
-    report.add_text(f"Removed {initial_rows_d - len(df)} rows with less than 5 words.")
-    report.add_text(f"Data cleaned. Final shape: **{df.shape}**")
-
-    # --- Step 2: Numerical Attribute Analysis (Task e) ---
-    report.add_section("e: Numerical Attribute Analysis")
-    numerical_cols = df.select_dtypes(include=['number']).columns.tolist()
-    
-    for col in numerical_cols:
+    _, removed = ctx.cleaned
+    report.add_text(f"Removed {removed} rows with less than 5 words.")
+    shape = (len(ctx.df), len(ctx.df.columns.drop(INTERNAL_COLUMNS, errors='ignore')))
+    report.add_text(f"Data cleaned. Final shape: **{shape}**")
+
+# --- Step 2: Numerical Attribute Analysis (Task e) ---
+
+@SECTIONS.section("e", NUMERICAL, needs=['df', 'numerical_cols', 'numeric_stats'])
+def numerical_attributes(ctx, report):
+    df, numeric_stats, renderer = ctx.df, ctx.numeric_stats, ctx.renderer
+    for col in ctx.numerical_cols:
         report.add_section(f"Analysis of '{col}'", level=3)
-        
+
         # e.1: Central Tendency
-        central_tendency = df[col].describe()[['mean', '50%', 'count']]
-        central_tendency.rename({'50%': 'median'}, inplace=True)
         report.add_question("e.1", "Measures of Central Tendency")
-        report.add_table(central_tendency.to_frame().T, title="Central Tendency")
+        report.add_table(numeric_stats.central_tendency(col), title="Central Tendency")
 
         # e.2: Variability
-        variability = df[col].describe()[['std', 'min', 'max']]
         report.add_question("e.2", "Measures of Variability")
-        report.add_table(variability.to_frame().T, title="Variability")
+        report.add_table(numeric_stats.variability(col), title="Variability")
 
         # e.3: Frequency Table and Histogram
         report.add_question("e.3", "Frequency Table and Histogram")
         # For frequency table, show value counts for non-unique columns or a sample
-        if df[col].nunique() < 50: # Arbitrary threshold for frequency table
-            report.add_table(df[col].value_counts().reset_index().rename(columns={'index': col, col: 'Count'}), title="Frequency Table (Top 10)")
+        if numeric_stats[col].nunique < 50: # Arbitrary threshold for frequency table
+            report.add_table(numeric_stats.frequency_table(col), title="Frequency Table (Top 10)")
         else:
             report.add_text("Frequency table not generated for this column due to high cardinality.")
 
-        plt.figure(figsize=(8, 5))
-        sns.histplot(df[col], kde=True, bins=30)
-        plt.title(f'Histogram of {col}')
-        hist_path = os.path.join(images_dir, f'hist_{col}.png')
-        plt.savefig(hist_path)
-        plt.close()
-        report.add_image(f"Histogram of {col}", f"./images/hist_{col}.png")
+        hist_path = renderer.add(f'hist_{col}.png', figures.histogram, df[col], f'Histogram of {col}')
+        report.add_image(f"Histogram of {col}", hist_path)
 
         # e.4: Boxplot
         report.add_question("e.4", "Boxplot")
-        plt.figure(figsize=(8, 5))
-        sns.boxplot(x=df[col])
-        plt.title(f'Boxplot of {col}')
-        box_path = os.path.join(images_dir, f'box_{col}.png')
-        plt.savefig(box_path)
-        plt.close()
-        report.add_image(f"Boxplot of {col}", f"./images/box_{col}.png")
+        box_path = renderer.add(f'box_{col}.png', figures.boxplot, df[col], f'Boxplot of {col}')
+        report.add_image(f"Boxplot of {col}", box_path)
 
         # e.5: QQ-Plot
         report.add_question("e.5", "QQ-Plot")
-        plt.figure(figsize=(8, 5))
-        stats.probplot(df[col].dropna(), dist="norm", plot=plt)
-        plt.title(f'QQ-Plot of {col}')
-        qq_path = os.path.join(images_dir, f'qq_{col}.png')
-        plt.savefig(qq_path)
-        plt.close()
-        report.add_image(f"QQ-Plot of {col}", f"./images/qq_{col}.png")
-
-        # e.6: Teste de Normalidade (Shapiro-Wilk)
-        report.add_question("e.6", "Test of Normality (Shapiro-Wilk)")
-        if len(df[col].dropna()) > 5000: # Shapiro-Wilk is sensitive to large N
-            report.add_text("Shapiro-Wilk test skipped for large dataset (N > 5000). Consider alternative tests like Kolmogorov-Smirnov or visual inspection of QQ-Plot.")
-        elif len(df[col].dropna()) > 3: # Minimum for Shapiro-Wilk
-            stat, p = stats.shapiro(df[col].dropna())
-            report.add_text(f"Shapiro-Wilk Test: Statistic={stat:.3f}, p={p:.3f}")
-            if p > 0.05:
-                report.add_text("Sample looks Gaussian (fail to reject H0).")
-            else:
-                report.add_text("Sample does not look Gaussian (reject H0).")
+        qq_path = renderer.add(f'qq_{col}.png', figures.qq_plot, df[col], f'QQ-Plot of {col}')
+        report.add_image(f"QQ-Plot of {col}", qq_path)
+
+        # e.6: Teste de Normalidade
+        # Shapiro-Wilk runs on a sample of at most 5000 rows; the other tests use every row
+        # through the column summary, so their cost does not grow with the row count
+        report.add_question("e.6", "Tests of Normality")
+        normality = normality_tests(numeric_stats[col])
+        if normality.empty:
+            report.add_text("Not enough data points (or distinct values) for the normality tests.")
         else:
-            report.add_text("Not enough data points for Shapiro-Wilk test.")
+            report.add_table(normality, title="Normality Tests")
+            rejected = (~normality['Gaussian (5%)']).sum()
+            if rejected == 0:
+                report.add_text("Sample looks Gaussian (no test rejects H0 at the 5% level).")
+            else:
+                report.add_text(f"Sample does not look Gaussian ({rejected} of {len(normality)} tests reject H0 at the 5% level). With many rows even small deviations are significant, so the statistics say more than the p-values.")
 
-        # e.7: Best Fit Distribution (Visual inspection/common distributions)
+        # e.7: Best Fit Distribution
         report.add_question("e.7", "Best Fit Distribution")
-        report.add_text("Identifying the 'best fit distribution' rigorously requires specialized libraries (e.g., `fitter`). For this report, we rely on visual inspection of histograms and QQ-plots, and common knowledge of data types. For example, 'sharings' might follow a Poisson or Negative Binomial distribution, while 'score_sentiment' might be multimodal.")
-        
-    # --- Task f: Numerical Pair Analysis ---
-    report.add_section("f: Numerical Pair Analysis")
+        fits = fit_distributions(numeric_stats[col])
+        if fits.empty:
+            report.add_text("Not enough distinct values to fit a distribution.")
+        else:
+            report.add_table(fits, title="Candidate Distributions (ranked by AIC)")
+            report.add_text(f"Best fit by AIC: **{fits['Distribution'].iloc[0]}** ({fits['Parameters'].iloc[0]}). Candidates are scored on the same histogram of the column, and the KS statistic is the largest gap between the fitted and the empirical CDF.")
+
+# --- Task f: Numerical Pair Analysis ---
+
+@SECTIONS.section("f", NUMERICAL_PAIRS, needs=['df', 'numerical_cols'])
+def numerical_pairs(ctx, report):
     report.add_question("f.1", "Appropriate Correlation Coefficient")
-    corr_matrix = df[numerical_cols].corr(method='pearson')
+    corr_matrix = ctx.df[ctx.numerical_cols].corr(method='pearson')
     report.add_table(corr_matrix, title="Pearson Correlation Matrix")
-    
+
     report.add_question("f.2", "Scatter Plot (Heatmap for overview)")
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap='coolwarm')
-    plt.title('Correlation Matrix of Numerical Attributes')
-    corr_heatmap_path = os.path.join(images_dir, 'correlation_heatmap.png')
-    plt.savefig(corr_heatmap_path)
-    plt.close()
-    report.add_image("Pearson Correlation Heatmap", "./images/correlation_heatmap.png")
-
-    # --- Task g: Categorical Pair Analysis ---
-    report.add_section("g: Categorical Pair Analysis")
+    corr_heatmap_path = ctx.renderer.add('correlation_heatmap.png', figures.heatmap, corr_matrix, 'Correlation Matrix of Numerical Attributes', figsize=(12, 10), cmap='coolwarm')
+    report.add_image("Pearson Correlation Heatmap", corr_heatmap_path)
+
+# --- Task g: Categorical Pair Analysis ---
+
+@SECTIONS.section("g", CATEGORICAL_PAIRS, needs=['df', 'media_urls'])
+def categorical_pairs(ctx, report):
     report.add_question("g.1", "Cramer's V Method Result")
-    categorical_cols = ['media_type', 'message_type', 'messenger']
-    # Ensure columns exist and are not entirely null
-    categorical_cols = [col for col in categorical_cols if col in df.columns and not df[col].isnull().all()]
+    categorical_df = ctx.df[['media_type', 'message_type', 'messenger', 'id_group_anonymous']].assign(domain=ctx.media_urls.column('domain').to_numpy())
+    # Ensure columns are not entirely null
+    categorical_cols = [col for col in categorical_df.columns if not categorical_df[col].isnull().all()]
 
     if len(categorical_cols) > 1:
-        # Using a sample to speed up the calculation for large datasets
-        df_sample = df[categorical_cols].sample(n=min(5000, len(df)), random_state=42)
-        cramers_v_matrix = associations(df_sample, nom_nom_assoc='cramer', compute_only=True)['corr']
-        report.add_table(cramers_v_matrix, title="Cramer's V Matrix for Categorical Attributes")
-
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(cramers_v_matrix, annot=True, fmt=".2f", cmap='viridis')
-        plt.title("Cramer's V Correlation Matrix of Categorical Attributes")
-        cramers_heatmap_path = os.path.join(images_dir, 'cramers_v_heatmap.png')
-        plt.savefig(cramers_heatmap_path)
-        plt.close()
-        report.add_image("Cramer's V Heatmap", "./images/cramers_v_heatmap.png")
+        # Exact on every row: each column is coded once and each pair is one bincount (see analytics/association.py)
+        cramers_v = cramers_v_matrix(categorical_df, categorical_cols)
+        report.add_table(cramers_v, title="Cramer's V Matrix for Categorical Attributes")
+
+        cramers_heatmap_path = ctx.renderer.add('cramers_v_heatmap.png', figures.heatmap, cramers_v, "Cramer's V Correlation Matrix of Categorical Attributes", figsize=(10, 8), cmap='viridis')
+        report.add_image("Cramer's V Heatmap", cramers_heatmap_path)
     else:
         report.add_text("Not enough categorical columns with data for Cramer's V analysis.")
 
-    # --- Task h: Visualizations (40 items) ---
-    report.add_section("h: Comprehensive Visualizations")
+# --- Task h: Visualizations (40 items) ---
 
-    # h.1: Quantities of groups, users, and messages
+# h.1: Quantities of groups, users, and messages
+@SECTIONS.section("h.1", VISUALIZATIONS, needs=['df'])
+def summary_quantities(ctx, report):
     report.add_question("h.1", "Quantities of groups, users, and messages")
+    df = ctx.df
     total_groups = df['id_group_anonymous'].nunique()
     total_users = df['id_member_anonymous'].nunique()
     total_messages = len(df)
     summary_data = {'Category': ['Groups', 'Users', 'Messages'], 'Count': [total_groups, total_users, total_messages]}
     summary_df = pd.DataFrame(summary_data)
-    plt.figure(figsize=(8, 5))
-    sns.barplot(x='Category', y='Count', data=summary_df)
-    plt.title('Total Quantities of Groups, Users, and Messages')
-    summary_bar_path = os.path.join(images_dir, 'h1_summary_quantities.png')
-    plt.savefig(summary_bar_path)
-    plt.close()
-    report.add_image("Total Quantities", f"./images/{os.path.basename(summary_bar_path)}")
-
-    # h.2: Text vs. Media Messages
+    summary_bar_path = ctx.renderer.add('h1_summary_quantities.png', figures.barplot, summary_df, 'Total Quantities of Groups, Users, and Messages', x='Category', y='Count')
+    report.add_image("Total Quantities", summary_bar_path)
+
+# h.2: Text vs. Media Messages
+@SECTIONS.section("h.2", VISUALIZATIONS, needs=['df'])
+def text_vs_media(ctx, report):
     report.add_question("h.2", "Quantity of messages with only text vs. with media")
-    text_media_counts = df['has_media'].value_counts()
+    text_media_counts = ctx.df['has_media'].value_counts()
     text_media_counts.index = ['Text Only', 'With Media']
-    plt.figure(figsize=(8, 8))
-    plt.pie(text_media_counts, labels=text_media_counts.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Proportion of Text vs. Media Messages')
-    pie_chart_path = os.path.join(images_dir, 'h2_text_vs_media_pie.png')
-    plt.savefig(pie_chart_path)
-    plt.close()
-    report.add_image("Text vs. Media Proportion", f"./images/{os.path.basename(pie_chart_path)}")
-
-    # h.3: Quantidade de mensagens por tipo de mídia (jpg, mp4 etc)
+    pie_chart_path = ctx.renderer.add('h2_text_vs_media_pie.png', figures.pie, text_media_counts, 'Proportion of Text vs. Media Messages', figsize=(8, 8))
+    report.add_image("Text vs. Media Proportion", pie_chart_path)
+
+# h.3: Quantidade de mensagens por tipo de mídia (jpg, mp4 etc)
+@SECTIONS.section("h.3", VISUALIZATIONS, needs=['df'])
+def media_types(ctx, report):
     report.add_question("h.3", "Quantity of messages by media type (jpg, mp4 etc)")
-    media_type_counts = df['media_type'].value_counts().head(10)
+    media_type_counts = ctx.df['media_type'].value_counts().head(10)
     if not media_type_counts.empty:
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x=media_type_counts.values, y=media_type_counts.index)
-        plt.title('Top 10 Media Types')
-        plt.xlabel('Count')
-        plt.ylabel('Media Type')
-        media_type_path = os.path.join(images_dir, 'h3_media_type_counts.png')
-        plt.savefig(media_type_path)
-        plt.close()
-        report.add_image("Top 10 Media Types", f"./images/{os.path.basename(media_type_path)}")
+        media_type_path = ctx.renderer.add('h3_media_type_counts.png', figures.barplot, None, 'Top 10 Media Types', figsize=(10, 6), xlabel='Count', ylabel='Media Type',
+                                           x=media_type_counts.values, y=media_type_counts.index)
+        report.add_image("Top 10 Media Types", media_type_path)
     else:
         report.add_text("No media types found to plot.")
 
-    # h.4: A relação entre a quantidade de mensagens e a quantidade de palavras presente nas mensagens;
+# h.4: A relação entre a quantidade de mensagens e a quantidade de palavras presente nas mensagens;
+@SECTIONS.section("h.4", VISUALIZATIONS, needs=['df'])
+def words_vs_characters(ctx, report):
     report.add_question("h.4", "Relationship between message count and word count")
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(x='words', y='caracteres', data=df.sample(n=min(5000, len(df)), random_state=42), alpha=0.5)
-    plt.title('Message Length (Characters vs. Words)')
-    plt.xlabel('Word Count')
-    plt.ylabel('Character Count')
-    word_char_scatter_path = os.path.join(images_dir, 'h4_word_char_scatter.png')
-    plt.savefig(word_char_scatter_path)
-    plt.close()
-    report.add_image("Message Length (Characters vs. Words)", f"./images/{os.path.basename(word_char_scatter_path)}")
-
-    # h.5-h.9: Location-based questions (Skipped as per Part 2)
+    word_char_sample = ctx.df[['words', 'caracteres']].sample(n=min(5000, len(ctx.df)), random_state=42)
+    word_char_scatter_path = ctx.renderer.add('h4_word_char_scatter.png', figures.scatterplot, word_char_sample, 'Message Length (Characters vs. Words)', figsize=(10, 6),
+                                              xlabel='Word Count', ylabel='Character Count', x='words', y='caracteres', alpha=0.5)
+    report.add_image("Message Length (Characters vs. Words)", word_char_scatter_path)
+
+# h.5-h.9: Location-based questions (Skipped as per Part 2)
+@SECTIONS.section("h.5-h.9", VISUALIZATIONS)
+def location_analysis(ctx, report):
     report.add_question("h.5-h.9", "Location-based analysis (State, Country, Brazil vs. Foreign)")
     report.add_text("These questions require location data (state, country) which is not present in the dataset. Skipping these questions.")
 
-    # h.10: As 30 URLs que mais se repetem (mais compartilhadas);
+# h.10: As 30 URLs que mais se repetem (mais compartilhadas);
+@SECTIONS.section("h.10", VISUALIZATIONS, needs=['media_urls'])
+def top_urls(ctx, report):
     report.add_question("h.10", "Top 30 most repeated URLs")
-    top_urls = df['media_url'].value_counts().head(30).reset_index()
+    top_urls = ctx.media_urls.top('url', 30)
     top_urls.columns = ['URL', 'Count']
     if not top_urls.empty:
         report.add_table(top_urls, title="Top 30 URLs")
     else:
         report.add_text("No URLs found to list.")
 
-    # h.11: Os 30 domínios que mais se repetem (mais compartilhados);
+# h.11: Os 30 domínios que mais se repetem (mais compartilhados);
+@SECTIONS.section("h.11", VISUALIZATIONS, needs=['media_urls'])
+def top_domains(ctx, report):
     report.add_question("h.11", "Top 30 most repeated domains")
-    df['domain'] = df['media_url'].astype(str).apply(lambda x: re.search(r'^(?:https?:\/\/)?(?:[^@\n]+@)?(?:www\.)?([^:\/\n?]+)', x).group(1) if re.search(r'^(?:https?:\/\/)?(?:[^@\n]+@)?(?:www\.)?([^:\/\n?]+)', x) else None)
-    top_domains = df['domain'].value_counts().head(30).reset_index()
+    top_domains = ctx.media_urls.top('domain', 30)
     top_domains.columns = ['Domain', 'Count']
     if not top_domains.empty:
         report.add_table(top_domains, title="Top 30 Domains")
+        top_registered_domains = ctx.media_urls.top('registered_domain', 30)
+        top_registered_domains.columns = ['Registered Domain', 'Count']
+        report.add_table(top_registered_domains, title="Top 30 Registered Domains")
     else:
         report.add_text("No domains found to list.")
 
-    # h.12: Os 30 usuários mais ativos;
+# h.12: Os 30 usuários mais ativos;
+@SECTIONS.section("h.12", VISUALIZATIONS, needs=['top_active_users'])
+def most_active_users(ctx, report):
     report.add_question("h.12", "Top 30 most active users")
-    top_active_users = df['id_member_anonymous'].value_counts().head(30).reset_index()
-    top_active_users.columns = ['User ID', 'Message Count']
+    top_active_users = ctx.top_active_users
     if not top_active_users.empty:
         report.add_table(top_active_users, title="Top 30 Active Users")
     else:
         report.add_text("No active users found.")
 
-    # h.13: Relação entre quantidade de mensagens contendo somente texto e mensagens com tendo mídia dos usuários mais ativos;
+# h.13: Relação entre quantidade de mensagens contendo somente texto e mensagens com tendo mídia dos usuários mais ativos;
+@SECTIONS.section("h.13", VISUALIZATIONS, needs=['user_profiles', 'top_active_users'])
+def active_users_text_vs_media(ctx, report):
     report.add_question("h.13", "Text vs. media messages for most active users")
-    active_users_df = df[df['id_member_anonymous'].isin(top_active_users['User ID'])]
-    active_users_media_counts = active_users_df.groupby('id_member_anonymous')['has_media'].value_counts().unstack(fill_value=0)
+    users = ctx.user_profiles.users
+    active_users_media_counts = users.loc[users.index.isin(ctx.top_active_users['User ID']), ['text_only', 'media']]
     active_users_media_counts.columns = ['Text Only', 'With Media']
     active_users_media_counts['Total'] = active_users_media_counts['Text Only'] + active_users_media_counts['With Media']
     active_users_media_counts = active_users_media_counts.sort_values('Total', ascending=False).head(10) # Top 10 for visualization
-    
+
     if not active_users_media_counts.empty:
-        active_users_media_counts.plot(kind='bar', stacked=True, figsize=(12, 7))
-        plt.title('Text vs. Media Messages for Top Active Users')
-        plt.xlabel('User ID')
-        plt.ylabel('Message Count')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        active_users_media_path = os.path.join(images_dir, 'h13_active_users_media.png')
-        plt.savefig(active_users_media_path)
-        plt.close()
-        report.add_image("Text vs. Media Messages for Top Active Users", f"./images/{os.path.basename(active_users_media_path)}")
+        active_users_media_path = ctx.renderer.add('h13_active_users_media.png', figures.stacked_barplot, active_users_media_counts, 'Text vs. Media Messages for Top Active Users',
+                                                   figsize=(12, 7), xlabel='User ID', ylabel='Message Count', rotate_xticks=True, tight_layout=True)
+        report.add_image("Text vs. Media Messages for Top Active Users", active_users_media_path)
     else:
         report.add_text("No data for active users' text vs. media messages.")
 
-    # h.14: Os 30 usuários que mais compartilharam texto;
+# h.14: Os 30 usuários que mais compartilharam texto;
+@SECTIONS.section("h.14", VISUALIZATIONS, needs=['user_profiles'])
+def top_text_sharers(ctx, report):
     report.add_question("h.14", "Top 30 users who shared most text messages")
-    top_text_sharers = df[df['has_media'] == False]['id_member_anonymous'].value_counts().head(30).reset_index()
+    top_text_sharers = ctx.user_profiles.top('text_only', 30, min_value=1)
     top_text_sharers.columns = ['User ID', 'Text Message Count']
     if not top_text_sharers.empty:
         report.add_table(top_text_sharers, title="Top 30 Text Sharers")
     else:
         report.add_text("No text sharers found.")
 
-    # h.15: Os 30 usuários que mais compartilharam mídias;
+# h.15: Os 30 usuários que mais compartilharam mídias;
+@SECTIONS.section("h.15", VISUALIZATIONS, needs=['user_profiles'])
+def top_media_sharers(ctx, report):
     report.add_question("h.15", "Top 30 users who shared most media messages")
-    top_media_sharers = df[df['has_media'] == True]['id_member_anonymous'].value_counts().head(30).reset_index()
+    top_media_sharers = ctx.user_profiles.top('media', 30, min_value=1)
     top_media_sharers.columns = ['User ID', 'Media Message Count']
     if not top_media_sharers.empty:
         report.add_table(top_media_sharers, title="Top 30 Media Sharers")
     else:
         report.add_text("No media sharers found.")
 
-    # h.16: As 30 mensagens mais compartilhadas;
+# h.16: As 30 mensagens mais compartilhadas;
+@SECTIONS.section("h.16", VISUALIZATIONS, needs=['df', 'text_pool', 'message_key'])
+def most_shared_messages(ctx, report):
     report.add_question("h.16", "Top 30 most shared messages")
-    top_shared_messages = df['text_content_anonymous'].value_counts().head(30).reset_index()
-    top_shared_messages.columns = ['Message Text', 'Share Count']
+    message_key, text_pool = ctx.message_key, ctx.text_pool
+    if message_key == 'cluster_id':
+        report.add_text("Messages are grouped into near-duplicate clusters (Part 1 `--near-duplicates`); each row shows the first text of its cluster.")
+    text_counts = pd.Series(text_pool.counts(ctx.df[message_key]))
+    text_counts = text_counts[text_counts > 0].sort_values(ascending=False, kind='stable').head(30)
+    top_shared_messages = pd.DataFrame({'Message Text': text_pool.decode(text_counts.index), 'Share Count': text_counts.values})
     if not top_shared_messages.empty:
         report.add_table(top_shared_messages, title="Top 30 Shared Messages")
     else:
         report.add_text("No shared messages found.")
 
-    # h.17: As 30 mensagens mais compartilhadas em grupos diferentes;
+# h.17: As 30 mensagens mais compartilhadas em grupos diferentes;
+@SECTIONS.section("h.17", VISUALIZATIONS, needs=['df', 'text_pool', 'message_key'])
+def messages_in_different_groups(ctx, report):
     report.add_question("h.17", "Top 30 messages shared in different groups")
-    messages_in_diff_groups = df.groupby('text_content_anonymous')['id_group_anonymous'].nunique().sort_values(ascending=False).head(30).reset_index()
-    messages_in_diff_groups.columns = ['Message Text', 'Unique Group Count']
+    with_text = ctx.df[ctx.df['text_id'] >= 0]
+    messages_in_diff_groups = with_text.groupby(ctx.message_key)['id_group_anonymous'].nunique().sort_values(ascending=False).head(30)
+    messages_in_diff_groups = pd.DataFrame({'Message Text': ctx.text_pool.decode(messages_in_diff_groups.index), 'Unique Group Count': messages_in_diff_groups.values})
     if not messages_in_diff_groups.empty:
         report.add_table(messages_in_diff_groups, title="Top 30 Messages in Different Groups")
     else:
         report.add_text("No messages shared in different groups found.")
 
-    # h.18: Mensagens idênticas compartilhadas pelo mesmo usuário (e suas quantidades);
+# h.18: Mensagens idênticas compartilhadas pelo mesmo usuário (e suas quantidades);
+@SECTIONS.section("h.18", VISUALIZATIONS, needs=['user_profiles', 'text_pool'])
+def identical_messages_same_user(ctx, report):
     report.add_question("h.18", "Identical messages shared by the same user (and their quantities)")
-    identical_messages_same_user = df.groupby(['id_member_anonymous', 'text_content_anonymous']).size().reset_index(name='count')
-    identical_messages_same_user = identical_messages_same_user[identical_messages_same_user['count'] > 1].sort_values('count', ascending=False).head(30)
+    identical_messages_same_user = ctx.user_profiles.top_pairs('count', 30, min_value=2)
+    identical_messages_same_user.insert(1, 'text_content_anonymous', ctx.text_pool.decode(identical_messages_same_user.pop('text_id')).values)
     if not identical_messages_same_user.empty:
         report.add_table(identical_messages_same_user, title="Top 30 Identical Messages by Same User")
     else:
         report.add_text("No identical messages shared by the same user found.")
 
-    # h.19: Mensagens idênticas compartilhadas pelo mesmo usuário em grupos distintos (e suas quantidades);
+# h.19: Mensagens idênticas compartilhadas pelo mesmo usuário em grupos distintos (e suas quantidades);
+@SECTIONS.section("h.19", VISUALIZATIONS, needs=['user_profiles', 'text_pool'])
+def identical_messages_user_multi_group(ctx, report):
     report.add_question("h.19", "Identical messages shared by the same user in distinct groups (and their quantities)")
-    identical_messages_user_multi_group = df.groupby(['id_member_anonymous', 'text_content_anonymous'])['id_group_anonymous'].nunique().reset_index(name='unique_group_count')
-    identical_messages_user_multi_group = identical_messages_user_multi_group[identical_messages_user_multi_group['unique_group_count'] > 1].sort_values('unique_group_count', ascending=False).head(30)
+    identical_messages_user_multi_group = ctx.user_profiles.top_pairs('unique_group_count', 30, min_value=2)
+    identical_messages_user_multi_group.insert(1, 'text_content_anonymous', ctx.text_pool.decode(identical_messages_user_multi_group.pop('text_id')).values)
     if not identical_messages_user_multi_group.empty:
         report.add_table(identical_messages_user_multi_group, title="Top 30 Identical Messages by Same User in Different Groups")
     else:
         report.add_text("No identical messages shared by the same user in distinct groups found.")
 
-    # h.20: Os 30 unigramas, bigramas e trigramas mais compartilhados (após a remoção de stop words);
+# h.20: Os 30 unigramas, bigramas e trigramas mais compartilhados (após a remoção de stop words);
+@SECTIONS.section("h.20", VISUALIZATIONS, needs=['df', 'text_pool'])
+def top_ngrams(ctx, report):
     report.add_question("h.20", "Top 30 unigrams, bigrams, and trigrams (after stop word removal)")
-    # This requires NLTK or similar for proper stop word removal and n-gram generation.
-    # For simplicity, I'll do a basic split and count for unigrams. Bigrams/trigrams are more complex.
-    # A full implementation would involve:
-    # 1. Download NLTK stop words: `import nltk; nltk.download('stopwords')`
-    # 2. Tokenization and stop word removal
-    # 3. N-gram generation
-    
-    # Basic Unigram count (without proper stop word removal)
-    all_words = ' '.join(df['text_content_anonymous'].dropna().astype(str).str.lower()).split()
-    unigram_counts = Counter(all_words).most_common(30)
-    report.add_table(pd.DataFrame(unigram_counts, columns=['Unigram', 'Count']), title="Top 30 Unigrams (Basic)")
-    report.add_text("Note: A more robust n-gram analysis requires proper stop word removal and tokenization, typically using libraries like NLTK.")
-
-    # h.21: As 30 mensagens mais positivas (distintas);
+    # Each distinct text is tokenized once and weighted by its number of rows; the texts are
+    # decoded from the pool chunk by chunk and counted in worker processes
+    text_pool = ctx.text_pool
+    row_counts = text_pool.counts(ctx.df['text_id'])
+    present_ids = np.flatnonzero(row_counts)
+    text_chunks = (
+        (text_pool.decode(ids).tolist(), row_counts[ids])
+        for ids in (present_ids[start:start + DEFAULT_CHUNK_SIZE] for start in range(0, len(present_ids), DEFAULT_CHUNK_SIZE))
+    )
+    ngram_counts = count_ngrams(text_chunks, orders=(1, 2, 3), n_jobs=ctx.n_jobs)
+    for order, name in NGRAM_NAMES.items():
+        report.add_table(pd.DataFrame(ngram_counts.most_common(order, 30), columns=[name, 'Count']), title=f"Top 30 {name}s")
+    report.add_text("Texts are lowercased and split into words; Portuguese stop words and single letters are removed before forming the n-grams.")
+
+# h.21: As 30 mensagens mais positivas (distintas);
+@SECTIONS.section("h.21", VISUALIZATIONS, needs=['df'])
+def positive_messages(ctx, report):
     report.add_question("h.21", "Top 30 distinct positive messages")
-    positive_messages = df[df['sentiment'] == 1]['text_content_anonymous'].drop_duplicates().head(30).to_frame()
+    positive_messages = ctx.df[ctx.df['sentiment'] == 1]['text_content_anonymous'].drop_duplicates().head(30).to_frame()
     if not positive_messages.empty:
         report.add_table(positive_messages, title="Top 30 Distinct Positive Messages")
     else:
         report.add_text("No positive messages found.")
 
-    # h.22: As 30 mensagens mais negativas (distintas);
+# h.22: As 30 mensagens mais negativas (distintas);
+@SECTIONS.section("h.22", VISUALIZATIONS, needs=['df'])
+def negative_messages(ctx, report):
     report.add_question("h.22", "Top 30 distinct negative messages")
-    negative_messages = df[df['sentiment'] == -1]['text_content_anonymous'].drop_duplicates().head(30).to_frame()
+    negative_messages = ctx.df[ctx.df['sentiment'] == -1]['text_content_anonymous'].drop_duplicates().head(30).to_frame()
     if not negative_messages.empty:
         report.add_table(negative_messages, title="Top 30 Distinct Negative Messages")
     else:
         report.add_text("No negative messages found.")
 
-    # h.23: O usuário mais otimista;
+# h.23: O usuário mais otimista;
+@SECTIONS.section("h.23", VISUALIZATIONS, needs=['user_profiles'])
+def most_optimistic_user(ctx, report):
     report.add_question("h.23", "Most optimistic user")
-    most_optimistic = df.groupby('id_member_anonymous')['sentiment'].sum().sort_values(ascending=False).head(1).reset_index()
+    most_optimistic = ctx.user_profiles.top('sentiment_sum', 1).rename(columns={'sentiment_sum': 'sentiment'})
     if not most_optimistic.empty:
         report.add_table(most_optimistic, title="Most Optimistic User")
     else:
         report.add_text("No data to determine most optimistic user.")
 
-    # h.24: O usuário mais pessimista;
+# h.24: O usuário mais pessimista;
+@SECTIONS.section("h.24", VISUALIZATIONS, needs=['user_profiles'])
+def most_pessimistic_user(ctx, report):
     report.add_question("h.24", "Most pessimistic user")
-    most_pessimistic = df.groupby('id_member_anonymous')['sentiment'].sum().sort_values(ascending=True).head(1).reset_index()
+    most_pessimistic = ctx.user_profiles.top('sentiment_sum', 1, ascending=True).rename(columns={'sentiment_sum': 'sentiment'})
     if not most_pessimistic.empty:
         report.add_table(most_pessimistic, title="Most Pessimistic User")
     else:
         report.add_text("No data to determine most pessimistic user.")
 
-    # h.25: As 30 maiores mensagens;
+# h.25: As 30 maiores mensagens;
+@SECTIONS.section("h.25", VISUALIZATIONS, needs=['df'])
+def longest_messages(ctx, report):
     report.add_question("h.25", "Top 30 longest messages")
-    longest_messages = df[['text_content_anonymous', 'caracteres']].sort_values('caracteres', ascending=False).head(30)
+    longest_messages = ctx.df[['text_content_anonymous', 'caracteres']].sort_values('caracteres', ascending=False).head(30)
     if not longest_messages.empty:
         report.add_table(longest_messages, title="Top 30 Longest Messages")
     else:
         report.add_text("No messages found.")
 
-    # h.26: As 30 menores mensagens;
+# h.26: As 30 menores mensagens;
+@SECTIONS.section("h.26", VISUALIZATIONS, needs=['df'])
+def shortest_messages(ctx, report):
     report.add_question("h.26", "Top 30 shortest messages")
-    shortest_messages = df[df['caracteres'] > 0][['text_content_anonymous', 'caracteres']].sort_values('caracteres', ascending=True).head(30)
+    shortest_messages = ctx.df[ctx.df['caracteres'] > 0][['text_content_anonymous', 'caracteres']].sort_values('caracteres', ascending=True).head(30)
     if not shortest_messages.empty:
         report.add_table(shortest_messages, title="Top 30 Shortest Messages")
     else:
         report.add_text("No messages found.")
 
-    # h.27: O dia em que foi publicado a maior quantidade de mensagens;
+# h.27: O dia em que foi publicado a maior quantidade de mensagens;
+@SECTIONS.section("h.27", VISUALIZATIONS, needs=['cube'])
+def busiest_day(ctx, report):
     report.add_question("h.27", "Day with the highest quantity of messages")
-    df['date_message'] = pd.to_datetime(df['date_message'])
-    busiest_day = df['date_message'].dt.date.value_counts().head(1).reset_index()
-    busiest_day.columns = ['Date', 'Message Count']
+    daily = ctx.cube.rollup('day').dropna(subset=['day'])
+    busiest_day = daily.sort_values('count', ascending=False, kind='stable').head(1)
+    busiest_day = pd.DataFrame({'Date': busiest_day['day'].dt.date, 'Message Count': busiest_day['count']})
     if not busiest_day.empty:
         report.add_table(busiest_day, title="Busiest Day")
     else:
         report.add_text("No data to determine busiest day.")
 
-    # h.28: As mensagens que possuem as palavras “FACÇÃO” e “CRIMINOSA”;
+# h.28: As mensagens que possuem as palavras “FACÇÃO” e “CRIMINOSA”;
+@SECTIONS.section("h.28", VISUALIZATIONS, needs=['df', 'text_index'])
+def faccao_criminosa(ctx, report):
     report.add_question("h.28", "Messages containing 'FACÇÃO' and 'CRIMINOSA'")
-    faccao_criminosa_messages = df[df['text_content_anonymous'].str.contains('FACÇÃO', na=False, case=False) & df['text_content_anonymous'].str.contains('CRIMINOSA', na=False, case=False)]['text_content_anonymous'].head(30).to_frame()
+    faccao_criminosa_messages = ctx.df[ctx.text_index.row_mask(ctx.df['text_id'], 'FACÇÃO CRIMINOSA')]['text_content_anonymous'].head(30).to_frame()
     if not faccao_criminosa_messages.empty:
         report.add_table(faccao_criminosa_messages, title="Messages with 'FACÇÃO' and 'CRIMINOSA'")
     else:
         report.add_text("No messages found containing both 'FACÇÃO' and 'CRIMINOSA'.")
 
-    # h.29: Quantidade de mensagens por dia e hora;
+# h.29: Quantidade de mensagens por dia e hora;
+@SECTIONS.section("h.29", VISUALIZATIONS, needs=['cube'])
+def messages_by_day_hour(ctx, report):
     report.add_question("h.29", "Quantity of messages by day and hour")
-    df['date_hour'] = df['date_message'].dt.floor('H')
-    messages_by_day_hour = df['date_hour'].value_counts().sort_index().reset_index()
+    messages_by_day_hour = ctx.cube.rollup('hour').dropna(subset=['hour'])[['hour', 'count']].reset_index(drop=True)
     messages_by_day_hour.columns = ['Date_Hour', 'Message Count']
-    
-    plt.figure(figsize=(15, 7))
-    sns.lineplot(x='Date_Hour', y='Message Count', data=messages_by_day_hour)
-    plt.title('Message Count by Day and Hour')
-    plt.xlabel('Date and Hour')
-    plt.ylabel('Message Count')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    messages_by_day_hour_path = os.path.join(images_dir, 'h29_messages_by_day_hour.png')
-    plt.savefig(messages_by_day_hour_path)
-    plt.close()
-    report.add_image("Message Count by Day and Hour", f"./images/{os.path.basename(messages_by_day_hour_path)}")
-
-    # h.30: Quantidade de mensagens por hora (daily pattern);
+
+    messages_by_day_hour_path = ctx.renderer.add('h29_messages_by_day_hour.png', figures.lineplot, messages_by_day_hour, 'Message Count by Day and Hour', figsize=(15, 7),
+                                                 xlabel='Date and Hour', ylabel='Message Count', rotate_xticks=True, tight_layout=True, x='Date_Hour', y='Message Count')
+    report.add_image("Message Count by Day and Hour", messages_by_day_hour_path)
+
+# h.30: Quantidade de mensagens por hora (daily pattern);
+@SECTIONS.section("h.30", VISUALIZATIONS, needs=['cube'])
+def messages_by_hour(ctx, report):
     report.add_question("h.30", "Quantity of messages by hour (daily pattern)")
-    df['hour_of_day'] = df['date_message'].dt.hour
-    messages_by_hour = df['hour_of_day'].value_counts().sort_index().reset_index()
+    messages_by_hour = ctx.cube.rollup('hour_of_day').dropna(subset=['hour_of_day'])[['hour_of_day', 'count']].reset_index(drop=True)
     messages_by_hour.columns = ['Hour', 'Message Count']
-    
-    plt.figure(figsize=(10, 6))
-    sns.lineplot(x='Hour', y='Message Count', data=messages_by_hour)
-    plt.title('Average Message Count by Hour of Day')
-    plt.xlabel('Hour of Day')
-    plt.ylabel('Message Count')
-    plt.xticks(range(0, 24))
-    plt.tight_layout()
-    messages_by_hour_path = os.path.join(images_dir, 'h30_messages_by_hour.png')
-    plt.savefig(messages_by_hour_path)
-    plt.close()
-    report.add_image("Average Message Count by Hour of Day", f"./images/{os.path.basename(messages_by_hour_path)}")
-
-    # h.31: A nuvem de palavras referente às mensagens de texto (após a remoção de stop words);
+
+    messages_by_hour_path = ctx.renderer.add('h30_messages_by_hour.png', figures.lineplot, messages_by_hour, 'Average Message Count by Hour of Day', figsize=(10, 6),
+                                             xlabel='Hour of Day', ylabel='Message Count', xticks=range(0, 24), tight_layout=True, x='Hour', y='Message Count')
+    report.add_image("Average Message Count by Hour of Day", messages_by_hour_path)
+
+# h.31: A nuvem de palavras referente às mensagens de texto (após a remoção de stop words);
+@SECTIONS.section("h.31", VISUALIZATIONS)
+def word_cloud(ctx, report):
     report.add_question("h.31", "Word cloud of text messages (after stop word removal)")
     report.add_text("Generating a proper word cloud requires `wordcloud` library and NLTK for stop words. This is a placeholder.")
     # Example placeholder image
     # report.add_image("Word Cloud", "./images/placeholder_wordcloud.png")
 
-    # h.32: A rede interativa das palavras referente às mensagens de texto (após a remoção de stop words);
+# h.32: A rede interativa das palavras referente às mensagens de texto (após a remoção de stop words);
+@SECTIONS.section("h.32", VISUALIZATIONS)
+def word_network(ctx, report):
     report.add_question("h.32", "Interactive word network of text messages (after stop word removal)")
     report.add_text("Generating an interactive word network is complex and typically requires libraries like `networkx` and `bokeh` or `pyvis`. This is a placeholder.")
     # Example placeholder image
     # report.add_image("Word Network", "./images/placeholder_wordnetwork.png")
 
-    # h.33: Proporção de mensagens com e sem URL;
+# h.33: Proporção de mensagens com e sem URL;
+@SECTIONS.section("h.33", VISUALIZATIONS, needs=['df'])
+def url_proportion(ctx, report):
     report.add_question("h.33", "Proportion of messages with and without URL")
-    url_proportion = df['has_media_url'].value_counts(normalize=True) * 100
+    url_proportion = ctx.df['has_media_url'].value_counts(normalize=True) * 100
     url_proportion.index = ['Without URL', 'With URL']
-    plt.figure(figsize=(8, 8))
-    plt.pie(url_proportion, labels=url_proportion.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Proportion of Messages With and Without URL')
-    url_pie_path = os.path.join(images_dir, 'h33_url_proportion.png')
-    plt.savefig(url_pie_path)
-    plt.close()
-    report.add_image("Proportion of Messages With and Without URL", f"./images/{os.path.basename(url_pie_path)}")
-
-    # h.34: Proporção de desinformação;
+    url_pie_path = ctx.renderer.add('h33_url_proportion.png', figures.pie, url_proportion, 'Proportion of Messages With and Without URL', figsize=(8, 8))
+    report.add_image("Proportion of Messages With and Without URL", url_pie_path)
+
+# h.34: Proporção de desinformação;
+@SECTIONS.section("h.34", VISUALIZATIONS, needs=['misinformation_category'])
+def misinformation_proportion(ctx, report):
     report.add_question("h.34", "Proportion of misinformation")
-    # Assuming score_misinformation > 0.5 is misinformation, < -0.5 is not, else neutral
-    def classify_misinformation(score):
-        if pd.isna(score): return 'Unknown'
-        if score > 0.5: return 'Misinformation'
-        if score < 0.5: return 'Not Misinformation' # Assuming 0.5 is the threshold
-        return 'Neutral' # For scores around 0.5 or other cases
-    
-    df['misinformation_category'] = df['score_misinformation'].apply(classify_misinformation)
-    misinfo_proportion = df['misinformation_category'].value_counts(normalize=True) * 100
-    
-    plt.figure(figsize=(8, 8))
-    plt.pie(misinfo_proportion, labels=misinfo_proportion.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Proportion of Misinformation Categories')
-    misinfo_pie_path = os.path.join(images_dir, 'h34_misinformation_proportion.png')
-    plt.savefig(misinfo_pie_path)
-    plt.close()
-    report.add_image("Proportion of Misinformation Categories", f"./images/{os.path.basename(misinfo_pie_path)}")
-
-    # h.35: Proporção de mensagens contendo mídia e desinformação;
+    misinfo_proportion = ctx.misinformation_category.value_counts(normalize=True) * 100
+
+    misinfo_pie_path = ctx.renderer.add('h34_misinformation_proportion.png', figures.pie, misinfo_proportion, 'Proportion of Misinformation Categories', figsize=(8, 8))
+    report.add_image("Proportion of Misinformation Categories", misinfo_pie_path)
+
+# h.35: Proporção de mensagens contendo mídia e desinformação;
+@SECTIONS.section("h.35", VISUALIZATIONS, needs=['df', 'misinformation_category'])
+def media_and_misinformation(ctx, report):
     report.add_question("h.35", "Proportion of messages containing media and misinformation")
-    media_misinfo_counts = df.groupby(['has_media', 'misinformation_category']).size().unstack(fill_value=0)
-    
+    media_misinfo_counts = ctx.df.groupby([ctx.df['has_media'], ctx.misinformation_category]).size().unstack(fill_value=0)
+
     # This plot might be complex. A stacked bar chart or a grouped bar chart is better.
     # For simplicity, let's show a table and a basic plot if possible.
     report.add_table(media_misinfo_counts, title="Media vs. Misinformation Counts")
 
-    # h.36: Distribuição de mensagens por score de desinformação;
+# h.36: Distribuição de mensagens por score de desinformação;
+@SECTIONS.section("h.36", VISUALIZATIONS, needs=['df'])
+def misinformation_score_distribution(ctx, report):
     report.add_question("h.36", "Distribution of messages by misinformation score")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['score_misinformation'].dropna(), bins=30, kde=True)
-    plt.title('Distribution of Misinformation Score')
-    misinfo_score_dist_path = os.path.join(images_dir, 'h36_misinfo_score_distribution.png')
-    plt.savefig(misinfo_score_dist_path)
-    plt.close()
-    report.add_image("Distribution of Misinformation Score", f"./images/{os.path.basename(misinfo_score_dist_path)}")
-
-    # h.37: Proporção de sentimentos;
+    misinfo_score_dist_path = ctx.renderer.add('h36_misinfo_score_distribution.png', figures.histogram, ctx.df['score_misinformation'].dropna(), 'Distribution of Misinformation Score', figsize=(10, 6))
+    report.add_image("Distribution of Misinformation Score", misinfo_score_dist_path)
+
+# h.37: Proporção de sentimentos;
+@SECTIONS.section("h.37", VISUALIZATIONS, needs=['df'])
+def sentiment_proportion(ctx, report):
     report.add_question("h.37", "Proportion of sentiments")
-    sentiment_proportion = df['sentiment'].value_counts(normalize=True) * 100
+    sentiment_proportion = ctx.df['sentiment'].value_counts(normalize=True) * 100
     sentiment_proportion.index = sentiment_proportion.index.map({1: 'Positive', 0: 'Neutral', -1: 'Negative'})
-    plt.figure(figsize=(8, 8))
-    plt.pie(sentiment_proportion, labels=sentiment_proportion.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Proportion of Sentiments')
-    sentiment_pie_path = os.path.join(images_dir, 'h37_sentiment_proportion.png')
-    plt.savefig(sentiment_pie_path)
-    plt.close()
-    report.add_image("Proportion of Sentiments", f"./images/{os.path.basename(sentiment_pie_path)}")
-
-    # h.38: Distribuição de mensagens por score de sentimentos;
+    sentiment_pie_path = ctx.renderer.add('h37_sentiment_proportion.png', figures.pie, sentiment_proportion, 'Proportion of Sentiments', figsize=(8, 8))
+    report.add_image("Proportion of Sentiments", sentiment_pie_path)
+
+# h.38: Distribuição de mensagens por score de sentimentos;
+@SECTIONS.section("h.38", VISUALIZATIONS, needs=['df'])
+def sentiment_score_distribution(ctx, report):
     report.add_question("h.38", "Distribution of messages by sentiment score")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['score_sentiment'].dropna(), bins=30, kde=True)
-    plt.title('Distribution of Sentiment Score')
-    sentiment_score_dist_path = os.path.join(images_dir, 'h38_sentiment_score_distribution.png')
-    plt.savefig(sentiment_score_dist_path)
-    plt.close()
-    report.add_image("Distribution of Sentiment Score", f"./images/{os.path.basename(sentiment_score_dist_path)}")
-
-    # h.39: Proporção entre mensagens virais e não virais;
+    sentiment_score_dist_path = ctx.renderer.add('h38_sentiment_score_distribution.png', figures.histogram, ctx.df['score_sentiment'].dropna(), 'Distribution of Sentiment Score', figsize=(10, 6))
+    report.add_image("Distribution of Sentiment Score", sentiment_score_dist_path)
+
+# h.39: Proporção entre mensagens virais e não virais;
+@SECTIONS.section("h.39", VISUALIZATIONS, needs=['df'])
+def viral_proportion(ctx, report):
     report.add_question("h.39", "Proportion of viral vs. non-viral messages")
-    viral_proportion = df['viral'].value_counts(normalize=True) * 100
-    viral_proportion.index = ['Non-Viral', 'Viral']
-    plt.figure(figsize=(8, 8))
-    plt.pie(viral_proportion, labels=viral_proportion.index, autopct='%1.1f%%', startangle=90)
-    plt.title('Proportion of Viral vs. Non-Viral Messages')
-    viral_pie_path = os.path.join(images_dir, 'h39_viral_proportion.png')
-    plt.savefig(viral_pie_path)
-    plt.close()
-    report.add_image("Proportion of Viral vs. Non-Viral Messages", f"./images/{os.path.basename(viral_pie_path)}")
-
-    # h.40: Algo que você julga importante e que ainda não foi solicitado;
+    viral_proportion = ctx.df['viral'].value_counts(normalize=True) * 100
+    viral_proportion.index = viral_proportion.index.map({0: 'Non-Viral', 1: 'Viral'})
+    viral_pie_path = ctx.renderer.add('h39_viral_proportion.png', figures.pie, viral_proportion, 'Proportion of Viral vs. Non-Viral Messages', figsize=(8, 8))
+    report.add_image("Proportion of Viral vs. Non-Viral Messages", viral_pie_path)
+
+# h.40: Algo que você julga importante e que ainda não foi solicitado;
+@SECTIONS.section("h.40", VISUALIZATIONS)
+def additional_insights(ctx, report):
     report.add_question("h.40", "Additional important insights not explicitly requested")
     report.add_text("One important aspect not explicitly requested is the **temporal trend of misinformation**. Analyzing how misinformation scores change over time could reveal patterns related to events or campaigns. Another is **network analysis of user interactions** (if interaction data were available), which could identify influential users or communities spreading misinformation.")
-    
-    # --- Save the Final Report ---
+
+def main(n_jobs: int = None, rebuild_figures: bool = False, profiler: SectionProfiler = None, processed: tuple = None,
+         sections: list = None):
+    """
+    Main function to perform Exploratory Data Analysis for Part 3 and generate a report.
+
+    Args:
+        n_jobs (int): Worker processes used to render the figures and count n-grams. Defaults to the number of CPUs.
+        rebuild_figures (bool): Render every figure again instead of reusing unchanged cached images.
+        profiler (SectionProfiler): Profiles each question of the report (see reporting/profiling.py).
+        processed (tuple): Part 1's processed frame, text pool and text index, when it ran in the
+            same process (see pipeline/run_pipeline.py); the Parquet dataset is read otherwise.
+        sections (list): Keys of the sections to compute (e.g. ['h.11', 'h.20']), merged into the
+            existing report; every section runs when None or when there is no report to merge into.
+    """
+    # --- Setup ---
+    project_root = get_project_root()
+    profiler = profiler or SectionProfiler(enabled=False)
+    profiler.start('setup')
+    processed_path = processed_dataset_path(project_root)
+    images_dir = os.path.join(project_root, 'prj_part03', 'images')
+    os.makedirs(images_dir, exist_ok=True)
+    # Figures are queued while the report is built and rendered together at the end;
+    # figures whose data and parameters did not change since the last run are reused
+    renderer = FigureRenderer(images_dir, n_jobs=n_jobs, force=rebuild_figures)
+
     report_path = os.path.join(project_root, 'prj_part03', 'report.md')
-    report.save_report(report_path)
+    if sections is not None:
+        SECTIONS.resolve(sections)
+        if not os.path.exists(report_path) or not split_blocks(open(report_path, encoding='utf-8').read())[1]:
+            print(f"No report with sections to merge into at {report_path}; running every section.")
+            sections = None
+    # Streamed to disk as it is built, so the message tables never pile up in memory; the few
+    # blocks of a partial run are kept in memory and merged into the existing report instead.
+    # An error closes the report, so no partial file is left behind
+    with ReportGenerator(
+        title="Exploratory Data Analysis Report (Lista 3)",
+        introduction="This report presents the findings from the EDA performed on the processed Telegram dataset, addressing all 40 questions from the assignment.",
+        output_path=report_path if sections is None else None,
+        max_cell_chars=MAX_CELL_CHARS,
+        profiler=profiler,
+    ) as report:
+        if not os.path.exists(processed_path):
+            report.add_section(LOADING)
+            report.add_question("a", "Load the dataset `fakeTelegram.BR_2022.csv`.")
+            report.add_text("Processed data file not found. Please run Part 1 first to generate `fakeTelegram.BR_2022_processed.parquet`.")
+            report.close()
+            profiler.finish()
+            return
+
+        context = SectionContext(SECTIONS, processed_path=processed_path, processed=processed, renderer=renderer, profiler=profiler, n_jobs=n_jobs)
+        SECTIONS.run(context, report, sections)
+
+        # --- Render the Figures and Save the Final Report ---
+        profiler.start('figure rendering')
+        # A partial run only queued its own figures, so the images of the other sections are kept
+        renderer.render_all(evict=sections is None)
+        print(f"Figures: {len(renderer.rendered)} rendered, {len(renderer.reused)} reused from cache, {len(renderer.evicted)} stale removed.")
+        if sections is None:
+            report.save_report(report_path)
+        else:
+            report.merge_report(report_path, list(SECTIONS.sections))
+        profiler.finish()
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Runs the Part 3 exploratory data analysis report.")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes used to render the figures and count n-grams (default: number of CPUs).")
+    parser.add_argument('--rebuild-figures', action='store_true', help="Render every figure again, ignoring the image cache.")
+    parser.add_argument('--profile', action='store_true', help="Time and memory-profile each question; adds a summary to the report and writes prj_part03/profile_trace.json.")
+    parser.add_argument('--sections', default=None, help="Comma-separated sections to compute and merge into the existing report, e.g. 'h.11,h.20' ('e.3' selects all of e).")
+    args = parser.parse_args()
+    profiler = SectionProfiler('part3', enabled=args.profile)
+    sections = [key.strip() for key in args.sections.split(',') if key.strip()] if args.sections else None
+    if sections is not None:
+        try:
+            SECTIONS.resolve(sections)
+        except ValueError as error:
+            parser.error(str(error))
+    main(n_jobs=args.jobs, rebuild_figures=args.rebuild_figures, profiler=profiler, sections=sections)
+    if args.profile:
+        profiler.save_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profile_trace.json'))
 
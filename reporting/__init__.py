@@ -1,3 +1,5 @@
 # reporting/__init__.py
 # This file makes the 'reporting' directory a Python package.
-from .generator import ReportGenerator
+from .generator import ReportGenerator, split_blocks
+from .profiling import SectionProfiler, save_chrome_trace
+from .sections import Section, SectionContext, SectionRegistry
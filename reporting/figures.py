@@ -0,0 +1,193 @@
+# reporting/figures.py
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+from scipy import stats
+from datastore import data_fingerprint
+
+# Bump when a plotting function changes how it draws, so cached images are re-rendered
+FIGURE_CACHE_VERSION = 1
+CACHE_MANIFEST = '.figure_cache.json'
+
+# Plotting functions of the render jobs (see `FigureRenderer.add`). Each gets only the data
+# named in its docstring and draws on the current figure; `_render` saves the figure to the
+# job's image file in `images_dir` (the names are those Part 3 gives them).
+
+
+def histogram(data, bins=30, kde=True):
+    """Histogram with KDE of one numeric Series (a column or a score): hist_<col>.png, h36_*.png, h38_*.png."""
+    sns.histplot(data, kde=kde, bins=bins)
+
+
+def boxplot(data):
+    """Boxplot of one numeric column Series: box_<col>.png."""
+    sns.boxplot(x=data)
+
+
+def qq_plot(data):
+    """Normal QQ-plot of one numeric column Series (missing values dropped): qq_<col>.png."""
+    stats.probplot(data.dropna(), dist="norm", plot=plt)
+
+
+def heatmap(matrix, cmap='coolwarm', fmt=".2f"):
+    """Annotated heatmap of a square association matrix: correlation_heatmap.png, cramers_v_heatmap.png."""
+    sns.heatmap(matrix, annot=True, fmt=fmt, cmap=cmap)
+
+
+def barplot(data, x, y):
+    """Bars from a small table and its column names (h1_*.png), or from x/y arrays with data=None (h3_*.png)."""
+    if isinstance(x, str):
+        sns.barplot(x=x, y=y, data=data)
+    else:
+        sns.barplot(x=x, y=y)
+
+
+def stacked_barplot(data):
+    """Stacked bars of a count table, one row per bar and one column per stack: h13_*.png."""
+    data.plot(kind='bar', stacked=True, ax=plt.gca())
+
+
+def scatterplot(data, x, y, alpha=0.5):
+    """Scatter of two columns of a sampled frame: h4_*.png."""
+    sns.scatterplot(x=x, y=y, data=data, alpha=alpha)
+
+
+def lineplot(data, x, y):
+    """Line of a small aggregated table (counts per hour): h29_*.png, h30_*.png."""
+    sns.lineplot(x=x, y=y, data=data)
+
+
+def pie(data):
+    """Pie of a Series of counts or proportions, labelled by its index: h2_*, h33_*, h34_*, h37_*, h39_*.png."""
+    plt.pie(data, labels=data.index, autopct='%1.1f%%', startangle=90)
+
+
+def _render(job: dict):
+    """Draws and saves one figure; runs in a worker process with the Agg backend."""
+    plt.figure(figsize=job['figsize'])
+    job['plot'](job['data'], **job['options'])
+    plt.title(job['title'])
+    if job['xlabel'] is not None:
+        plt.xlabel(job['xlabel'])
+    if job['ylabel'] is not None:
+        plt.ylabel(job['ylabel'])
+    if job['xticks'] is not None:
+        plt.xticks(job['xticks'])
+    if job['rotate_xticks']:
+        plt.xticks(rotation=45, ha='right')
+    if job['tight_layout']:
+        plt.tight_layout()
+    plt.savefig(job['path'])
+    plt.close()
+    return job['path']
+
+
+class FigureRenderer:
+    """
+    Collects figures as independent render jobs and renders them on a process pool.
+
+    Each job carries only the data its plot needs (a column, a count table, a matrix),
+    so the full dataframe is never sent to the workers. The report keeps referencing
+    the image paths in the order the figures were added.
+
+    Rendered images are cached: every job is keyed by a fingerprint of its data and
+    plotting parameters, and the keys of the images on disk are kept in a manifest
+    inside `images_dir`. A job whose image already exists with the same key is skipped.
+    """
+
+    def __init__(self, images_dir: str, n_jobs: int = None, force: bool = False):
+        self.images_dir = images_dir
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.force = force
+        self.jobs = []
+        self.rendered = []
+        self.reused = []
+        self.evicted = []
+
+    def add(self, filename: str, plot, data, title: str, figsize=(8, 5), xlabel: str = None, ylabel: str = None,
+            xticks=None, rotate_xticks: bool = False, tight_layout: bool = False, **options) -> str:
+        """
+        Queues a figure and returns its relative path for `ReportGenerator.add_image`.
+
+        Args:
+            filename (str): Image file name inside `images_dir`.
+            plot (callable): One of the plotting functions of this module.
+            data: The minimal data the plot needs.
+            title (str): Figure title.
+            **options: Extra keyword arguments for `plot`.
+        """
+        key = data_fingerprint(
+            FIGURE_CACHE_VERSION, f"{plot.__module__}.{plot.__qualname__}", data, title, figsize,
+            xlabel, ylabel, list(xticks) if xticks is not None else None, rotate_xticks, tight_layout, options,
+        )
+        self.jobs.append({
+            'key': key,
+            'path': os.path.join(self.images_dir, filename),
+            'plot': plot,
+            'data': data,
+            'title': title,
+            'figsize': figsize,
+            'xlabel': xlabel,
+            'ylabel': ylabel,
+            'xticks': xticks,
+            'rotate_xticks': rotate_xticks,
+            'tight_layout': tight_layout,
+            'options': options,
+        })
+        return f"./images/{filename}"
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.images_dir, CACHE_MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: dict):
+        path = os.path.join(self.images_dir, CACHE_MANIFEST)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def render_all(self, evict: bool = True) -> list:
+        """
+        Renders the queued figures whose cached image is missing or stale.
+
+        Images recorded in the manifest that no queued figure produces anymore are
+        deleted, unless `evict` is False (a run that only queued some of the figures).
+        With `force`, every figure is rendered again.
+
+        Returns:
+            list: The paths written in this call, in the order the figures were added.
+        """
+        jobs, self.jobs = self.jobs, []
+        cached = {} if self.force else self._load_manifest()
+        pending, self.reused = [], []
+        for job in jobs:
+            if cached.get(os.path.basename(job['path'])) == job['key'] and os.path.exists(job['path']):
+                self.reused.append(job['path'])
+            else:
+                pending.append(job)
+
+        if self.n_jobs == 1 or len(pending) <= 1:
+            self.rendered = [_render(job) for job in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(pending))) as executor:
+                self.rendered = list(executor.map(_render, pending))
+
+        manifest = {os.path.basename(job['path']): job['key'] for job in jobs}
+        self.evicted = []
+        if not evict:
+            manifest = {**self._load_manifest(), **manifest}
+        for filename in set(self._load_manifest()) - set(manifest):
+            stale_path = os.path.join(self.images_dir, filename)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+                self.evicted.append(stale_path)
+        self._save_manifest(manifest)
+        return self.rendered
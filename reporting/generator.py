@@ -1,47 +1,244 @@
 # reporting/generator.py
 
+import os
+import re
 import pandas as pd
+from .profiling import SectionProfiler
+
+# Tables with more rows than this are written row by row instead of through `to_markdown`
+STREAM_TABLE_ROWS = 1000
+
+# Invisible line opening each block of a report written by sections (see `add_block`)
+_BLOCK_MARKER = re.compile(r'^<!-- block: (.+?) -->\n\n', re.MULTILINE)
+PROFILE_BLOCK = 'profile'
+# The profile of a partial run, kept next to the profile of the full run it was merged into
+PARTIAL_PROFILE_BLOCK = 'profile.partial'
+
+
+def split_blocks(text: str) -> tuple:
+    """
+    Splits a report into the text before its first block and its blocks.
+
+    Returns:
+        tuple: The leading text and a dict of the text of each block (marker included), by key.
+    """
+    markers = list(_BLOCK_MARKER.finditer(text))
+    if not markers:
+        return text, {}
+    ends = [marker.start() for marker in markers[1:]] + [len(text)]
+    return text[:markers[0].start()], {marker.group(1): text[marker.start():end] for marker, end in zip(markers, ends)}
+
+
+def _format_cell(value) -> str:
+    if isinstance(value, float):
+        return format(value, 'g')
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ''
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
 
 class ReportGenerator:
-    """A helper class to generate Markdown reports."""
+    """
+    A helper class to generate Markdown reports.
+
+    By default the report is kept in memory as a list of chunks and written by
+    `save_report`. With `output_path`, it is streamed instead: every chunk goes straight
+    to a buffered file (`<output_path>.part`), which `save_report` renames into place,
+    so memory stays flat however large the report grows.
+
+    With a `profiler`, every question opens a profiled section, and `save_report` appends
+    the summary table of the sections.
+
+    Used as a context manager, the report is closed (see `close`) when the block raises.
+    """
+
+    def __init__(self, title: str, introduction: str, output_path: str = None, max_cell_chars: int = None,
+                 profiler: SectionProfiler = None):
+        """
+        Args:
+            title (str): Report title.
+            introduction (str): Paragraph written under the title.
+            output_path (str): Streams the report to this file while it is built.
+            max_cell_chars (int): Truncates longer table cells to this many characters.
+            profiler (SectionProfiler): Profiles the report's questions as sections.
+        """
+        self.output_path = output_path
+        self.max_cell_chars = max_cell_chars
+        self.profiler = profiler
+        self._heading = None
+        self._blocks = []
+        self._chunks = []
+        self._file = None
+        if output_path is not None:
+            self._file = open(output_path + '.part', 'w', encoding='utf-8', buffering=1 << 16)
+        self._write(f"# {title}\n\n{introduction}\n\n")
+
+    def _write(self, text: str):
+        if self._file is not None:
+            self._file.write(text)
+        else:
+            self._chunks.append(text)
+
+    @property
+    def content(self) -> str:
+        """The report written so far."""
+        if self._file is not None:
+            self._file.flush()
+            with open(self._file.name, encoding='utf-8') as f:
+                return f.read()
+        return ''.join(self._chunks)
+
+    @content.setter
+    def content(self, text: str):
+        """
+        Replaces the report written so far, so code assigning `report.content` (e.g.
+        `report.content += ...`) keeps working; the `add_*` methods append without a copy.
+        """
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.write(text)
+        else:
+            self._chunks = [text]
 
-    def __init__(self, title: str, introduction: str):
-        self.content = f"# {title}\n\n{introduction}\n\n"
+    def __enter__(self) -> 'ReportGenerator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # A report that fails while being built is discarded, with its streamed `.part` file
+        if exc_type is not None:
+            self.close()
+        return False
 
     def add_section(self, title: str, level: int = 2):
         """Adds a new section header."""
-        self.content += f"{'#' * level} {title}\n\n"
+        self._heading = title
+        self._write(f"{'#' * level} {title}\n\n")
+
+    def add_block(self, key: str, heading: str = None):
+        """
+        Opens the block `key` with an invisible marker, so `merge_report` can replace it
+        later; `heading` is the section the block belongs to, when it is not written again.
+        """
+        self._blocks.append(key)
+        if heading is not None:
+            self._heading = heading
+        self._write(f"<!-- block: {key} -->\n\n")
 
     def add_question(self, question_number: str, question_text: str):
         """Adds a formatted question block."""
-        self.content += f"### Question {question_number}: {question_text}\n\n"
+        if self.profiler is not None:
+            self.profiler.start(f"question {question_number}", group=self._heading)
+        self._write(f"### Question {question_number}: {question_text}\n\n")
 
     def add_text(self, text: str):
         """Adds a paragraph of text."""
-        self.content += f"{text}\n\n"
+        self._write(f"{text}\n\n")
 
     def add_code_block(self, code: str, language: str = 'python'):
         """Adds a formatted code block."""
-        self.content += f"``` {language}\n{code}\n```\n\n"
+        self._write(f"``` {language}\n{code}\n```\n\n")
 
     def add_table(self, dataframe: pd.DataFrame, title: str = None):
-        """Adds a markdown table from a pandas DataFrame."""
+        """
+        Adds a markdown table from a pandas DataFrame.
+
+        Tables longer than `STREAM_TABLE_ROWS` rows are written one row at a time, without
+        building the whole table as a string.
+        """
         if title:
-            self.content += f"**{title}**\n\n"
+            self._write(f"**{title}**\n\n")
         if dataframe.empty:
-            self.content += "No data to display.\n\n"
-        else:
-            self.content += dataframe.to_markdown(index=False) + "\n\n"
+            self._write("No data to display.\n\n")
+            return
+        if self.max_cell_chars is not None:
+            dataframe = self._truncate(dataframe)
+        if len(dataframe) <= STREAM_TABLE_ROWS:
+            self._write(dataframe.to_markdown(index=False) + "\n\n")
+            return
+
+        self._write("| " + " | ".join(_format_cell(col) for col in dataframe.columns) + " |\n")
+        self._write("|" + "|".join(
+            '---:' if pd.api.types.is_numeric_dtype(dataframe[col]) else ':---' for col in dataframe.columns
+        ) + "|\n")
+        for row in dataframe.itertuples(index=False, name=None):
+            self._write("| " + " | ".join(_format_cell(value) for value in row) + " |\n")
+        self._write("\n")
+
+    def _truncate(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        limit = self.max_cell_chars
+        truncated = {}
+        for col in dataframe.columns:
+            values = dataframe[col]
+            if values.dtype == object or pd.api.types.is_string_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(object).map(
+                    lambda value: value[:limit - 1] + '…' if isinstance(value, str) and len(value) > limit else value
+                )
+            truncated[col] = values
+        return pd.DataFrame(truncated, index=dataframe.index)
 
     def add_image(self, title: str, image_path: str):
         """Adds a markdown image link."""
-        self.content += f"**{title}**\n\n"
-        self.content += f"![{title}]({image_path})\n\n"
+        self._write(f"**{title}**\n\n")
+        self._write(f"![{title}]({image_path})\n\n")
 
     def save_report(self, file_path: str):
         """Saves the generated report content to a file."""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(self.content)
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.stop()
+            if self._blocks:
+                self.add_block(PROFILE_BLOCK)
+            self.add_section("Section Profile")
+            self.add_text("Wall time, CPU time, peak traced memory (above the level at the start of the section) and rows processed by each section of this run.")
+            self.add_table(self.profiler.to_frame())
+            self.profiler.start('report writing')
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.replace(self.output_path + '.part', file_path)
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.writelines(self._chunks)
         print(f"Report successfully saved to {file_path}")
 
+    def merge_report(self, file_path: str, order: list):
+        """
+        Saves the blocks of this report into the report at `file_path` instead of the whole
+        report: each block replaces the block with the same key, and the other blocks and the
+        text before the first block are kept. Blocks are written in `order` (keys missing from
+        it go last, e.g. the section profile).
+
+        The profile of this run is written as its own block, after the profile of the full
+        run, which still describes the blocks this run did not replace.
+
+        Raises:
+            ValueError: If the report at `file_path` has no blocks to merge into.
+        """
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.stop()
+            self.add_block(PARTIAL_PROFILE_BLOCK)
+            self.add_section("Section Profile (Partial Run)")
+            self.add_text("Wall time, CPU time, peak traced memory (above the level at the start of the section) and rows processed by the sections of the last partial run.")
+            self.add_table(self.profiler.to_frame())
+            self.profiler.start('report writing')
+        with open(file_path, encoding='utf-8') as f:
+            preamble, blocks = split_blocks(f.read())
+        if not blocks:
+            raise ValueError(f"{file_path} has no blocks to merge into.")
+        blocks.update(split_blocks(self.content)[1])
+        rank = {key: position for position, key in enumerate(order)}
+        keys = sorted(blocks, key=lambda key: rank.get(key, len(rank)))
+        tmp_path = file_path + '.part'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(preamble)
+            f.writelines(blocks[key] for key in keys)
+        os.replace(tmp_path, file_path)
+        self.close()
+        print(f"Report blocks {', '.join(self._blocks)} merged into {file_path}")
 
+    def close(self):
+        """Discards a streamed report that will not be saved."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.output_path + '.part')
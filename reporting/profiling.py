@@ -0,0 +1,140 @@
+# reporting/profiling.py
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+
+class SectionProfiler:
+    """
+    Measures the consecutive sections of a pipeline script: wall time, CPU time, the peak of
+    traced memory above the level the section started at, and the number of rows it processed.
+
+    `start` closes the running section and opens the next one, so a script is split into
+    sections just by calling it at each boundary; `ReportGenerator` calls it on every
+    `add_question`, so sections are keyed on the question numbers. The row count is whatever
+    the script last passed to `set_rows` (the size of the frame the following sections scan).
+
+    A disabled profiler returns from every call at once, so scripts can call it unconditionally.
+    Memory is measured with `tracemalloc`, which slows down Python-heavy code; pass
+    `memory=False` to only time the sections.
+    """
+
+    def __init__(self, name: str = 'pipeline', enabled: bool = True, memory: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.records = []
+        self._current = None
+        self._rows = None
+        self._origin = time.perf_counter()
+        self._started_tracing = False
+
+    def start(self, section: str, group: str = None):
+        """Closes the running section and opens `section` (part of `group`, e.g. a report heading)."""
+        if not self.enabled:
+            return
+        self.stop()
+        base = 0
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        self._current = {'section': section, 'group': group, 'rows': self._rows, 'start': time.perf_counter(), 'cpu': time.process_time(), 'base': base}
+
+    def set_rows(self, rows: int):
+        """Sets the number of rows processed by the running section and the following ones."""
+        if not self.enabled:
+            return
+        self._rows = int(rows)
+        if self._current is not None:
+            self._current['rows'] = self._rows
+
+    def stop(self):
+        """Closes the running section, if any."""
+        if not self.enabled or self._current is None:
+            return
+        current, self._current = self._current, None
+        end = time.perf_counter()
+        record = {
+            'section': current['section'],
+            'group': current['group'],
+            'start_s': current['start'] - self._origin,
+            'wall_s': end - current['start'],
+            'cpu_s': time.process_time() - current['cpu'],
+            'rows': current['rows'],
+        }
+        if self.memory:
+            record['peak_mb'] = (tracemalloc.get_traced_memory()[1] - current['base']) / 2**20
+        self.records.append(record)
+
+    def finish(self):
+        """Closes the running section and stops tracing memory if this profiler started it."""
+        self.stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: One row per section, in order, with a final 'Total' row.
+        """
+        columns = ['Section', 'Report Section', 'Wall (s)', 'CPU (s)', 'Peak Memory (MB)', 'Rows', 'Rows/s']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+        records = pd.DataFrame(self.records)
+        summary = pd.DataFrame({
+            'Section': records['section'],
+            'Report Section': records['group'].fillna(''),
+            'Wall (s)': records['wall_s'],
+            'CPU (s)': records['cpu_s'],
+            'Peak Memory (MB)': records['peak_mb'] if 'peak_mb' in records else float('nan'),
+            'Rows': records['rows'].astype('Int64'),
+        })
+        summary['Rows/s'] = (summary['Rows'] / summary['Wall (s)'].where(summary['Wall (s)'] > 0)).round(0).astype('Int64')
+        total = {
+            'Section': 'Total',
+            'Report Section': '',
+            'Wall (s)': summary['Wall (s)'].sum(),
+            'CPU (s)': summary['CPU (s)'].sum(),
+            'Peak Memory (MB)': summary['Peak Memory (MB)'].max(),
+        }
+        summary = pd.concat([summary, pd.DataFrame([total])], ignore_index=True)
+        for col in ['Rows', 'Rows/s']:
+            # Blank instead of <NA> for the sections without a row count and the total
+            summary[col] = summary[col].astype(object).where(summary[col].notna(), '')
+        return summary.round({'Wall (s)': 3, 'CPU (s)': 3, 'Peak Memory (MB)': 1})
+
+    def trace_events(self, pid: int = None) -> list:
+        """
+        The sections as Chrome trace events: one complete ('X') event per section, with its
+        CPU time, memory and rows as arguments, plus a counter track of the memory peaks.
+        """
+        pid = os.getpid() if pid is None else pid
+        tid = threading.get_ident()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': self.name}}]
+        for record in self.records:
+            args = {key: record[key] for key in ('group', 'cpu_s', 'rows', 'peak_mb') if record.get(key) is not None}
+            start_us = record['start_s'] * 1e6
+            events.append({'name': record['section'], 'cat': self.name, 'ph': 'X', 'ts': start_us,
+                           'dur': record['wall_s'] * 1e6, 'pid': pid, 'tid': tid, 'args': args})
+            if 'peak_mb' in record:
+                events.append({'name': 'peak memory (MB)', 'ph': 'C', 'ts': start_us, 'pid': pid, 'args': {'peak_mb': record['peak_mb']}})
+        return events
+
+    def save_trace(self, file_path: str):
+        """Writes the sections as a Chrome trace, for chrome://tracing or https://ui.perfetto.dev."""
+        save_chrome_trace(file_path, self.trace_events())
+        print(f"Profile trace saved to {file_path}")
+
+
+def save_chrome_trace(file_path: str, events: list):
+    """Writes trace events in the Chrome trace JSON format."""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,150 @@
+# reporting/sections.py
+
+import re
+
+# A section answering a run of numbered questions, e.g. 'h.5-h.9'
+_RANGE_KEY = re.compile(r'^(?P<prefix>[^.]+)\.(?P<first>\d+)-(?P=prefix)\.(?P<last>\d+)$')
+
+
+class Section:
+    """A block of a report that can be computed on its own (see `SectionRegistry`)."""
+
+    def __init__(self, key: str, heading: str, run, needs: list = ()):
+        self.key = key
+        self.heading = heading
+        self.run = run
+        self.needs = list(needs)
+
+
+class SectionContext:
+    """
+    The values shared by the sections of one run.
+
+    Values given to the constructor (paths, options, the renderer) are plain attributes.
+    Resources registered with `SectionRegistry.resource` are computed the first time a
+    section reads them and kept for the sections after it; `take` hands a value over and
+    forgets it, so a chain of steps over a large frame never holds two copies.
+    """
+
+    def __init__(self, registry: 'SectionRegistry', **values):
+        self._registry = registry
+        self._values = dict(values)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        values = self.__dict__['_values']
+        if name not in values:
+            resources = self.__dict__['_registry'].resources
+            if name not in resources:
+                raise AttributeError(f"No value or resource named '{name}'")
+            values[name] = resources[name](self)
+        return values[name]
+
+    def take(self, name: str):
+        """Returns a value and drops it from the context (a later read computes it again)."""
+        value = getattr(self, name)
+        self._values.pop(name, None)
+        return value
+
+
+class SectionRegistry:
+    """
+    The sections of a report, registered in report order, and the resources they need.
+
+    A resource is a function of the context that computes a value (a cleaned frame, a
+    parsed URL column, a rollup cube) and lists the resources it reads itself. A section
+    writes one block of the report under its key; it reads its resources from the context,
+    so running a subset of the sections only computes what that subset needs.
+
+    Each section's block starts with an invisible marker (see `ReportGenerator.add_block`),
+    so the blocks of a partial run can be merged into the report of an earlier full run.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.resources = {}
+        self.resource_needs = {}
+        # Question -> key of the section answering it, for sections covering several questions
+        self.aliases = {}
+
+    def resource(self, needs: list = ()):
+        """Registers the decorated function as the resource named after it."""
+        def register(function):
+            self.resources[function.__name__] = function
+            self.resource_needs[function.__name__] = list(needs)
+            return function
+        return register
+
+    def section(self, key: str, heading: str, needs: list = ()):
+        """
+        Registers the decorated function, called with the context and the report, as the
+        section `key`, written under the report heading `heading`. A key such as 'h.5-h.9'
+        answers the questions h.5 to h.9, which `resolve` accepts too.
+        """
+        def register(function):
+            if key in self.sections:
+                raise ValueError(f"Duplicate section '{key}'")
+            self.sections[key] = Section(key, heading, function, needs)
+            match = _RANGE_KEY.match(key)
+            if match:
+                for number in range(int(match['first']), int(match['last']) + 1):
+                    self.aliases[f"{match['prefix']}.{number}"] = key
+            return function
+        return register
+
+    def resolve(self, keys=None) -> list:
+        """
+        Returns the sections to run for `keys`, in report order (all sections when None).
+
+        A key that is not a section is matched to the section answering it ('h.7' selects
+        'h.5-h.9'), or else by its prefix before the first dot, so 'e.3' selects the section 'e'.
+        """
+        if keys is None:
+            return list(self.sections.values())
+        selected = set()
+        for key in keys:
+            key = key if key in self.sections else self.aliases.get(key, key)
+            if key not in self.sections and key.split('.')[0] in self.sections:
+                key = key.split('.')[0]
+            if key not in self.sections:
+                raise ValueError(f"Unknown section '{key}'. Known sections: {', '.join(self.sections)}")
+            selected.add(key)
+        return [section for key, section in self.sections.items() if key in selected]
+
+    def requirements(self, sections: list) -> list:
+        """Returns every resource the sections need, directly or through other resources."""
+        required, pending = [], [name for section in sections for name in section.needs]
+        while pending:
+            name = pending.pop(0)
+            if name in required:
+                continue
+            if name not in self.resources:
+                raise ValueError(f"Unknown resource '{name}'")
+            required.append(name)
+            pending.extend(self.resource_needs[name])
+        return required
+
+    def run(self, context: SectionContext, report, keys=None) -> list:
+        """
+        Writes the sections for `keys` to the report (see `resolve`).
+
+        The heading of a section is written when it differs from the heading of the section
+        registered before it, so a section's block is the same in full and partial runs.
+
+        Returns:
+            list: The keys of the sections that ran.
+        """
+        sections = self.resolve(keys)
+        self.requirements(sections)
+        headings = {}
+        previous = None
+        for key, section in self.sections.items():
+            headings[key] = previous
+            previous = section.heading
+        for section in sections:
+            report.add_block(section.key, heading=section.heading)
+            if section.heading != headings[section.key]:
+                report.add_section(section.heading)
+            section.run(context, report)
+        return [section.key for section in sections]
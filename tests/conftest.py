@@ -0,0 +1,53 @@
+# tests/conftest.py
+
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+PACKAGES = ['analytics', 'datastore', 'reporting']
+SCRIPT_DIRS = ['prj_part01', 'prj_part02', 'prj_part03', 'pipeline']
+
+
+class Project:
+    """A throwaway project root that runs the repository's code (see the `project` fixture)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.root, *parts)
+
+    def run(self, script: str, *args, check: bool = True) -> subprocess.CompletedProcess:
+        """Runs a script of the project (e.g. 'prj_part01/process_data.py') in a fresh interpreter."""
+        env = dict(os.environ, PYTHONPATH=self.root)
+        result = subprocess.run([sys.executable, self.path(script), *args], cwd=self.root, env=env, capture_output=True, text=True)
+        if check and result.returncode != 0:
+            raise AssertionError(f"{script} {' '.join(args)} failed:\n{result.stderr}")
+        return result
+
+    def generate(self, rows: int) -> str:
+        """Writes a synthetic dataset where Part 1 reads it and returns its path."""
+        self.run('prj_part01/generate_data.py', '--rows', str(rows))
+        return self.path('prj_files', 'fakeTelegram.BR_2022.csv')
+
+
+@pytest.fixture
+def project(tmp_path) -> Project:
+    """
+    A project root with the packages symlinked and the scripts copied, so the scripts find
+    `prj_files` inside it and never touch the repository's data or reports. (A symlinked
+    script would import its neighbours, and read its data, from the repository.)
+    """
+    for name in PACKAGES:
+        os.symlink(os.path.join(REPO_ROOT, name), tmp_path / name)
+    for script_dir in SCRIPT_DIRS:
+        shutil.copytree(os.path.join(REPO_ROOT, script_dir), tmp_path / script_dir,
+                        ignore=lambda directory, names: [name for name in names if not name.endswith('.py')])
+    os.makedirs(tmp_path / 'prj_files')
+    return Project(str(tmp_path))
@@ -0,0 +1,56 @@
+# tests/test_association.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chi2_contingency
+from analytics import association
+from analytics.association import cramers_v, cramers_v_matrix, factorize_column
+
+
+def reference_cramers_v(x: pd.Series, y: pd.Series, bias_correction: bool = True) -> float:
+    """Cramér's V from scipy's chi-squared of the crosstab, missing values as a category."""
+    table = pd.crosstab(x.fillna('<missing>'), y.fillna('<missing>')).to_numpy()
+    chi2 = chi2_contingency(table)[0]
+    n = table.sum()
+    phi2, r, k = chi2 / n, *table.shape
+    if bias_correction:
+        phi2 = max(0.0, phi2 - (k - 1) * (r - 1) / (n - 1))
+        r, k = r - (r - 1) ** 2 / (n - 1), k - (k - 1) ** 2 / (n - 1)
+    return min(np.sqrt(phi2 / min(k - 1, r - 1)), 1.0)
+
+
+def random_columns(rows: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """Two-level, few-level and many-level columns, some related to each other and some with missing values."""
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, 300, rows)
+    return pd.DataFrame({
+        'flag': rng.choice(['yes', 'no'], rows),
+        'media': np.where(rng.random(rows) < 0.1, None, rng.choice(['video', 'image', 'audio'], rows)),
+        'group': group.astype(str),
+        # Depends on the group, so the pair has a strong association
+        'domain': np.where(rng.random(rows) < 0.8, (group % 40).astype(str), rng.integers(0, 40, rows).astype(str)),
+        'viral': (group % 2 == 0) ^ (rng.random(rows) < 0.3),
+    })
+
+
+@pytest.mark.parametrize('bias_correction', [True, False])
+@pytest.mark.parametrize('dense_cells', [association.DENSE_TABLE_CELLS, 1])
+def test_cramers_v_matches_scipy(monkeypatch, bias_correction, dense_cells):
+    # With one dense cell allowed, every table larger than 2x2 only counts its non-zero cells
+    monkeypatch.setattr(association, 'DENSE_TABLE_CELLS', dense_cells)
+    df = random_columns()
+    for i, x in enumerate(df.columns):
+        for y in df.columns[i + 1:]:
+            result = cramers_v(*factorize_column(df[x]), *factorize_column(df[y]), bias_correction=bias_correction)
+            assert result == pytest.approx(reference_cramers_v(df[x], df[y], bias_correction), abs=1e-9), (x, y)
+
+
+def test_matrix_is_symmetric_with_constant_columns_at_zero():
+    df = random_columns(1000).assign(constant='same')
+    matrix = cramers_v_matrix(df)
+    assert list(matrix.columns) == list(df.columns)
+    np.testing.assert_allclose(matrix.to_numpy(), matrix.to_numpy().T)
+    assert (matrix.loc['constant'] == 0).all()
+    assert (np.diag(matrix.drop(index='constant', columns='constant')) == 1).all()
+    assert matrix.loc['group', 'domain'] == pytest.approx(reference_cramers_v(df['group'], df['domain']))
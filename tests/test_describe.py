@@ -0,0 +1,57 @@
+# tests/test_describe.py
+
+import numpy as np
+import pandas as pd
+from analytics.describe import ColumnStats, DescriptiveStats
+
+
+def random_frame(rows: int = 4000, seed: int = 0) -> pd.DataFrame:
+    """Integer, float and mostly-missing columns, with many repeated values."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'sharings': rng.geometric(0.3, rows),
+        'score': np.where(rng.random(rows) < 0.2, np.nan, rng.normal(0.5, 0.2, rows).round(2)),
+        'chars': rng.lognormal(4, 1, rows).round(),
+        'rare': np.where(rng.random(rows) < 0.999, np.nan, rng.random(rows)),
+    })
+
+
+def assert_matches_pandas(stats: DescriptiveStats, df: pd.DataFrame):
+    summary = stats.summary()
+    expected = pd.concat([df.describe(), df.nunique().to_frame('nunique').T])
+    pd.testing.assert_frame_equal(summary.astype(float), expected[summary.columns].astype(float), rtol=1e-9)
+    for col in df.columns:
+        column = stats[col]
+        qs = [0, 0.01, 0.1, 0.33, 0.5, 0.9, 0.999, 1]
+        np.testing.assert_allclose(column.quantiles(qs), df[col].quantile(qs).to_numpy(), rtol=1e-12)
+        assert column.missing == df[col].isna().sum()
+        counts = column.value_counts()
+        expected_counts = df[col].value_counts()
+        # Same counts per value; ties are ordered by value
+        pd.testing.assert_series_equal(counts.sort_index(), expected_counts.sort_index(), check_names=False, check_index_type=False)
+        assert list(counts) == sorted(counts, reverse=True)
+
+
+def test_summary_matches_describe():
+    df = random_frame()
+    assert_matches_pandas(DescriptiveStats.from_frame(df), df)
+
+
+def test_merged_chunks_match_describe_of_the_whole_frame():
+    df = random_frame()
+    chunks = [df.iloc[start:start + 700] for start in range(0, len(df), 700)]
+    assert_matches_pandas(DescriptiveStats.from_chunks(chunks), df)
+
+
+def test_integer_columns_keep_integer_values():
+    stats = ColumnStats.from_array('sharings', np.array([3, 1, 2, 3, 3]))
+    assert isinstance(stats.min, np.integer) and isinstance(stats.max, np.integer)
+    assert stats.value_counts().index.dtype.kind == 'i'
+    assert stats.sample(10, seed=0).dtype.kind == 'i'
+
+
+def test_empty_column():
+    stats = ColumnStats.from_array('empty', np.array([np.nan, np.nan]))
+    assert stats.count == 0 and stats.missing == 2
+    assert np.isnan([stats.mean, stats.std, stats.median, stats.min, stats.max]).all()
+    assert stats.value_counts().empty
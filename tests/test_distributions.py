@@ -0,0 +1,77 @@
+# tests/test_distributions.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from analytics.describe import ColumnStats
+from analytics.distributions import fit_distributions, normality_tests
+
+SAMPLES = {
+    'normal': lambda rng, n: rng.normal(10, 2, n).round(2),
+    'exponential': lambda rng, n: rng.exponential(3, n).round(3),
+    'poisson': lambda rng, n: rng.poisson(4, n),
+}
+
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+@pytest.mark.parametrize('name', list(SAMPLES))
+def test_normality_tests_match_scipy(name):
+    x = SAMPLES[name](np.random.default_rng(0), 3000)
+    result = normality_tests(ColumnStats.from_array('x', x)).set_index('Test')
+    mean, std = x.mean(), x.std()
+    expected = {
+        'Shapiro-Wilk': stats.shapiro(x),
+        'Jarque-Bera': stats.jarque_bera(x),
+        'Kolmogorov-Smirnov': stats.kstest(x, 'norm', args=(mean, std)),
+    }
+    for test, (statistic, p) in expected.items():
+        assert result.loc[test, 'Statistic'] == pytest.approx(statistic, rel=1e-9), test
+        assert result.loc[test, 'p-value'] == pytest.approx(p, rel=1e-6, abs=1e-300), test
+    assert result.loc['Anderson-Darling', 'Statistic'] == pytest.approx(stats.anderson(x).statistic, rel=1e-9)
+    assert (result['N'] == len(x)).all()
+    assert result['Gaussian (5%)'].all() == (name == 'normal')
+
+
+def test_shapiro_wilk_runs_on_a_sample_of_large_columns():
+    x = np.random.default_rng(0).normal(size=20_000)
+    result = normality_tests(ColumnStats.from_array('x', x), sample_size=5000).set_index('Test')
+    assert result.loc['Shapiro-Wilk', 'N'] == 5000
+    assert result.loc['Jarque-Bera', 'N'] == 20_000
+    assert result.loc['Jarque-Bera', 'Statistic'] == pytest.approx(stats.jarque_bera(x).statistic, rel=1e-9)
+
+
+def test_too_few_values_give_empty_tables():
+    column = ColumnStats.from_array('x', np.array([1.0, 1.0, 1.0, np.nan]))
+    assert normality_tests(column).empty
+    assert fit_distributions(column).empty
+
+
+@pytest.mark.parametrize('name', list(SAMPLES))
+def test_fit_ranks_the_generating_distribution_first(name):
+    x = SAMPLES[name](np.random.default_rng(1), 20_000)
+    result = fit_distributions(ColumnStats.from_array('x', x))
+    assert result['Distribution'].iloc[0] == name
+    assert list(result['AIC']) == sorted(result['AIC'])
+
+
+def test_fit_matches_scipy_parameters_and_binned_likelihood():
+    x = np.random.default_rng(2).lognormal(1, 0.5, 5000).round(3)
+    result = fit_distributions(ColumnStats.from_array('x', x), max_bins=50).set_index('Distribution')
+    # Maximum-likelihood fits
+    loc, scale = stats.norm.fit(x)
+    assert result.loc['normal', 'Parameters'] == f"loc={loc:.4g}, scale={scale:.4g}"
+    s, _, log_scale = stats.lognorm.fit(x, floc=0)
+    assert result.loc['lognormal', 'Parameters'] == f"s={s:.4g}, scale={log_scale:.4g}"
+    _, expon_scale = stats.expon.fit(x, floc=0)
+    assert result.loc['exponential', 'Parameters'] == f"scale={expon_scale:.4g}"
+    # Integer-only candidates do not apply
+    assert not {'poisson', 'negative binomial'} & set(result.index)
+
+    # Multinomial log-likelihood of the normal fit over 50 quantile bins, from the rows themselves
+    cuts = np.unique(pd.Series(x).quantile(np.arange(1, 50) / 50).to_numpy())
+    cuts = cuts[cuts < x.max()]
+    counts = np.bincount(np.searchsorted(cuts, x, side='left'), minlength=len(cuts) + 1)
+    probabilities = np.diff(np.concatenate([[0], stats.norm(loc, scale).cdf(cuts), [1]]))
+    assert result.loc['normal', 'Log-Likelihood'] == pytest.approx(np.dot(counts, np.log(probabilities)), rel=1e-9)
+    assert result.loc['normal', 'AIC'] == pytest.approx(4 - 2 * result.loc['normal', 'Log-Likelihood'])
@@ -0,0 +1,38 @@
+# tests/test_generator.py
+
+import os
+import pandas as pd
+import pytest
+from reporting import ReportGenerator
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_content_stays_writable(tmp_path, streamed):
+    path = str(tmp_path / 'report.md')
+    report = ReportGenerator("Title", "Introduction.", output_path=path if streamed else None)
+    report.add_text("First.")
+    report.content += "Appended by hand.\n\n"
+    report.add_text("Last.")
+    expected = "# Title\n\nIntroduction.\n\nFirst.\n\nAppended by hand.\n\nLast.\n\n"
+    assert report.content == expected
+    report.save_report(path)
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == expected
+
+
+def test_error_removes_the_streamed_part_file(tmp_path):
+    path = str(tmp_path / 'report.md')
+    with pytest.raises(RuntimeError):
+        with ReportGenerator("Title", "Introduction.", output_path=path) as report:
+            report.add_text("Started.")
+            raise RuntimeError("failed while building the report")
+    assert os.listdir(tmp_path) == []
+
+
+def test_long_cells_are_truncated_in_both_table_writers(tmp_path):
+    texts = ['short', 'x' * 50]
+    for rows in [2, 1500]:
+        report = ReportGenerator("Title", "Introduction.", max_cell_chars=10)
+        report.add_table(pd.DataFrame({'text': (texts * rows)[:rows], 'n': range(rows)}))
+        assert 'x' * 9 + '…' in report.content
+        assert 'x' * 10 not in report.content
@@ -0,0 +1,85 @@
+# tests/test_ngrams.py
+
+from collections import Counter
+import numpy as np
+import pytest
+from analytics.ngrams import NgramCounter, count_ngrams, tokenize
+
+ORDERS = (1, 2, 3)
+
+
+def random_texts(rows: int = 1500, seed: int = 0) -> list:
+    """Texts of Zipf-distributed words (a few frequent, many rare), stop words and missing values."""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"palavra{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}" for i in range(400)]
+    texts = []
+    for _ in range(rows):
+        words = [vocabulary[min(int(rank), len(vocabulary)) - 1] for rank in rng.zipf(1.3, rng.integers(1, 12))]
+        words.insert(int(rng.integers(0, len(words) + 1)), 'de')
+        texts.append(' '.join(words) if rng.random() > 0.05 else None)
+    return texts
+
+
+def reference_counts(texts: list, weights: list) -> dict:
+    """The n-gram counts of each order, with a plain Counter."""
+    counts = {order: Counter() for order in ORDERS}
+    for text, weight in zip(texts, weights):
+        if text is None:
+            continue
+        tokens = tokenize(text)
+        for order in ORDERS:
+            for gram in zip(*(tokens[i:] for i in range(order))):
+                counts[order][' '.join(gram)] += weight
+    return counts
+
+
+def chunks(texts: list, weights: list, size: int = 200):
+    for start in range(0, len(texts), size):
+        yield texts[start:start + size], weights[start:start + size]
+
+
+def test_tokenize_drops_stop_words_digits_and_single_letters():
+    assert tokenize("O Brasil é 10! Trava-zaps, x e São-Paulo 2022") == ['brasil', 'trava-zaps', 'são-paulo']
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_counts_match_a_counter(n_jobs):
+    texts = random_texts()
+    weights = list(np.random.default_rng(1).integers(1, 4, len(texts)))
+    expected = reference_counts(texts, weights)
+    result = count_ngrams(chunks(texts, weights), orders=ORDERS, n_jobs=n_jobs)
+    for order in ORDERS:
+        assert result.counts[order] == expected[order]
+        assert result.error[order] == 0
+    assert result.most_common(1, 5) == sorted(expected[1].items(), key=lambda item: (-item[1], item[0]))[:5]
+
+
+def test_merge_of_chunk_counters_matches_one_counter():
+    texts = random_texts()
+    whole = NgramCounter(ORDERS)
+    whole.update(texts)
+    merged = NgramCounter(ORDERS)
+    for chunk, _ in chunks(texts, [None] * len(texts), size=300):
+        part = NgramCounter(ORDERS)
+        part.update(chunk)
+        merged.merge(part)
+    assert merged.counts == whole.counts
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_capacity_keeps_the_heavy_hitters_within_the_error_bound(n_jobs):
+    capacity = 20
+    texts = random_texts()
+    weights = [1] * len(texts)
+    expected = reference_counts(texts, weights)
+    result = count_ngrams(chunks(texts, weights), orders=ORDERS, n_jobs=n_jobs, capacity=capacity)
+    for order in ORDERS:
+        counts, exact, error = result.counts[order], expected[order], result.error[order]
+        total = sum(exact.values())
+        assert len(counts) <= 2 * capacity
+        assert 0 < error <= total / (capacity + 1)
+        # Counts are lower bounds, off by at most `error`
+        for gram, count in counts.items():
+            assert exact[gram] - error <= count <= exact[gram]
+        # Every n-gram more frequent than the error is kept
+        assert {gram for gram, count in exact.items() if count > error} <= set(counts)
@@ -0,0 +1,141 @@
+# tests/test_pipeline.py
+
+import os
+from datastore import processed_dataset_path, read_partitioned_parquet
+from pipeline.orchestrator import Pipeline, Stage
+
+PIPELINE = 'pipeline/run_pipeline.py'
+PROCESS = 'prj_part01/process_data.py'
+
+
+def read(path: str) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def write(path: str, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def make_pipeline(tmp_path, runs: list, overwrite_modified: bool = False) -> Pipeline:
+    """source.txt -> upper (upper.txt) -> count (count.txt), with an in-memory value in between."""
+    source, upper, count = (str(tmp_path / name) for name in ['source.txt', 'upper.txt', 'count.txt'])
+
+    def load(pipeline):
+        runs.append('load')
+        return {'text': read(source)}
+
+    def to_upper(pipeline):
+        runs.append('upper')
+        write(upper, pipeline.value('text').upper())
+
+    def count_chars(pipeline):
+        runs.append('count')
+        write(count, str(len(read(upper))))
+
+    return Pipeline([
+        Stage('load', load, inputs=[source], provides=['text']),
+        Stage('upper', to_upper, needs=['text'], outputs=[upper]),
+        Stage('count', count_chars, inputs=[upper], outputs=[count], overwrite_modified=overwrite_modified),
+    ], str(tmp_path / 'manifest.json'))
+
+
+def statuses(summary) -> dict:
+    return dict(zip(summary['Stage'], summary['Status']))
+
+
+def test_manifest_skips_up_to_date_stages_and_reruns_changed_ones(tmp_path):
+    runs = []
+    write(str(tmp_path / 'source.txt'), 'abc')
+    pipeline = make_pipeline(tmp_path, runs)
+    assert statuses(pipeline.run()) == {'load': 'ran', 'upper': 'ran', 'count': 'ran'}
+
+    runs.clear()
+    assert statuses(pipeline.run()) == {'load': 'not needed', 'upper': 'skipped', 'count': 'skipped'}
+    assert runs == []
+
+    # A changed input reaches the stages after it; a dry run only tells
+    write(str(tmp_path / 'source.txt'), 'abcd')
+    summary = pipeline.run(dry_run=True)
+    assert statuses(summary) == {'load': 'not needed', 'upper': 'would run', 'count': 'would run'}
+    assert list(summary['Reason'])[1:] == ['inputs or code changed', 'inputs will change']
+    assert runs == []
+    pipeline.run()
+    assert runs == ['load', 'upper', 'count']
+    assert read(str(tmp_path / 'count.txt')) == '4'
+
+    # A missing output is rebuilt; forcing a stage reruns it and, through its outputs, the next one
+    runs.clear()
+    os.remove(tmp_path / 'count.txt')
+    pipeline.run()
+    assert runs == ['count']
+    runs.clear()
+    pipeline.run(force=['upper'])
+    assert runs == ['load', 'upper', 'count']
+
+
+def test_output_modified_outside_the_pipeline_is_a_conflict(tmp_path):
+    runs = []
+    write(str(tmp_path / 'source.txt'), 'abc')
+    pipeline = make_pipeline(tmp_path, runs)
+    pipeline.run()
+
+    runs.clear()
+    write(str(tmp_path / 'upper.txt'), 'ABC, edited')
+    summary = pipeline.run()
+    assert statuses(summary) == {'load': 'not needed', 'upper': 'conflict', 'count': 'ran'}
+    assert 'modified outside the pipeline' in summary['Reason'][1]
+    assert runs == ['count']
+    assert read(str(tmp_path / 'upper.txt')) == 'ABC, edited'
+
+    runs.clear()
+    pipeline.run(force=['upper'])
+    assert runs == ['load', 'upper', 'count']
+    assert read(str(tmp_path / 'upper.txt')) == 'ABC'
+
+
+def test_overwrite_modified_stage_is_rebuilt(tmp_path):
+    runs = []
+    write(str(tmp_path / 'source.txt'), 'abc')
+    pipeline = make_pipeline(tmp_path, runs, overwrite_modified=True)
+    pipeline.run()
+
+    runs.clear()
+    write(str(tmp_path / 'count.txt'), 'edited')
+    assert statuses(pipeline.run())['count'] == 'ran'
+    assert read(str(tmp_path / 'count.txt')) == '3'
+
+
+def test_pipeline_keeps_appended_rows(project):
+    csv_path = project.generate(3000)
+    with open(csv_path, encoding='utf-8') as f:
+        header, *lines = f.readlines()
+    batch_path = project.path('batch.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[:2000])
+    with open(batch_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[2000:])
+
+    def processed_rows() -> int:
+        return len(read_partitioned_parquet(processed_dataset_path(project.root), columns=['id_message']))
+
+    project.run(PIPELINE, '--jobs', '1')
+    history_rows = processed_rows()
+    project.run(PROCESS, '--append', batch_path)
+    appended_rows = processed_rows()
+    assert appended_rows > history_rows
+
+    dry_run = project.run(PIPELINE, '--dry-run', check=False)
+    assert dry_run.returncode == 1
+    assert "not running stage 'features'" in dry_run.stdout
+
+    result = project.run(PIPELINE, '--jobs', '1', check=False)
+    assert result.returncode == 1
+    assert "Running stage 'features'" not in result.stdout
+    assert "Running stage 'query_report'" in result.stdout
+    assert "Running stage 'eda_report'" in result.stdout
+    assert processed_rows() == appended_rows
+
+    project.run(PIPELINE, '--jobs', '1', '--force', 'features')
+    assert processed_rows() == history_rows
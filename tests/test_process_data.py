@@ -0,0 +1,150 @@
+# tests/test_process_data.py
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from datastore import TextPool, list_partitions, processed_dataset_path, read_partitioned_parquet, text_pool_path
+
+ROWS = 6000
+HISTORY_ROWS = 4200
+
+PROCESS = 'prj_part01/process_data.py'
+
+
+def read_processed(project) -> dict:
+    """Reads back everything Part 1 saved: the rows, the text pool, the share counters and the days."""
+    path = processed_dataset_path(project.root)
+    rows = read_partitioned_parquet(path)
+    # Categories depend on the rows read, not on the values
+    rows = rows.astype({col: 'object' for col in rows.select_dtypes('category').columns})
+    return {
+        'rows': rows,
+        'pool': TextPool.load(text_pool_path(path)),
+        'share_counts': np.load(os.path.join(text_pool_path(path), 'share_counts.npy')),
+        'days': list_partitions(path),
+    }
+
+
+def test_append_matches_full_run(project):
+    csv_path = project.generate(ROWS)
+    project.run(PROCESS)
+    full = read_processed(project)
+
+    # The history is the first rows of the export, the batch the rest (the file is chronological,
+    # so the batch starts on the last day of the history and repeats some of its texts)
+    with open(csv_path, encoding='utf-8') as f:
+        header, *lines = f.readlines()
+    batch_path = project.path('batch.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[:HISTORY_ROWS])
+    with open(batch_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[HISTORY_ROWS:])
+    project.run(PROCESS)
+    appended = project.run(PROCESS, '--append', batch_path)
+    assert ' 0 older day(s) patched' not in appended.stdout
+    incremental = read_processed(project)
+
+    pd.testing.assert_frame_equal(incremental['rows'], full['rows'])
+    for name in ['offsets', 'data']:
+        np.testing.assert_array_equal(getattr(incremental['pool'], name), getattr(full['pool'], name))
+    np.testing.assert_array_equal(incremental['share_counts'], full['share_counts'])
+    assert incremental['days'] == full['days']
+
+
+def test_append_without_processed_dataset(project):
+    batch_path = project.generate(ROWS)
+    result = project.run(PROCESS, '--append', batch_path, check=False)
+    assert result.returncode == 2
+    assert 'Run the full pipeline first' in result.stderr
+    assert 'Traceback' not in result.stderr
+
+
+def test_append_refuses_near_duplicate_clusters(project):
+    batch_path = project.generate(1000)
+    project.run(PROCESS, '--near-duplicates')
+    result = project.run(PROCESS, '--append', batch_path, check=False)
+    assert result.returncode == 2
+    assert 'near-duplicate clusters' in result.stderr
+    assert 'Traceback' not in result.stderr
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'duckdb'])
+def test_trava_zaps_is_a_case_insensitive_substring(project, engine):
+    csv_path = project.generate(2000)
+    raw = pd.read_csv(csv_path)
+    removed_texts = ['TRAVA-ZAPS', 'veja o trava-zaps aqui', 'trava-zapsssss', 'xtrava-zaps', 'trava-zaps123']
+    kept_texts = ['trava zaps', 'trava_zaps', 'travazaps']
+    raw.loc[:len(removed_texts + kept_texts) - 1, 'text_content_anonymous'] = removed_texts + kept_texts
+    raw.to_csv(csv_path, index=False)
+    expected = raw['text_content_anonymous'].str.contains('trava-zaps', na=False, case=False).sum()
+
+    project.run(PROCESS, '--engine', engine)
+    with open(project.path('prj_part01', 'report.md'), encoding='utf-8') as f:
+        assert f"Found and removed **{expected}** rows containing 'trava-zaps'." in f.read()
+    texts = set(read_processed(project)['rows']['text_content_anonymous'].dropna())
+    assert not texts & set(removed_texts)
+    assert set(kept_texts) <= texts
+
+
+# Runs an append that fails at a given step, as an interrupted process would leave it
+INTERRUPTED_APPEND = '''
+import sys
+import process_data
+
+batch_path, fail_in, calls_before_failure = sys.argv[1], sys.argv[2], int(sys.argv[3])
+original = getattr(process_data, fail_in)
+
+def failing(*args, **kwargs):
+    global calls_before_failure
+    if calls_before_failure == 0:
+        raise KeyboardInterrupt
+    calls_before_failure -= 1
+    return original(*args, **kwargs)
+
+setattr(process_data, fail_in, failing)
+process_data.append_batch(batch_path)
+'''
+
+
+@pytest.mark.parametrize('fail_in, calls_before_failure, recovered', [
+    ('write_partition', 1, 'discarded'),
+    # The text pool is swapped in, the day partitions are not
+    ('_swap_in', 1, 'finished'),
+])
+def test_interrupted_append_is_recovered(project, fail_in, calls_before_failure, recovered):
+    csv_path = project.generate(ROWS)
+    project.run(PROCESS)
+    full = read_processed(project)
+
+    with open(csv_path, encoding='utf-8') as f:
+        header, *lines = f.readlines()
+    batch_path = project.path('batch.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[:HISTORY_ROWS])
+    with open(batch_path, 'w', encoding='utf-8') as f:
+        f.writelines([header] + lines[HISTORY_ROWS:])
+    project.run(PROCESS)
+    history = read_processed(project)
+
+    with open(project.path('prj_part01', 'interrupted_append.py'), 'w', encoding='utf-8') as f:
+        f.write(INTERRUPTED_APPEND)
+    interrupted = project.run('prj_part01/interrupted_append.py', batch_path, fail_in, str(calls_before_failure), check=False)
+    assert interrupted.returncode != 0
+    # Whatever was swapped in, the stored rows only refer to texts of the saved pool
+    left = read_processed(project)
+    assert left['rows']['text_id'].max() < len(left['pool'])
+    if recovered == 'discarded':
+        pd.testing.assert_frame_equal(left['rows'], history['rows'])
+
+    # An append interrupted while staging is retried; one interrupted while swapping was already done
+    empty_batch = project.path('empty.csv')
+    with open(empty_batch, 'w', encoding='utf-8') as f:
+        f.write(header)
+    result = project.run(PROCESS, '--append', batch_path if recovered == 'discarded' else empty_batch)
+    assert f"An interrupted append was {recovered}" in result.stdout
+    assert not os.path.exists(os.path.splitext(processed_dataset_path(project.root))[0] + '.append')
+    incremental = read_processed(project)
+    pd.testing.assert_frame_equal(incremental['rows'], full['rows'])
+    np.testing.assert_array_equal(incremental['share_counts'], full['share_counts'])
+    assert incremental['days'] == full['days']
@@ -0,0 +1,76 @@
+# tests/test_query_runner.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import duckdb
+import pandas as pd
+from datastore import QueryRunner
+from datastore.parquet_store import read_tagged_parquet, write_tagged_parquet
+
+QUERIES = {
+    'per_group': "SELECT grp, COUNT(*) AS n FROM messages GROUP BY grp ORDER BY grp",
+    'total': "SELECT SUM(value) AS total FROM messages WHERE value > 1",
+}
+
+
+def connect() -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    con.execute("CREATE TABLE messages AS SELECT i % 3 AS grp, i AS value FROM range(100) t(i)")
+    return con
+
+
+def sources(runner: QueryRunner) -> list:
+    return list(runner.stats_frame()['Source'])
+
+
+def test_cache_miss_then_hit(tmp_path):
+    con = connect()
+    expected = {name: con.execute(sql).fetchdf() for name, sql in QUERIES.items()}
+
+    first = QueryRunner(con, 'v1', cache_dir=str(tmp_path))
+    results = first.run(QUERIES)
+    assert sources(first) == ['DuckDB', 'DuckDB']
+    assert list(first.stats_frame()['Rows Scanned']) == [100, 100]
+
+    # Reformatting a query keeps its cached result
+    second = QueryRunner(con, 'v1', cache_dir=str(tmp_path))
+    cached = second.run({'per_group': "SELECT  grp, COUNT(*) AS n\n FROM messages GROUP BY grp ORDER BY grp;", 'total': QUERIES['total']})
+    assert sources(second) == ['cache', 'cache']
+    # Nothing was scanned for a cached result
+    assert list(second.stats_frame()['Rows Scanned']) == ['', '']
+    for name in QUERIES:
+        pd.testing.assert_frame_equal(results[name], expected[name])
+        pd.testing.assert_frame_equal(cached[name], expected[name])
+
+
+def test_registered_tables_are_part_of_the_key(tmp_path):
+    con = connect()
+    sql = {'top': "SELECT MAX(x) AS top FROM extra"}
+    runner = QueryRunner(con, 'v1', cache_dir=str(tmp_path))
+    runner.run(sql, tables={'top': {'extra': pd.DataFrame({'x': [1, 2]})}})
+    result = runner.run(sql, tables={'top': {'extra': pd.DataFrame({'x': [1, 5]})}})
+    assert sources(runner) == ['DuckDB', 'DuckDB']
+    assert result['top']['top'].tolist() == [5]
+    runner.run(sql, tables={'top': {'extra': pd.DataFrame({'x': [1, 5]})}})
+    assert sources(runner)[-1] == 'cache'
+
+
+def test_new_version_prunes_the_old_results(tmp_path):
+    con = connect()
+    QueryRunner(con, 'v1', cache_dir=str(tmp_path)).run(QUERIES)
+    assert len(os.listdir(tmp_path)) == len(QUERIES)
+
+    runner = QueryRunner(con, 'v2', cache_dir=str(tmp_path))
+    runner.run({'total': QUERIES['total']})
+    assert sources(runner) == ['DuckDB']
+    assert os.listdir(tmp_path) == [os.path.basename(runner._cache_file(runner._key(QUERIES['total'], None)))]
+
+
+def test_concurrent_writes_of_one_file(tmp_path):
+    path = str(tmp_path / 'result.parquet')
+    frames = [pd.DataFrame({'writer': [i] * 1000}) for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: write_tagged_parquet(frames[i], path, b'test', {'writer': i}), range(8)))
+    result, metadata = read_tagged_parquet(path, b'test')
+    pd.testing.assert_frame_equal(result, frames[metadata['writer']])
+    assert os.listdir(tmp_path) == ['result.parquet']
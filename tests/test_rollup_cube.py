@@ -0,0 +1,90 @@
+# tests/test_rollup_cube.py
+
+import duckdb
+import numpy as np
+import pandas as pd
+from datastore import HourlyCube
+
+
+def messages(rows: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """Random messages over ten days, with missing scores and media types."""
+    rng = np.random.default_rng(seed)
+    misinformation = rng.choice([0.1, 0.5, 0.9, np.nan], rows)
+    sentiment = rng.choice([-1.0, 0.2, 0.8, np.nan], rows)
+    return pd.DataFrame({
+        'date_message': pd.Timestamp('2022-10-01') + pd.to_timedelta(rng.integers(0, 10 * 86400, rows), unit='s'),
+        'id_group_anonymous': rng.choice(['g1', 'g2', 'g3'], rows),
+        'media_type': rng.choice(['video', 'image', None], rows),
+        'score_sentiment': sentiment,
+        'sentiment': pd.array(np.sign(np.nan_to_num(sentiment)), dtype='Int8'),
+        'score_misinformation': misinformation,
+    })
+
+
+def expected_rollup(df: pd.DataFrame, keys: dict) -> pd.DataFrame:
+    """The roll-up computed directly on the messages with a pandas group-by."""
+    frame = df.assign(**keys)
+    return frame.groupby(list(keys), dropna=False, sort=True).agg(
+        count=('date_message', 'size'),
+        score_sentiment_sum=('score_sentiment', 'sum'),
+        score_sentiment_count=('score_sentiment', 'count'),
+        score_misinformation_sum=('score_misinformation', 'sum'),
+        score_misinformation_count=('score_misinformation', 'count'),
+    ).reset_index()
+
+
+def assert_rollup_equal(result: pd.DataFrame, expected: pd.DataFrame):
+    # Compare values: the cube keeps its own dtypes for the dimensions
+    pd.testing.assert_frame_equal(result.astype(object).where(result.notna(), None),
+                                  expected.astype(object).where(expected.notna(), None), check_exact=False)
+
+
+def test_rollups_match_a_groupby_of_the_messages():
+    df = messages()
+    cube = HourlyCube.from_frame(df)
+    assert len(cube) < len(df)
+    bucket = np.select([df['score_misinformation'].isna(), df['score_misinformation'] > 0.5, df['score_misinformation'] < 0.5],
+                       ['Unknown', 'Misinformation', 'Not Misinformation'], default='Neutral')
+    hours = df['date_message']
+
+    assert_rollup_equal(cube.rollup('day'), expected_rollup(df, {'day': hours.dt.floor('D')}))
+    assert_rollup_equal(cube.rollup('hour_of_day', 'media_type'),
+                        expected_rollup(df, {'hour_of_day': hours.dt.hour, 'media_type': df['media_type']}))
+    assert_rollup_equal(cube.rollup('weekday', 'misinformation'),
+                        expected_rollup(df, {'weekday': hours.dt.dayofweek, 'misinformation': bucket}))
+
+    video = df[(df['media_type'] == 'video') & (bucket == 'Misinformation')]
+    assert_rollup_equal(cube.slice(media_type='video', misinformation='Misinformation').rollup('id_group_anonymous'),
+                        expected_rollup(video, {'id_group_anonymous': video['id_group_anonymous']}))
+    week = df[(hours >= '2022-10-02') & (hours < '2022-10-09')]
+    assert_rollup_equal(cube.between('2022-10-02', '2022-10-09').rollup('sentiment'),
+                        expected_rollup(week, {'sentiment': week['sentiment']}))
+
+    totals = cube.rollup()
+    assert totals['count'].item() == len(df)
+    assert totals['score_sentiment_count'].item() == df['score_sentiment'].count()
+    assert np.isclose(totals['score_misinformation_sum'].item(), df['score_misinformation'].sum())
+
+
+def test_duckdb_builds_the_same_cells():
+    df = messages()
+    con = duckdb.connect()
+    con.register('telegram_data', df)
+    pd.testing.assert_frame_equal(HourlyCube.from_duckdb(con).cells, HourlyCube.from_frame(df).cells, check_exact=False)
+
+
+def test_open_rebuilds_only_for_another_version(tmp_path):
+    path = str(tmp_path / 'cube.parquet')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return HourlyCube.from_frame(messages())
+
+    cube, rebuilt = HourlyCube.open(path, 'v1', build)
+    assert rebuilt
+    reopened, rebuilt = HourlyCube.open(path, 'v1', build)
+    assert not rebuilt
+    pd.testing.assert_frame_equal(reopened.cells, cube.cells)
+    _, rebuilt = HourlyCube.open(path, 'v2', build)
+    assert rebuilt and len(builds) == 2
@@ -0,0 +1,53 @@
+# tests/test_sections.py
+
+import pytest
+from reporting import ReportGenerator, SectionContext, SectionProfiler, SectionRegistry, split_blocks
+
+KEYS = ['a', 'e', 'h.4', 'h.5-h.9', 'h.10']
+
+
+def make_registry() -> SectionRegistry:
+    registry = SectionRegistry()
+    for key in KEYS:
+        @registry.section(key, f"Heading {key[0]}")
+        def write(ctx, report, key=key):
+            report.add_question(key, f"Question {key}")
+            report.add_text(f"Answer of {key} in the {ctx.run} run.")
+    return registry
+
+
+def write_report(registry, path, run, keys=None, profile=False):
+    report = ReportGenerator("Report", "Introduction.", profiler=SectionProfiler(run, enabled=profile, memory=False))
+    registry.run(SectionContext(registry, run=run), report, keys)
+    if keys is None:
+        report.save_report(path)
+    else:
+        report.merge_report(path, list(registry.sections))
+
+
+def test_resolve_matches_questions_to_their_section():
+    registry = make_registry()
+    assert [section.key for section in registry.resolve(['h.10', 'h.7', 'e.3'])] == ['e', 'h.5-h.9', 'h.10']
+    for key in ['h.5', 'h.9', 'h.5-h.9']:
+        assert [section.key for section in registry.resolve([key])] == ['h.5-h.9']
+    for key in ['h.11', 'h.3', 'x']:
+        with pytest.raises(ValueError, match='Unknown section'):
+            registry.resolve([key])
+
+
+def test_partial_run_keeps_the_full_profile(tmp_path):
+    registry = make_registry()
+    path = str(tmp_path / 'report.md')
+    write_report(registry, path, 'full', profile=True)
+    with open(path, encoding='utf-8') as f:
+        _, full = split_blocks(f.read())
+    write_report(registry, path, 'partial', keys=['h.6'], profile=True)
+    with open(path, encoding='utf-8') as f:
+        _, merged = split_blocks(f.read())
+
+    assert list(merged) == KEYS + ['profile', 'profile.partial']
+    assert 'partial run' in merged['h.5-h.9']
+    for key in KEYS + ['profile']:
+        if key != 'h.5-h.9':
+            assert merged[key] == full[key]
+    assert 'Section Profile (Partial Run)' in merged['profile.partial']
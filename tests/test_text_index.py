@@ -0,0 +1,85 @@
+# tests/test_text_index.py
+
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+import pytest
+from datastore import TextIndex, TextPool
+
+WORDS = ['Facção', 'faccao', 'criminosa', 'segurança', 'POLÍCIA', 'trava-zaps', 'zaps', 'eleição', 'urna', '2022', 'voto']
+QUERIES = [
+    'faccao', 'FACÇÃO criminosa', 'segurança OR policia', '"trava-zaps"', 'trava zaps', '"zaps trava"',
+    '"facção criminosa" OR urna 2022', 'inexistente', 'voto inexistente', 'policia OR inexistente',
+]
+
+
+def random_texts(rows: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [' '.join(rng.choice(WORDS, rng.integers(1, 7))) + rng.choice(['', '!', '...']) for _ in range(rows)]
+
+
+def tokens(text: str) -> list:
+    """Lowercased, accent-folded words, with plain Python."""
+    folded = ''.join(c for c in unicodedata.normalize('NFKD', text.lower()) if not unicodedata.combining(c))
+    return [token for token in re.split(r'[^\w]+|_', folded) if token]
+
+
+def reference_search(texts: list, query: str) -> np.ndarray:
+    """The ids of the texts matching a query, checking every text."""
+    def holds(words: list, term: str) -> bool:
+        phrase = tokens(term.strip('"'))
+        return any(words[i:i + len(phrase)] == phrase for i in range(len(words) - len(phrase) + 1))
+
+    groups = [re.findall(r'"[^"]*"|\S+', group) for group in re.split(r'\s+OR\s+', query)]
+    return np.array([i for i, text in enumerate(texts)
+                     if any(all(holds(tokens(text), term) for term in group) for group in groups)], dtype=np.int64)
+
+
+def test_search_matches_a_scan_of_every_text():
+    texts = random_texts(800, seed=0)
+    pool, _ = TextPool.build(pd.Series(texts))
+    index = TextIndex.build(pool)
+    for query in QUERIES:
+        np.testing.assert_array_equal(index.search(query), reference_search(list(pool.texts()), query), err_msg=query)
+
+
+def test_row_mask_skips_missing_texts():
+    pool, codes = TextPool.build(pd.Series(['urna eletrônica', None, 'voto', 'Urna']))
+    index = TextIndex.build(pool)
+    assert index.row_mask(codes, 'urna').tolist() == [True, False, False, True]
+    assert index.rows(codes, 'urna OR voto').tolist() == [0, 2, 3]
+
+
+def test_open_extends_the_saved_index_as_the_pool_grows(tmp_path):
+    path = str(tmp_path / 'index')
+    history = random_texts(500, seed=1)
+    pool, _ = TextPool.build(pd.Series(history))
+    TextIndex.open(path, pool)
+
+    pool, _ = pool.extend(pd.Series(random_texts(300, seed=2) + history[:50]))
+    extended = TextIndex.open(path, pool)
+    assert extended.num_texts == len(pool)
+    rebuilt = TextIndex.build(pool)
+    for query in QUERIES:
+        np.testing.assert_array_equal(extended.search(query), rebuilt.search(query), err_msg=query)
+    reopened = TextIndex.load(path, pool)
+    np.testing.assert_array_equal(reopened.postings, rebuilt.postings)
+    np.testing.assert_array_equal(reopened.offsets, rebuilt.offsets)
+
+
+def test_open_rebuilds_the_index_of_another_pool(tmp_path):
+    path = str(tmp_path / 'index')
+    TextIndex.open(path, TextPool.build(pd.Series(random_texts(200, seed=3)))[0])
+    other, _ = TextPool.build(pd.Series(random_texts(200, seed=4)))
+    index = TextIndex.open(path, other)
+    np.testing.assert_array_equal(index.search('urna'), reference_search(list(other.texts()), 'urna'))
+
+
+def test_phrase_needs_the_pool():
+    pool, _ = TextPool.build(pd.Series(['facção criminosa', 'criminosa facção']))
+    index = TextIndex.build(pool)
+    index.pool = None
+    assert index.search('facção').tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        index.search('"facção criminosa"')
@@ -0,0 +1,62 @@
+# tests/test_user_profiles.py
+
+import numpy as np
+import pandas as pd
+from analytics.user_profiles import UserProfiles
+
+
+def messages(rows: int = 3000, seed: int = 0) -> pd.DataFrame:
+    """Random messages with missing users, texts, media flags, sentiments and scores."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id_member_anonymous': rng.choice(['u1', 'u2', 'u3', 'u4', 'u5', None], rows),
+        'id_group_anonymous': rng.choice(['g1', 'g2', 'g3'], rows),
+        'text_id': rng.integers(-1, 40, rows),
+        'has_media': pd.array(rng.choice([True, False, None], rows), dtype='boolean'),
+        'sentiment': pd.array(rng.choice([-1, 0, 1, None], rows), dtype='Int8'),
+        'score_misinformation': rng.choice([0.2, 0.5, 0.7, np.nan], rows),
+    })
+
+
+def test_profiles_match_a_groupby_of_the_messages():
+    df = messages()
+    profiles = UserProfiles.from_frame(df)
+    rows = df[df['id_member_anonymous'].notna()]
+    texts = rows[rows['text_id'] >= 0]
+    by_user = rows.groupby('id_member_anonymous')
+
+    pairs = texts.groupby(['id_member_anonymous', 'text_id']).agg(
+        count=('text_id', 'size'), unique_group_count=('id_group_anonymous', 'nunique')).reset_index()
+    expected = pd.DataFrame({
+        'messages': by_user.size(),
+        'text_only': by_user['has_media'].apply(lambda media: (media == False).sum()),
+        'media': by_user['has_media'].apply(lambda media: (media == True).sum()),
+        'sentiment_sum': by_user['sentiment'].sum(),
+        'groups': by_user['id_group_anonymous'].nunique(),
+        'texts': texts.groupby('id_member_anonymous')['text_id'].nunique(),
+        'repeated_texts': pairs[pairs['count'] > 1].groupby('id_member_anonymous').size(),
+        'repeated_texts_in_groups': pairs[pairs['unique_group_count'] > 1].groupby('id_member_anonymous').size(),
+        'misinformation': by_user['score_misinformation'].apply(lambda scores: (scores > 0.5).sum()),
+        'misinformation_scored': by_user['score_misinformation'].count(),
+        'misinformation_score_mean': by_user['score_misinformation'].mean(),
+    }).fillna({'texts': 0, 'repeated_texts': 0, 'repeated_texts_in_groups': 0})
+
+    pd.testing.assert_frame_equal(profiles.users, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(profiles.pairs, pairs, check_dtype=False)
+
+
+def test_top_orders_ties_by_user_id():
+    df = pd.DataFrame({
+        'id_member_anonymous': ['b', 'a', 'c', 'b', 'a', 'c', 'd'],
+        'id_group_anonymous': ['g1', 'g1', 'g1', 'g2', 'g2', 'g1', 'g1'],
+        'text_id': [0, 0, 1, 0, 0, 1, 2],
+        'has_media': [False] * 7,
+        'sentiment': [0] * 7,
+        'score_misinformation': [0.1] * 7,
+    })
+    profiles = UserProfiles.from_frame(df)
+    assert profiles.top('messages', n=3)['id_member_anonymous'].tolist() == ['a', 'b', 'c']
+    assert profiles.top('messages', ascending=True, n=1)['id_member_anonymous'].tolist() == ['d']
+    assert profiles.top('groups', min_value=2)['id_member_anonymous'].tolist() == ['a', 'b']
+    top_pairs = profiles.top_pairs('count', min_value=2)
+    assert top_pairs[['id_member_anonymous', 'text_id']].values.tolist() == [['a', 0], ['b', 0], ['c', 1]]